@@ -1,37 +1,188 @@
 import os
+import re
+import secrets
+import hashlib
+import atexit
+import logging
 import time
 import random
-from flask import Flask, jsonify, request
+import queue
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from logging.handlers import QueueHandler, QueueListener
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+# Request logging: INFO in production, set LOG_LEVEL=DEBUG for per-step detail.
+# Request threads only enqueue records; a listener thread does the stream writes.
+log_queue = queue.Queue(-1)
+log_stream_handler = logging.StreamHandler()
+log_stream_handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+log_listener = QueueListener(log_queue, log_stream_handler)
+logging.getLogger().setLevel(os.getenv("LOG_LEVEL", "INFO").upper())
+logging.getLogger().addHandler(QueueHandler(log_queue))
+log_listener.start()
+atexit.register(log_listener.stop)
+log = logging.getLogger(__name__)
+
 # Import optimized services
-from services.spotify import SpotifyService
-from services.qloo import QlooService
-from services.gemini import GeminiService
+from services.spotify import TRACK_URI_PREFIX, get_spotify_service
+from services.qloo import get_qloo_service
+from services.gemini import get_gemini_service
 from services.music_aggregator import MusicAggregatorService
+from services.database import get_database_service
+from services.progress import progress_tracker
 
 # Import route handlers
 from routes.auth import auth_routes
-from routes.recommendations import recommendation_routes
+from routes.recommendations import clear_recommendation_caches, invalidate_history_pages, recommendation_routes
 from routes.playlists import playlist_routes
+from utils.helpers import count_cultural_tags
+from utils.json_provider import ORJSONProvider, conditional_json_response, dumps_bytes, etag_json_response, json_response
+from utils.ttl_cache import TTLCache
 
 app = Flask(__name__)
+app.json = ORJSONProvider(app)
 CORS(app, origins=['http://localhost:5173', 'http://127.0.0.1:5173', 'http://localhost:3000', 'http://127.0.0.1:3000', 'http://localhost:8080', 'http://127.0.0.1:8080', 'http://localhost:4173', 'http://127.0.0.1:4173'], supports_credentials=True)
 
 # Initialize services
-spotify_service = SpotifyService()
-qloo_service = QlooService()
-gemini_service = GeminiService()
+spotify_service = get_spotify_service()
+qloo_service = get_qloo_service()
+gemini_service = get_gemini_service()
 music_aggregator_service = MusicAggregatorService()
+# One shared instance for every route and blueprint; DatabaseService borrows pooled
+# sqlite connections per call, so it is safe to share across Flask's request threads
+db_service = get_database_service()
 
 # Initialize cache for cross-domain recommendations (home page only)
-crossdomain_cache = {}
 CACHE_EXPIRY = 3600  # 1 hour in seconds
+crossdomain_cache = TTLCache(CACHE_EXPIRY)
+
+# Response timestamps only change once per second, so format them at most once per second
+timestamp_cache = [0, ""]
+
+def iso_timestamp():
+    """Return the current local time as an ISO string, cached per second"""
+    now = int(time.time())
+    if now != timestamp_cache[0]:
+        timestamp_cache[1] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(now))
+        timestamp_cache[0] = now
+    return timestamp_cache[1]
+
+# Shape of artist entries built from top scored artist names (no Spotify lookup);
+# genres is a shared tuple, so entries must not be mutated in place
+PLACEHOLDER_ARTIST = {
+    "id": "",  # We don't have artist IDs from music recommendations
+    "name": "",
+    "image": None,
+    "genres": (),
+    "popularity": 0,
+    "followers": 0
+}
+
+# Static feature list advertised with every enhanced music recommendation
+ENHANCED_FEATURES = (
+    "Cultural Intelligence",
+    "Location-Aware Recommendations",
+    "Multi-Strategy Analysis",
+    "Affinity Scoring",
+    "Cross-Domain Insights",
+    "Enhanced Gemini Integration",
+    "Smart Pre-filtering",
+    "Optimized Track Collection",
+    "Pro Model Processing",
+    "Variety System",
+    "Anti-Repetition Algorithm",
+    "25-30 Relevance-Optimized Recommendations",
+    "Global Music Aggregator",
+    "Multi-Provider Variety",
+    "Cultural Music Discovery",
+    "Mood-Based Variety",
+    "YouTube Music Integration",
+    "Last.fm Integration",
+    "Deezer Integration",
+    "Enhanced Global Variety"
+)
+
+# Precompiled pattern for pulling track IDs out of Spotify track URLs/URIs
+TRACK_ID_PATTERN = re.compile(r'(?:spotify\.com/track/|spotify:track:)([A-Za-z0-9]+)')
+
+# Shared worker pool for the per-domain cross-domain fan-out: one worker per domain
+# for up to 8 concurrent requests, so a burst doesn't queue domains behind each other
+DOMAIN_WORKERS = 40
+domain_executor = ThreadPoolExecutor(max_workers=DOMAIN_WORKERS, thread_name_prefix="crossdomain")
+DOMAIN_TIMEOUT = 4.0  # seconds to wait on all domains before returning what we have
+
+# Buffered recommendation history writes (flushed in batches by a background thread)
+HISTORY_BUFFER_SIZE = 10000
+history_buffer = queue.Queue(maxsize=HISTORY_BUFFER_SIZE)
+HISTORY_FLUSH_INTERVAL = 0.5  # seconds
+HISTORY_FLUSH_BATCH_SIZE = 200
+
+# Taste/mood analytics writes that don't feed the response
+analytics_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="analytics")
 
+def run_analytics_write(write, *args):
+    """Run one analytics write on analytics_executor, logging failures instead of dropping them silently"""
+    try:
+        write(*args)
+    except Exception:
+        log.exception("[ANALYTICS] %s failed", write.__name__)
+
+def store_history_rows(rows: list):
+    """Bulk-store history rows, then drop the affected users' prefetched history pages"""
+    db_service.bulk_store_recommendation_history(rows)
+    for user_id in {row["user_id"] for row in rows}:
+        invalidate_history_pages(user_id)
+
+def queue_history_row(row: dict):
+    """Queue a history row for the next batched write; writes it directly if the buffer is full"""
+    try:
+        history_buffer.put_nowait(row)
+    except queue.Full:
+        log.warning("[HISTORY BUFFER] Buffer full, writing row directly")
+        store_history_rows([row])
+
+def flush_history_buffer():
+    """Drain buffered history rows and store them with one bulk write"""
+    while True:
+        rows = [history_buffer.get()]
+        deadline = time.time() + HISTORY_FLUSH_INTERVAL
+        while len(rows) < HISTORY_FLUSH_BATCH_SIZE:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                rows.append(history_buffer.get(timeout=remaining))
+            except queue.Empty:
+                break
+        try:
+            store_history_rows(rows)
+        except Exception:
+            log.exception("[HISTORY BUFFER] Failed to flush %d rows", len(rows))
+
+def drain_history_buffer():
+    """Store rows still buffered at shutdown; the daemon flush thread is killed without finishing"""
+    rows = []
+    while True:
+        try:
+            rows.append(history_buffer.get_nowait())
+        except queue.Empty:
+            break
+    if rows:
+        try:
+            db_service.bulk_store_recommendation_history(rows)
+        except Exception:
+            log.exception("[HISTORY BUFFER] Failed to store %d rows at shutdown", len(rows))
+
+threading.Thread(target=flush_history_buffer, name="history-flush", daemon=True).start()
+# Registered after log_listener.stop, so it runs first and its log lines still get out
+atexit.register(drain_history_buffer)
 
 
 # Register route blueprints
@@ -50,7 +201,7 @@ def spotify_auth_url_direct():
             force_reauth = request.args.get('force_reauth', 'false').lower() == 'true'
             session_id = request.args.get('session_id')
         else:
-            data = request.get_json()
+            data = request.get_json(silent=True)
             redirect_uri = data.get("redirect_uri") if data else None
             force_reauth = data.get("force_reauth", False) if data else False
             session_id = data.get("session_id") if data else None
@@ -67,14 +218,14 @@ def spotify_auth_url_direct():
         })
         
     except Exception as e:
-        print(f"Auth URL generation error: {e}")
+        log.exception("Auth URL generation error: %s", e)
         return jsonify({"error": "Failed to generate auth URL"}), 500
 
 @app.route('/exchange-token', methods=['POST'])
 def exchange_token_direct():
     """Direct route for token exchange - frontend compatibility"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data or not data.get("code"):
             return jsonify({"error": "Missing code parameter"}), 400
@@ -95,14 +246,14 @@ def exchange_token_direct():
         })
         
     except Exception as e:
-        print(f"Token exchange error: {e}")
+        log.exception("Token exchange error: %s", e)
         return jsonify({"error": "Failed to exchange token"}), 500
 
 @app.route('/refresh-token', methods=['POST'])
 def refresh_token_direct():
     """Direct route for token refresh - frontend compatibility"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data or not data.get("refresh_token"):
             return jsonify({"error": "Missing refresh_token parameter"}), 400
@@ -122,14 +273,14 @@ def refresh_token_direct():
         })
         
     except Exception as e:
-        print(f"Token refresh error: {e}")
+        log.exception("Token refresh error: %s", e)
         return jsonify({"error": "Failed to refresh token"}), 500
 
 @app.route('/check-token', methods=['POST'])
 def check_token_direct():
     """Check if token is valid and refresh if needed"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data or not data.get("access_token"):
             return jsonify({"error": "Missing access_token parameter"}), 400
@@ -169,22 +320,22 @@ def check_token_direct():
             })
         
     except Exception as e:
-        print(f"Token check error: {e}")
+        log.exception("Token check error: %s", e)
         return jsonify({"error": "Failed to check token"}), 500
 
 @app.route('/spotify-profile', methods=['POST'])
 def spotify_profile_direct():
     """Direct route for Spotify profile - frontend compatibility"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data or not data.get("spotify_token"):
             return jsonify({"error": "Missing spotify_token"}), 400
         
         spotify_token = data["spotify_token"]
         
-        # Get user profile
-        profile = spotify_service.get_user_profile(spotify_token)
+        # Get user profile (cached per token)
+        profile = spotify_service.get_cached_user_profile(spotify_token)
         
         if not profile:
             return jsonify({"error": "Failed to get user profile"}), 400
@@ -197,14 +348,14 @@ def spotify_profile_direct():
         })
         
     except Exception as e:
-        print(f"Profile fetch error: {e}")
+        log.exception("Profile fetch error: %s", e)
         return jsonify({"error": "Failed to get user profile"}), 500
 
 @app.route('/logout', methods=['POST'])
 def logout_direct():
     """Direct route for logout - frontend compatibility"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         
         # Accept access_token, client_id, client_secret (for token revocation)
         access_token = data.get("access_token")
@@ -217,11 +368,12 @@ def logout_direct():
                 # In a real implementation, you would call Spotify's token revocation endpoint
                 print(f"Token revocation requested for client: {client_id}")
             except Exception as e:
-                print(f"Token revocation failed: {e}")
+                log.warning("Token revocation failed: %s", e, exc_info=True)
+        
+        # Forget the cached profile for this token
+        spotify_service.invalidate_user_profile(access_token)
         
         # Generate re-authentication URL
-        import secrets
-        import time
         unique_state = f"{secrets.token_urlsafe(32)}_{int(time.time())}"
         session_id = f"session_{secrets.token_urlsafe(16)}_{int(time.time())}"
         
@@ -236,15 +388,13 @@ def logout_direct():
         })
         
     except Exception as e:
-        print(f"Logout error: {e}")
+        log.exception("Logout error: %s", e)
         return jsonify({"error": "Failed to logout"}), 500
 
 @app.route('/spotify-session-clear', methods=['POST'])
 def spotify_session_clear_direct():
     """Clear Spotify session and force re-authentication - direct route"""
     try:
-        import secrets
-        import time
         session_id = f"session_{secrets.token_urlsafe(16)}_{int(time.time())}"
         
         return jsonify({
@@ -259,11 +409,9 @@ def spotify_session_clear_direct():
 @app.route('/musicrecommendation', methods=['POST'])
 def music_recommendation_direct():
     """Optimized music recommendations with batch processing - frontend compatibility"""
-    import time
-    import random
     start_time = time.time()
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data or not data.get("spotify_token"):
             return jsonify({"error": "Missing spotify_token"}), 400
@@ -274,10 +422,6 @@ def music_recommendation_direct():
         qloo_api_key = data.get("qloo_api_key", os.getenv('QLOO_API_KEY', ''))
         limit = min(int(data.get("limit", 25)), 50)  # Increased default limit
         
-        # Initialize database service
-        from services.database import DatabaseService
-        db_service = DatabaseService()
-        
         # Get location parameters
         location = data.get("location")
         location_radius = data.get("location_radius", 50000)  # Default 50km radius
@@ -338,12 +482,16 @@ def music_recommendation_direct():
         
         print(f"[ENHANCED CONTEXT] Context: {context_type}, Mood: {mood_preference.get('primary_mood')}, Language: {language_preference.get('primary_language')}")
         
-        # Step 3: Generate enhanced tags using Gemini (batch processing) with variety
+        # Step 3: Generate cultural context once; the enhanced tag prompt and the Qloo tags below both use it
+        cultural_context = gemini_service.generate_cultural_context(user_country, location, user_artists)
+        
+        # Step 4: Generate enhanced tags using Gemini (batch processing) with variety
         # Add variety to tag generation context
-        tag_variety_seed = int(time.time() * 1000) % 10000
+        tag_variety_seed = random.randrange(10000)
         context_with_variety = f"{user_context} {tag_variety_seed} {int(time.time()) % 1000}"
         
-        enhanced_tags = gemini_service.generate_enhanced_tags(context_with_variety, user_country, location, user_artists)
+        enhanced_tags = gemini_service.generate_enhanced_tags(context_with_variety, user_country, location, user_artists,
+                                                              cultural_context=cultural_context)
         if not enhanced_tags:
             print("Warning: No enhanced tags generated, using fallback tags")
             enhanced_tags = ["upbeat", "energetic", "pop", "mainstream"]
@@ -351,9 +499,6 @@ def music_recommendation_direct():
         print(f"[ENHANCED] Generated {len(enhanced_tags)} enhanced tags with variety: {enhanced_tags}")
         print(f"[VARIETY] Tag generation variety seed: {tag_variety_seed}")
         
-        # Step 4: Generate cultural context
-        cultural_context = gemini_service.generate_cultural_context(user_country, location, user_artists)
-        
         # Use location from cultural context if not provided
         if not location and cultural_context.get("location"):
             location = cultural_context["location"]
@@ -369,52 +514,14 @@ def music_recommendation_direct():
         context_tags = gemini_service.generate_context_aware_tags(user_context, user_country, user_artists)
         
         # Combine and prioritize: context tags first, then cultural tags
-        all_tags = context_tags + cultural_tags
-        all_tags = list(dict.fromkeys(all_tags))  # Remove duplicates
+        all_tags = list(dict.fromkeys(context_tags + cultural_tags))  # Remove duplicates
         
         print(f"[TAGS] Context-specific tags: {context_tags}")
         print(f"[TAGS] Cultural tags: {cultural_tags}")
         print(f"[TAGS] Combined tags: {all_tags}")
         
-        # Send tags to Qloo until 5 are accepted
-        tag_ids = []
-        max_attempts = 10  # Prevent infinite loops
-        attempt = 0
-        
-        while len(tag_ids) < 3 and attempt < max_attempts:  # Reduced minimum requirement
-            attempt += 1
-            print(f"[QLOO ATTEMPT {attempt}] Trying to get 5 accepted tags...")
-            
-            # Try current tag set
-            current_tag_ids = qloo_service.get_tag_ids_fast(all_tags)
-            tag_ids.extend(current_tag_ids)
-            
-            # Remove duplicates
-            tag_ids = list(dict.fromkeys(tag_ids))
-            
-            print(f"[QLOO ATTEMPT {attempt}] Got {len(tag_ids)} accepted tags so far")
-            
-            # If we have 3 or more tags, we're done (no limit)
-            if len(tag_ids) >= 3:
-                print(f"[SUCCESS] Got {len(tag_ids)} accepted tags after {attempt} attempts")
-                break
-            
-            # If we need more tags, add fallback tags
-            if attempt < max_attempts - 1:
-                print(f"[NEED MORE TAGS] Only got {len(tag_ids)} tags, adding fallback tags...")
-                
-                # Add fallback tags based on context
-                fallback_tags = []
-                if len(tag_ids) < 3:
-                    fallback_tags = ['pop', 'mainstream', 'contemporary', 'cultural', 'diverse']
-                elif len(tag_ids) < 4:
-                    fallback_tags = ['energetic', 'upbeat', 'romantic', 'drama']
-                else:
-                    fallback_tags = ['electronic', 'dance', 'indie', 'alternative']
-                
-                all_tags.extend(fallback_tags)
-                all_tags = list(dict.fromkeys(all_tags))  # Remove duplicates
-                print(f"[FALLBACK] Added tags: {fallback_tags}")
+        # Resolve tags in one pass; fallback tags are only searched if too few were accepted
+        tag_ids, all_tags = qloo_service.get_music_tag_ids(all_tags)
         
         print(f"[FINAL RESULT] Using {len(tag_ids)} accepted tags: {tag_ids}")
         
@@ -422,7 +529,6 @@ def music_recommendation_direct():
         print(f"[QLOO LOCATION] Calling Qloo with location: {location}, radius: {location_radius}m")
 
         # Clear recent artists cache periodically to allow variety
-        import time
         current_time = int(time.time())
         if current_time % 180 == 0:  # Clear cache every 3 minutes (reduced from 5)
             qloo_service.clear_recent_artists_cache()
@@ -596,14 +702,14 @@ def music_recommendation_direct():
                         qloo_reco_artists = all_artists[:12]  # Get more variety
                         print(f"[MUSIC FALLBACK] Using {len(qloo_reco_artists)} artists (user + similar) with variety")
                     except Exception as e:
-                        print(f"[MUSIC FALLBACK] Error getting similar artists: {e}")
+                        log.warning("[MUSIC FALLBACK] Error getting similar artists: %s", e, exc_info=True)
                         # Fallback to just user artists
                         random.shuffle(spotify_artist_names)
                         qloo_reco_artists = spotify_artist_names[:10]
                         print(f"[MUSIC FALLBACK] Using {len(qloo_reco_artists)} shuffled user artists")
                         
             except Exception as e:
-                print(f"[GLOBAL VARIETY FALLBACK] Error: {e}")
+                log.warning("[GLOBAL VARIETY FALLBACK] Error: %s", e, exc_info=True)
                 # Fallback to enhanced Spotify data
                 print("[MUSIC FALLBACK] Global variety failed, using enhanced Spotify data")
                 
@@ -630,7 +736,7 @@ def music_recommendation_direct():
                     qloo_reco_artists = all_artists[:12]  # Get more variety
                     print(f"[MUSIC FALLBACK] Using {len(qloo_reco_artists)} artists (user + similar) with variety")
                 except Exception as e:
-                    print(f"[MUSIC FALLBACK] Error getting similar artists: {e}")
+                    log.warning("[MUSIC FALLBACK] Error getting similar artists: %s", e, exc_info=True)
                     # Fallback to just user artists
                     random.shuffle(spotify_artist_names)
                     qloo_reco_artists = spotify_artist_names[:10]
@@ -716,26 +822,27 @@ def music_recommendation_direct():
         
         # Score artists based on relevance to user taste and context
         scored_artists = []
+        context_lower = user_context.lower()
         for artist_name in qloo_reco_artists:
             score = 0.0
+            name_lower = artist_name.lower()
             
             # User taste matching (highest priority)
-            if artist_name.lower() in user_artist_names:
+            if name_lower in user_artist_names:
                 score += 5.0
-            elif any(user_artist in artist_name.lower() for user_artist in user_artist_names):
+            elif any(user_artist in name_lower for user_artist in user_artist_names):
                 score += 3.0
             
             # Context matching
-            context_lower = user_context.lower()
-            if any(word in artist_name.lower() for word in ['romantic', 'love', 'heart']) and 'romantic' in context_lower:
+            if any(word in name_lower for word in ('romantic', 'love', 'heart')) and 'romantic' in context_lower:
                 score += 2.0
-            elif any(word in artist_name.lower() for word in ['sad', 'blue', 'melancholic']) and any(word in context_lower for word in ['blue', 'sad', 'down']):
+            elif any(word in name_lower for word in ('sad', 'blue', 'melancholic')) and any(word in context_lower for word in ('blue', 'sad', 'down')):
                 score += 2.0
-            elif any(word in artist_name.lower() for word in ['happy', 'joy', 'upbeat']) and any(word in context_lower for word in ['happy', 'joy', 'energetic']):
+            elif any(word in name_lower for word in ('happy', 'joy', 'upbeat')) and any(word in context_lower for word in ('happy', 'joy', 'energetic')):
                 score += 2.0
             
             # Cultural relevance
-            if user_country == "IN" and any(word in artist_name.lower() for word in ['pritam', 'arijit', 'atif', 'neha', 'badshah', 'karan']):
+            if user_country == "IN" and any(word in name_lower for word in ('pritam', 'arijit', 'atif', 'neha', 'badshah', 'karan')):
                 score += 1.5
             
             scored_artists.append((artist_name, score))
@@ -833,7 +940,7 @@ def music_recommendation_direct():
                                 primary_genre = spotify_service.get_artist_genre_fallback(artist_name)
                             
                     except Exception as e:
-                        print(f"[GENRE ANALYSIS] Error analyzing track {track.get('name', 'Unknown')}: {e}")
+                        log.warning("[GENRE ANALYSIS] Error analyzing track %s: %s", track.get('name', 'Unknown'), e, exc_info=True)
                         emotional_context = "neutral"
                         primary_genre = "unknown"
                     
@@ -877,7 +984,7 @@ def music_recommendation_direct():
                             "primary_genre": primary_genre
                         }
                     except Exception as e:
-                        print(f"Error creating track object for {track.get('name', 'Unknown')}: {e}")
+                        log.warning("Error creating track object for %s: %s", track.get('name', 'Unknown'), e, exc_info=True)
                         continue
                     
                     # Avoid duplicates
@@ -887,11 +994,11 @@ def music_recommendation_direct():
                             all_collected_tracks.append(track_obj)
                             seen_tracks.add(track_key)
                     except Exception as e:
-                        print(f"Error adding track to collection: {e}")
+                        log.warning("Error adding track to collection: %s", e, exc_info=True)
                         continue
                         
             except Exception as e:
-                print(f"Error getting tracks for artist {artist_name}: {e}")
+                log.warning("Error getting tracks for artist %s: %s", artist_name, e, exc_info=True)
                 continue
         
         print(f"[OPTIMIZED COLLECTION] Collected {len(all_collected_tracks)} total tracks (target: 50-80)")
@@ -914,7 +1021,7 @@ def music_recommendation_direct():
             print(f"[GEMINI OPTIMIZED] Gemini returned {len(playlist)} relevant tracks out of {len(all_collected_tracks)} pre-filtered tracks")
             
         except Exception as e:
-            print(f"[GEMINI OPTIMIZED] Error in comprehensive filtering: {e}")
+            log.warning("[GEMINI OPTIMIZED] Error in comprehensive filtering: %s", e, exc_info=True)
             # Fallback to original method
             playlist = all_collected_tracks[:limit]
             print(f"[GEMINI OPTIMIZED] Using fallback: {len(playlist)} tracks")
@@ -927,7 +1034,7 @@ def music_recommendation_direct():
                 playlist = spotify_service.get_trending_tracks_for_context(context_type, spotify_token, limit=15)
                 print(f"[MUSIC FALLBACK] Got {len(playlist)} trending tracks for {context_type}")
             except Exception as e:
-                print(f"[MUSIC FALLBACK] Trending tracks failed: {e}")
+                log.warning("[MUSIC FALLBACK] Trending tracks failed: %s", e, exc_info=True)
                 try:
                     # Try to get user's top tracks as fallback
                     user_tracks = spotify_service.get_top_tracks_detailed(spotify_token, limit=15)
@@ -950,7 +1057,7 @@ def music_recommendation_direct():
                             playlist.append(track_obj)
                         print(f"[MUSIC FALLBACK] Using {len(playlist)} user's top tracks as fallback")
                 except Exception as e2:
-                    print(f"[MUSIC FALLBACK] User tracks also failed: {e2}")
+                    log.warning("[MUSIC FALLBACK] User tracks also failed: %s", e2, exc_info=True)
                     # Final fallback - create context-appropriate tracks
                     playlist = spotify_service.get_hardcoded_fallback_tracks(context_type)
                     print(f"[MUSIC FALLBACK] Added {len(playlist)} hardcoded fallback tracks")
@@ -990,35 +1097,31 @@ def music_recommendation_direct():
         # Step 14: Prepare response data
         response_time = time.time() - start_time
         
-        # Extract artist names for database storage
-        artist_names = [artist for artist in qloo_reco_artists if artist]
-        
         # Track new artists
         artist_data = [{"name": artist, "genre": "unknown", "popularity": 0.0} for artist in qloo_reco_artists if artist]
         db_service.track_new_artists(user_id, artist_data)
         
-        # Update user taste analytics for each genre found
-        for track in playlist:
-            if track.get("primary_genre"):
-                db_service.update_user_taste_analytics(user_id, track.get("primary_genre"), 1, 0, 0.0)
+        # Update user taste analytics for each genre found (one upsert for all genres, off the request thread)
+        genre_counts = Counter(track["primary_genre"] for track in playlist if track.get("primary_genre"))
+        analytics_executor.submit(run_analytics_write, db_service.bulk_update_user_taste_analytics, user_id, list(genre_counts.items()))
         
         # Update mood preferences
         if enhanced_context.get("mood_preference", {}).get("primary_mood"):
-            db_service.update_mood_preferences(user_id, enhanced_context["mood_preference"]["primary_mood"], 1.0)
+            analytics_executor.submit(run_analytics_write, db_service.update_mood_preferences, user_id, enhanced_context["mood_preference"]["primary_mood"], 1.0)
         
-        # Store recommendation history
+        # Queue recommendation history for the next batched write
         # Convert qloo_reco_artists to the format expected by database
         qloo_artists_for_db = [{"name": artist} for artist in qloo_reco_artists if artist]
-        db_service.store_recommendation_history(
-            user_id=user_id,
-            session_id=session_id,
-            recommendation_type="music",
-            user_context=user_context,
-            generated_tags=enhanced_tags,
-            qloo_artists=qloo_artists_for_db,
-            playlist_data={"recommendations": playlist[:limit]},
-            response_time=response_time
-        )
+        queue_history_row({
+            "user_id": user_id,
+            "session_id": session_id,
+            "recommendation_type": "music",
+            "user_context": user_context,
+            "generated_tags": enhanced_tags,
+            "qloo_artists": qloo_artists_for_db,
+            "playlist_data": {"recommendations": playlist[:limit]},
+            "response_time": response_time
+        })
         
         # Get new artists for response
         new_artists = db_service.get_new_artists(user_id, 5)
@@ -1029,15 +1132,7 @@ def music_recommendation_direct():
         
         # Add Qloo power showcase information
         # Enhanced cultural tags detection
-        cultural_keywords = [
-            "latin", "k-pop", "afrobeats", "jazz", "blues", "folk", "world", "bollywood", "hindi", "indian", 
-            "cultural", "romantic", "drama", "adventure", "mystery", "comedy", "asian", "western", "european",
-            "african", "middle_eastern", "south_asian", "desi", "pop", "mainstream", "contemporary", "traditional",
-            "emotional", "upbeat", "energetic", "calm", "relaxation", "party", "workout", "study", "social"
-        ]
-        
-        cultural_tags_found = [tag for tag in enhanced_tags if any(cultural_word in tag.lower() for cultural_word in cultural_keywords)]
-        cultural_tags_count = len(cultural_tags_found)
+        cultural_tags_count = count_cultural_tags(enhanced_tags)
         
         # If no cultural tags found but we have cultural context, count it as at least 1
         if cultural_tags_count == 0 and cultural_context:
@@ -1053,6 +1148,10 @@ def music_recommendation_direct():
         # Get variety statistics
         variety_stats = qloo_service.get_variety_stats()
         
+        total_tracks_collected = len(all_collected_tracks)
+        optimization_ratio = f"{total_tracks_collected}/{len(qloo_reco_artists) * 10}"
+        variety_seeds = {"tag_variety_seed": tag_variety_seed}
+        
         qloo_power_showcase = {
             "enhanced_system": True,
             "cultural_intelligence": bool(cultural_context),
@@ -1064,9 +1163,9 @@ def music_recommendation_direct():
             "pro_model_processing": True,
             "variety_system": True,
             "total_recommendations": len(enhanced_recommendations),
-            "total_tracks_analyzed": len(all_collected_tracks) if 'all_collected_tracks' in locals() else 0,
+            "total_tracks_analyzed": total_tracks_collected,
             "final_recommendations": len(playlist),
-            "optimization_ratio": f"{len(all_collected_tracks)}/{len(qloo_reco_artists) * 10}" if 'all_collected_tracks' in locals() else "N/A",
+            "optimization_ratio": optimization_ratio,
             "cultural_tags_count": cultural_tags_count,
             "location_based_count": len([artist for artist in enhanced_recommendations if artist.get("location_relevance", 0) > 0.1 or artist.get("cultural_relevance", 0) > 0.3]) if enhanced_recommendations else (1 if location else 0),
             "variety_stats": variety_stats
@@ -1092,29 +1191,6 @@ def music_recommendation_direct():
         print(f"[QLOO POWER] Location used: {location}")
         print(f"[QLOO POWER] Cultural context: {bool(cultural_context)}")
         
-        enhanced_features = [
-            "Cultural Intelligence",
-            "Location-Aware Recommendations", 
-            "Multi-Strategy Analysis",
-            "Affinity Scoring",
-            "Cross-Domain Insights",
-            "Enhanced Gemini Integration",
-            "Smart Pre-filtering",
-            "Optimized Track Collection",
-            "Pro Model Processing",
-            "Variety System",
-            "Anti-Repetition Algorithm",
-            "25-30 Relevance-Optimized Recommendations",
-            "Global Music Aggregator",
-            "Multi-Provider Variety",
-            "Cultural Music Discovery",
-            "Mood-Based Variety",
-            "YouTube Music Integration",
-            "Last.fm Integration",
-            "Deezer Integration",
-            "Enhanced Global Variety"
-        ]
-        
         # Debug info
         spotify_user_artist_names = []
         for artist in user_artists:
@@ -1138,25 +1214,21 @@ def music_recommendation_direct():
             "enhanced_gemini_tags": all_tags,
             "cultural_context": cultural_context,
             "qloo_tag_ids": tag_ids,
-            "music_tag_ids": music_tag_ids if 'music_tag_ids' in locals() else [],
+            "music_tag_ids": music_tag_ids,
             "spotify_user_artists": spotify_user_artist_names,
             "spotify_user_tracks": spotify_user_track_names,
             "qloo_recommended_artists": qloo_reco_artists,
-            "selected_artists_count": len(selected_artists) if 'selected_artists' in locals() else 0,
-            "total_tracks_collected": len(all_collected_tracks) if 'all_collected_tracks' in locals() else 0,
+            "selected_artists_count": len(selected_artists),
+            "total_tracks_collected": total_tracks_collected,
             "final_playlist_length": len(playlist),
             "context_type": "optimized_enhanced",
             "location_used": location,
             "user_country": user_country,
             "smart_pre_filtering": True,
-            "optimization_ratio": f"{len(all_collected_tracks)}/{len(qloo_reco_artists) * 10}" if 'all_collected_tracks' in locals() else "N/A",
-            "variety_seeds": {
-                "tag_variety_seed": tag_variety_seed if 'tag_variety_seed' in locals() else None,
-                "recommendation_variety_seed": variety_seed if 'variety_seed' in locals() else None,
-                "location_seed": location_seed if 'location_seed' in locals() else None
-            },
+            "optimization_ratio": optimization_ratio,
+            "variety_seeds": variety_seeds,
             "music_fallback_used": len(qloo_reco_artists) == 0,
-            "qloo_entities_received": len(enhanced_recommendations) if 'enhanced_recommendations' in locals() else 0
+            "qloo_entities_received": len(enhanced_recommendations)
         }
         
         return jsonify({
@@ -1170,15 +1242,15 @@ def music_recommendation_direct():
             "display_qloo_artists": display_qloo_artists,
             "access_token": spotify_token,
             "from_cache": False,
-            "generated_timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "generated_timestamp": iso_timestamp(),
             "location_used": location,
             "location_radius": location_radius if location else None,
             "user_country": user_country,
             "qloo_power_showcase": qloo_power_showcase,
-            "enhanced_features": enhanced_features,
+            "enhanced_features": ENHANCED_FEATURES,
             "ai_scoring_info": {
                 "ai_scoring_enabled": True,
-                "tracks_ai_scored": len([t for t in playlist if t.get('ai_scored', False)]),
+                "tracks_ai_scored": sum(1 for t in playlist if t.get('ai_scored')),
                 "total_tracks": len(playlist),
                 "scoring_method": "AI-Enhanced Relevance Scoring",
                 "ai_score_weight": 0.7,
@@ -1203,10 +1275,8 @@ def music_recommendation_direct():
                 "batch_processing": True,
                 "optimization_level": "enhanced",
                 "variety_info": {
-                    "tag_variety_seed": tag_variety_seed if 'tag_variety_seed' in locals() else None,
-                    "recommendation_variety_seed": variety_seed if 'variety_seed' in locals() else None,
-                    "location_seed": location_seed if 'location_seed' in locals() else None,
-                    "unique_artists": len(set(qloo_reco_artists)),
+                    **variety_seeds,
+                    "unique_artists": len(qloo_reco_artists),  # already de-duplicated above
                     "total_artists": len(qloo_reco_artists),
                     "relevance_scoring": True,
                     "controlled_randomization": True,
@@ -1217,7 +1287,7 @@ def music_recommendation_direct():
         })
         
     except Exception as e:
-        print(f"Music recommendation error: {e}")
+        log.exception("Music recommendation error: %s", e)
         
         # Get user data for database storage even in fallback
         try:
@@ -1247,17 +1317,17 @@ def music_recommendation_direct():
                     }
                     fallback_playlist.append(track)
                 
-                # Store recommendation history
-                db_service.store_recommendation_history(
-                    user_id=user_id,
-                    session_id=session_id,
-                    recommendation_type="music_fallback",
-                    user_context=user_context,
-                    generated_tags=["pop", "trending"],
-                    qloo_artists=[{"name": rec.get("name", "")} for rec in fallback_recommendations[:10]],
-                    playlist_data={"recommendations": fallback_playlist},
-                    response_time=time.time() - start_time
-                )
+                # Queue recommendation history for the next batched write
+                queue_history_row({
+                    "user_id": user_id,
+                    "session_id": session_id,
+                    "recommendation_type": "music_fallback",
+                    "user_context": user_context,
+                    "generated_tags": ["pop", "trending"],
+                    "qloo_artists": [{"name": rec.get("name", "")} for rec in fallback_recommendations[:10]],
+                    "playlist_data": {"recommendations": fallback_playlist},
+                    "response_time": time.time() - start_time
+                })
                 
                 return jsonify({
                     "playlist": fallback_playlist,
@@ -1275,7 +1345,7 @@ def music_recommendation_direct():
                     }
                 })
         except Exception as db_error:
-            print(f"Database storage error in fallback: {db_error}")
+            log.exception("Database storage error in fallback: %s", db_error)
         
         # Final fallback without database
         fallback_recommendations = spotify_service.get_fallback_recommendations("party")
@@ -1308,10 +1378,6 @@ def music_recommendation_direct():
                 "database_stored": False
             }
         })
-        
-    except Exception as e:
-        print(f"[MUSIC RECOMMENDATION] Unexpected error: {e}")
-        return jsonify({'error': 'Internal server error'}), 500
 
 @app.route('/crossdomain-recommendations', methods=['POST'])
 def crossdomain_recommendations_direct():
@@ -1319,7 +1385,7 @@ def crossdomain_recommendations_direct():
     start_time = time.time()
     
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data or not data.get("spotify_token"):
             return jsonify({"error": "Missing spotify_token"}), 400
@@ -1337,10 +1403,8 @@ def crossdomain_recommendations_direct():
         location = data.get("location")  # e.g., "Mumbai", "New York", "London"
         location_radius = data.get("location_radius", 50000)  # Default 50km radius
         
-        print(f"[CROSSDOMAIN] User context: {user_context}")
-        print(f"[CROSSDOMAIN] Music artists: {music_artists}")
-        print(f"[CROSSDOMAIN] Top scored artists: {top_scored_artists}")
-        print(f"[CROSSDOMAIN] User tags: {user_tags}")
+        log.debug("[CROSSDOMAIN] User context: %s | music artists: %s | top scored artists: %s | user tags: %s",
+                  user_context, music_artists, top_scored_artists, user_tags)
         
         # Step 1: Get user data for country and basic info
         user_data = spotify_service.get_user_data_fast(spotify_token)
@@ -1350,9 +1414,8 @@ def crossdomain_recommendations_direct():
         user_country = user_data["profile"].get("country", "US")
         user_id = user_data["profile"]["user_id"]
         
-        # Debug: Print country detection
-        print(f"[COUNTRY DEBUG] Cross-domain route - User Country: {user_country}")
-        print(f"[COUNTRY DEBUG] User Profile: {user_data['profile']}")
+        # Debug: Log country detection
+        log.debug("[COUNTRY DEBUG] Cross-domain route - User Country: %s, profile: %s", user_country, user_data['profile'])
         
         # If no location provided, derive from user country
         if not location and user_country:
@@ -1369,32 +1432,25 @@ def crossdomain_recommendations_direct():
                 "BR": "São Paulo, Brazil"
             }
             location = location_map.get(user_country, "New York, USA")
-            print(f"[LOCATION] Derived location from country {user_country}: {location}")
+            log.debug("[LOCATION] Derived location from country %s: %s", user_country, location)
         elif location:
-            print(f"[LOCATION] Using provided location: {location}")
+            log.debug("[LOCATION] Using provided location: %s", location)
         else:
-            print(f"[LOCATION] No location provided and no country available - using global recommendations")
+            log.debug("[LOCATION] No location provided and no country available - using global recommendations")
         
         # Step 2: Get top artists with images (use top scored artists if available)
-        if top_scored_artists and len(top_scored_artists) > 0:
+        if top_scored_artists:
             # Use top scored artists from music recommendations
-            top_artists_with_images = []
-            for artist_name in top_scored_artists[:6]:
-                top_artists_with_images.append({
-                    "id": "",  # We don't have artist IDs from music recommendations
-                    "name": artist_name,
-                    "image": None,
-                    "genres": [],
-                    "popularity": 0,
-                    "followers": 0
-                })
+            top_artist_names = top_scored_artists[:6]
+            top_artists_with_images = [{**PLACEHOLDER_ARTIST, "name": artist_name} for artist_name in top_artist_names]
         else:
-            # Fallback to user's Spotify top artists
-            top_artists_with_images = spotify_service.get_top_artists_with_images(spotify_token, limit=6)
+            # Fallback to user's Spotify top artists (already fetched with the user data)
+            top_artists_with_images = user_data.get("artists_with_images", [])[:6]
+            top_artist_names = [artist["name"] for artist in top_artists_with_images]
         
         # Step 3: Generate tags based on music recommendation data
         # Combine user tags, music artists, and top scored artists for better context
-        combined_artists = list(set(music_artists + top_scored_artists))
+        combined_artists = list(dict.fromkeys((*music_artists, *top_scored_artists)))
         
         # Differentiate between home page and discover more recommendations
         is_home_page = user_context == "music discovery and cross-domain recommendations"
@@ -1405,32 +1461,28 @@ def crossdomain_recommendations_direct():
             cache_key = f"crossdomain_home_{user_country}_{location}"
             current_time = time.time()
             
-            # Check if we have cached data and it's not expired
-            if cache_key in crossdomain_cache:
-                cached_data = crossdomain_cache[cache_key]
-                if current_time - cached_data['timestamp'] < CACHE_EXPIRY:
-                    print(f"[CACHE HIT] Returning cached cross-domain recommendations for home page (age: {int(current_time - cached_data['timestamp'])}s)")
-                    # Mark as from cache
-                    cached_data['data']['from_cache'] = True
-                    cached_data['data']['cache_age_seconds'] = int(current_time - cached_data['timestamp'])
-                    cached_data['data']['cache_expires_in'] = int(CACHE_EXPIRY - (current_time - cached_data['timestamp']))
-                    return jsonify(cached_data['data'])
-                else:
-                    print(f"[CACHE EXPIRED] Removing expired cache entry for key: {cache_key}")
-                    del crossdomain_cache[cache_key]
+            # Expired entries are swept by the cache itself, so any hit is still valid
+            cached_data = crossdomain_cache.get(cache_key, current_time)
+            if cached_data:
+                log.info("[CACHE HIT] Returning cached cross-domain recommendations for home page (age: %ds)", current_time - cached_data.timestamp)
+                # Mark as from cache
+                cached_data.data['from_cache'] = True
+                cached_data.data['cache_age_seconds'] = int(current_time - cached_data.timestamp)
+                cached_data.data['cache_expires_in'] = int(CACHE_EXPIRY - (current_time - cached_data.timestamp))
+                return jsonify(cached_data.data)
             
-            print(f"[CACHE MISS] No valid cache found for home page, generating fresh recommendations")
+            log.debug("[CACHE MISS] No valid cache found for home page, generating fresh recommendations")
         
         if is_home_page:
             # Home page: Use broader, more general recommendations
             context = f"home page cross-domain recommendations based on general music taste"
             # Add more variety for home page
-            cache_buster = int(time.time() * 1000) % 2000  # More variety
+            cache_buster = random.randrange(2000)  # More variety
         else:
             # Discover more: Use more specific, context-aware recommendations
             context = f"discover more cross-domain recommendations based on {user_context} music taste"
             # Add cache-busting parameter to ensure variety
-            cache_buster = int(time.time() * 1000) % 1000  # Use milliseconds for variety
+            cache_buster = random.randrange(1000)  # Per-request variety
         
         context = f"{context} {cache_buster}"
         
@@ -1443,72 +1495,95 @@ def crossdomain_recommendations_direct():
             "book": "book",
             "artist": "music artist"
         }
-        recommendations_by_domain = {}
         
-        for domain in domains:
-            try:
-                # Generate enhanced tags using music recommendation data
-                print(f"\n=== Processing Domain: {domain} ===")
-                
-                if is_home_page:
-                    # Home page: Use more general, popular tags
-                    domain_tags = gemini_service.generate_music_based_cross_domain_tags(
-                        ["popular", "mainstream", "trending"], combined_artists, "general entertainment", user_country, domain
-                    )
-                else:
-                    # Discover more: Use specific, context-aware tags
-                    domain_tags = gemini_service.generate_music_based_cross_domain_tags(
-                        user_tags, combined_artists, user_context, user_country, domain
-                    )
-                
-                print(f"Domain {domain} enhanced tags: {domain_tags}")
-                
-                # Get tag IDs for this domain
-                tag_ids = qloo_service.get_tag_ids_fast(domain_tags, domain)
-                print(f"Domain {domain} tag IDs: {tag_ids}")
-                
-                # Get recommendations for this domain with location support
-                print(f"[CROSSDOMAIN LOCATION] Getting {domain} recommendations with location: {location}, radius: {location_radius}m")
-                domain_recommendations = qloo_service.get_cross_domain_recommendations(
-                    tag_ids, domain, max(limit, 10), location, location_radius
+        def fetch_domain_recommendations(domain):
+            """Generate tags and fetch Qloo recommendations for a single domain.
+            Every upstream call is bounded by what is left of the request deadline"""
+            if time.time() >= deadline:
+                return []
+            if is_home_page:
+                # Home page: Use more general, popular tags
+                domain_tags = gemini_service.generate_music_based_cross_domain_tags(
+                    ["popular", "mainstream", "trending"], combined_artists, "general entertainment", user_country, domain,
+                    timeout=max(0.1, deadline - time.time())
+                )
+            else:
+                # Discover more: Use specific, context-aware tags
+                domain_tags = gemini_service.generate_music_based_cross_domain_tags(
+                    user_tags, combined_artists, user_context, user_country, domain,
+                    timeout=max(0.1, deadline - time.time())
                 )
-                frontend_domain = domain_mapping[domain]
+            log.debug("[CROSSDOMAIN] Domain %s enhanced tags: %s", domain, domain_tags)
+            
+            # Get tag IDs for this domain
+            tag_ids = qloo_service.get_tag_ids_fast(domain_tags, domain, deadline=deadline)
+            if time.time() >= deadline:
+                return []
+            log.debug("[CROSSDOMAIN] Domain %s tag IDs: %s", domain, tag_ids)
+            
+            # Get recommendations for this domain with location support
+            log.debug("[CROSSDOMAIN LOCATION] Getting %s recommendations with location: %s, radius: %sm", domain, location, location_radius)
+            return qloo_service.get_cross_domain_recommendations(
+                tag_ids, domain, max(limit, 10), location, location_radius,
+                timeout=deadline - time.time()
+            )
+        
+        # Fan the domains out in parallel; each gets a bounded wait so one slow upstream can't stall the request
+        recommendations_by_domain = {}
+        degraded_domains = []
+        deadline = time.time() + DOMAIN_TIMEOUT
+        domain_futures = {domain: domain_executor.submit(fetch_domain_recommendations, domain) for domain in domains}
+        
+        for done, (domain, future) in enumerate(domain_futures.items(), 1):
+            frontend_domain = domain_mapping[domain]
+            # Published through the shared tracker so a poll on any worker sees it
+            progress_tracker.set(user_id, {
+                "percentage": int((done - 1) * 100 / len(domain_futures)),
+                "status": "in_progress",
+                "current_artist": "",
+                "current_domain": frontend_domain
+            })
+            try:
+                domain_recommendations = future.result(timeout=max(0.0, deadline - time.time()))
                 recommendations_by_domain[frontend_domain] = domain_recommendations[:max(limit, 10)]
-                print(f"Domain {domain} -> {frontend_domain}: {len(domain_recommendations)} recommendations")
+                log.debug("[CROSSDOMAIN] Domain %s -> %s: %d recommendations", domain, frontend_domain, len(domain_recommendations))
                 
-                # Debug: Show first few recommendations
-                if domain_recommendations:
-                    print(f"Sample recommendations for {domain}:")
-                    for i, rec in enumerate(domain_recommendations[:3]):
-                        print(f"  {i+1}. {rec.get('name', 'Unknown')} (Type: {rec.get('type', 'Unknown')})")
-                else:
-                    print(f"No recommendations found for {domain}")
-                    
+                # Debug: Show first few recommendations (skip building the sample unless debugging)
+                if log.isEnabledFor(logging.DEBUG):
+                    if domain_recommendations:
+                        samples = ", ".join(f"{rec.get('name', 'Unknown')} ({rec.get('type', 'Unknown')})" for rec in domain_recommendations[:3])
+                        log.debug("[CROSSDOMAIN] Sample recommendations for %s: %s", domain, samples)
+                    else:
+                        log.debug("[CROSSDOMAIN] No recommendations found for %s", domain)
+            except FutureTimeoutError:
+                # Drop it from the pool if it never started so it doesn't hold a worker
+                future.cancel()
+                log.warning("[CROSSDOMAIN] Domain %s timed out after %ss", domain, DOMAIN_TIMEOUT)
+                recommendations_by_domain[frontend_domain] = []
+                degraded_domains.append({"domain": frontend_domain, "error": "TimeoutError"})
             except Exception as e:
-                print(f"Domain {domain} error: {e}")
-                import traceback
-                traceback.print_exc()
-                frontend_domain = domain_mapping[domain]
+                log.exception("[CROSSDOMAIN] Domain %s error: %s", domain, e)
                 recommendations_by_domain[frontend_domain] = []
+                degraded_domains.append({"domain": frontend_domain, "error": type(e).__name__})
         
+        progress_tracker.set(user_id, {"percentage": 100, "status": "completed", "current_artist": "", "current_domain": ""})
         response_time = time.time() - start_time
         
         # Count domains with recommendations
         domains_with_data = [domain for domain in domain_mapping.values() if recommendations_by_domain.get(domain)]
         
-        print(f"Final response - Domains with data: {domains_with_data}")
-        print(f"Total recommendations: {sum(len(recs) for recs in recommendations_by_domain.values())}")
         
         # Prepare response data
         response_data = {
-            "top_artists": [artist["name"] for artist in top_artists_with_images],
+            "top_artists": top_artist_names,
             "top_artists_with_images": top_artists_with_images,
             "recommendations_by_domain": recommendations_by_domain,
             "total_domains": len(domains_with_data),
             "recommendations_per_domain": limit,
             "recommendation_type": "home_page" if is_home_page else "discover_more",
             "from_cache": False,
-            "generated_timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "generated_timestamp": iso_timestamp(),
+            "degraded_domains": degraded_domains,
 
             "location_used": location if location else "Global",
             "location_radius": location_radius if location else None,
@@ -1531,39 +1606,31 @@ def crossdomain_recommendations_direct():
             }
         }
         
-        # Cache the response for home page requests only
-        if is_home_page:
+        # Cache the response for home page requests only (never cache partial results)
+        if is_home_page and not degraded_domains:
             cache_key = f"crossdomain_home_{user_country}_{location}"
-            crossdomain_cache[cache_key] = {
-                'data': response_data,
-                'timestamp': time.time()
-            }
-            print(f"[CACHE STORED] Cached cross-domain recommendations for home page with key: {cache_key}")
-            print(f"[CACHE STORED] Cache will expire in {CACHE_EXPIRY} seconds")
+            crossdomain_cache.set(cache_key, response_data)
+            log.debug("[CACHE STORED] Cached cross-domain recommendations for home page with key: %s (expires in %ss)", cache_key, CACHE_EXPIRY)
+        
+        # Single summary line per request
+        log.info("[CROSSDOMAIN] user=%s country=%s home=%s domains=%d/%d recommendations=%d time=%.2fs",
+                 user_id, user_country, is_home_page, len(domains_with_data), len(domain_mapping),
+                 sum(len(recs) for recs in recommendations_by_domain.values()), response_time)
         
         return jsonify(response_data)
         
     except Exception as e:
-        print(f"Cross-domain recommendations error: {e}")
+        log.exception("Cross-domain recommendations error: %s", e)
         return jsonify({"error": "Failed to get cross-domain recommendations"}), 500
 
 @app.route('/crossdomain-progress/<user_id>', methods=['GET'])
 def crossdomain_progress_direct(user_id):
     """Direct route for cross-domain progress - frontend compatibility"""
     try:
-        # In-memory progress tracking
-        progress_tracker = {}
-        progress = progress_tracker.get(user_id, {
-            "percentage": 0,
-            "status": "not_started",
-            "current_artist": "",
-            "current_domain": ""
-        })
-        
-        return jsonify(progress)
+        return jsonify(progress_tracker.get(user_id))
         
     except Exception as e:
-        print(f"Progress tracking error: {e}")
+        log.exception("Progress tracking error: %s", e)
         return jsonify({"error": "Failed to get progress"}), 500
 
 @app.route('/create-playlist', methods=['POST', 'OPTIONS'])
@@ -1573,7 +1640,7 @@ def create_playlist_direct():
         if request.method == 'OPTIONS':
             return jsonify({"status": "ok"}), 200
             
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data or not data.get("spotify_token") or not data.get("name"):
             return jsonify({"success": False, "error": "Missing required fields"}), 400
@@ -1598,15 +1665,11 @@ def create_playlist_direct():
         
         # Extract track IDs from URLs and add tracks
         if track_uris and playlist.get("playlist_id"):
-            track_ids = []
-            for track_url in track_uris:
-                # Extract track ID from Spotify URL
-                if "spotify.com/track/" in track_url:
-                    track_id = track_url.split("track/")[1].split("?")[0]
-                    track_ids.append(track_id)
+            # Extract track IDs from Spotify URLs (or spotify:track: URIs)
+            track_ids = [m.group(1) for track_url in track_uris if track_url and (m := TRACK_ID_PATTERN.search(track_url))]
             
             if track_ids:
-                track_uris_formatted = [f"spotify:track:{track_id}" for track_id in track_ids]
+                track_uris_formatted = [TRACK_URI_PREFIX + track_id for track_id in track_ids]
                 success = spotify_service.add_tracks_to_playlist(spotify_token, playlist["playlist_id"], track_uris_formatted)
                 if not success:
                     print("Warning: Failed to add tracks to playlist")
@@ -1619,23 +1682,19 @@ def create_playlist_direct():
         })
         
     except Exception as e:
-        print(f"Playlist creation error: {e}")
+        log.exception("Playlist creation error: %s", e)
         return jsonify({"success": False, "error": str(e)}), 500
 
 @app.route('/test-database', methods=['POST'])
 def test_database_direct():
     """Test database functionality"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         spotify_token = data.get("spotify_token")
         
         if not spotify_token:
             return jsonify({"error": "Missing spotify_token"}), 400
         
-        # Initialize database service
-        from services.database import DatabaseService
-        db_service = DatabaseService()
-        
         # Get user data
         user_data = spotify_service.get_user_data_fast(spotify_token)
         if not user_data:
@@ -1671,53 +1730,45 @@ def test_database_direct():
         })
         
     except Exception as e:
-        print(f"Database test error: {e}")
+        log.exception("Database test error: %s", e)
         return jsonify({"error": f"Database test failed: {e}"}), 500
 
 @app.route('/user-analytics/<user_id>', methods=['GET'])
 def get_user_analytics_direct(user_id):
     """Direct route for user analytics - frontend compatibility"""
     try:
-        from services.database import DatabaseService
-        db_service = DatabaseService()
-        
         analytics = db_service.get_user_taste_analytics(user_id)
-        return jsonify(analytics)
+        # Polled by the dashboard; unchanged analytics come back as a bodyless 304
+        return etag_json_response(analytics, private=True)
     except Exception as e:
-        print(f"User analytics error: {e}")
+        log.exception("User analytics error: %s", e)
         return jsonify({"error": "Failed to get user analytics"}), 500
 
 @app.route('/analytics/clear/<user_id>', methods=['POST'])
 def clear_analytics_direct(user_id):
     """Clear analytics data for a user"""
     try:
-        from services.database import DatabaseService
-        db_service = DatabaseService()
-        
         db_service.clear_user_analytics(user_id)
         return jsonify({"status": "success", "message": "Analytics cleared"})
     except Exception as e:
-        print(f"Analytics clearing error: {e}")
+        log.exception("Analytics clearing error: %s", e)
         return jsonify({"error": "Failed to clear analytics"}), 500
 
 @app.route('/analytics/populate-sample/<user_id>', methods=['POST'])
 def populate_sample_analytics_direct(user_id):
     """Populate sample analytics data for a user"""
     try:
-        from services.database import DatabaseService
-        db_service = DatabaseService()
-        
         db_service.populate_sample_analytics(user_id)
         return jsonify({"status": "success", "message": "Sample analytics populated"})
     except Exception as e:
-        print(f"Sample analytics population error: {e}")
+        log.exception("Sample analytics population error: %s", e)
         return jsonify({"error": "Failed to populate sample analytics"}), 500
 
 @app.route('/artist-details', methods=['POST'])
 def get_artist_details_direct():
     """Get detailed artist information from Spotify"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data or not data.get("spotify_token") or not data.get("artist_name"):
             return jsonify({"error": "Missing spotify_token or artist_name"}), 400
@@ -1743,14 +1794,14 @@ def get_artist_details_direct():
         return jsonify({"artist": artist_details})
         
     except Exception as e:
-        print(f"Artist details error: {e}")
+        log.exception("Artist details error: %s", e)
         return jsonify({"error": "Failed to get artist details"}), 500
 
 @app.route('/artist-details-batch', methods=['POST'])
 def get_artist_details_batch_direct():
     """Get detailed artist information for multiple artists from Spotify"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data or not data.get("spotify_token") or not data.get("artist_names"):
             return jsonify({"error": "Missing spotify_token or artist_names"}), 400
@@ -1763,53 +1814,27 @@ def get_artist_details_batch_direct():
         
         print(f"Batch searching for {len(artist_names)} artists: {artist_names}")
         
-        # Limit the number of artists to prevent rate limiting
-        max_artists = 10
+        # One bulk details call covers up to 50 artists
+        max_artists = 50
         if len(artist_names) > max_artists:
-            print(f"Limiting batch request to {max_artists} artists to prevent rate limiting")
+            print(f"Limiting batch request to {max_artists} artists")
             artist_names = artist_names[:max_artists]
         
-        results = {}
+        # Searches run concurrently (and are cached); details come from Spotify's bulk endpoint
+        results = spotify_service.get_artist_details_batch(spotify_token, artist_names)
         
-        for i, artist_name in enumerate(artist_names):
-            # Add delay between requests to prevent rate limiting
-            if i > 0:
-                time.sleep(0.5)  # 500ms delay between requests
-            try:
-                # First search for the artist to get their ID
-                artist_search = spotify_service.search_artist(spotify_token, artist_name)
-                
-                if artist_search:
-                    print(f"Found artist in search: {artist_search.get('name', 'Unknown')} (ID: {artist_search.get('id', 'Unknown')})")
-                    # Get detailed artist information
-                    artist_details = spotify_service.get_artist_details(spotify_token, artist_search["id"])
-                    
-                    if artist_details:
-                        results[artist_name] = {"artist": artist_details}
-                    else:
-                        results[artist_name] = {"error": "Failed to get artist details"}
-                else:
-                    print(f"Artist '{artist_name}' not found in Spotify search")
-                    results[artist_name] = {"error": f"Artist '{artist_name}' not found"}
-                    
-            except Exception as e:
-                print(f"Error processing artist '{artist_name}': {e}")
-                results[artist_name] = {"error": f"Failed to process artist: {str(e)}"}
-        
-        return jsonify({"results": results})
+        return json_response({"results": results})
         
     except Exception as e:
-        print(f"Batch artist details error: {e}")
+        log.exception("Batch artist details error: %s", e)
         return jsonify({"error": "Failed to get batch artist details"}), 500
 
 @app.route('/user-history/<user_id>', methods=['GET'])
 def get_user_history_direct(user_id):
     """Get user recommendation history"""
     try:
-        from services.database import DatabaseService
-        db_service = DatabaseService()
-        
-        history = db_service.get_user_history(user_id, 20)
+        # Repeated recommendations (same type and context) collapse to the most recent one
+        history = db_service.get_user_history(user_id, 20, distinct=True)
         
         return jsonify({
             "user_id": user_id,
@@ -1818,19 +1843,17 @@ def get_user_history_direct(user_id):
         })
         
     except Exception as e:
-        print(f"User history error: {e}")
+        log.exception("User history error: %s", e)
         return jsonify({"error": f"Failed to get user history: {e}"}), 500
 
 @app.route('/user-history/<user_id>/<int:history_id>', methods=['DELETE'])
 def delete_history_item_direct(user_id, history_id):
     """Delete a specific history item"""
     try:
-        from services.database import DatabaseService
-        db_service = DatabaseService()
-        
         success = db_service.delete_history_item(history_id, user_id)
         
         if success:
+            invalidate_history_pages(user_id)
             return jsonify({
                 "success": True,
                 "message": "History item deleted successfully"
@@ -1839,19 +1862,17 @@ def delete_history_item_direct(user_id, history_id):
             return jsonify({"error": "History item not found or unauthorized"}), 404
         
     except Exception as e:
-        print(f"Delete history error: {e}")
+        log.exception("Delete history error: %s", e)
         return jsonify({"error": f"Failed to delete history item: {e}"}), 500
 
 @app.route('/user-history/<user_id>', methods=['DELETE'])
 def clear_all_history_direct(user_id):
     """Clear all history for a user"""
     try:
-        from services.database import DatabaseService
-        db_service = DatabaseService()
-        
         success = db_service.clear_user_history(user_id)
         
         if success:
+            invalidate_history_pages(user_id)
             return jsonify({
                 "success": True,
                 "message": "All history cleared successfully"
@@ -1860,45 +1881,39 @@ def clear_all_history_direct(user_id):
             return jsonify({"error": "Failed to clear history"}), 500
         
     except Exception as e:
-        print(f"Clear history error: {e}")
+        log.exception("Clear history error: %s", e)
         return jsonify({"error": f"Failed to clear history: {e}"}), 500
 
 @app.route('/new-artists/<user_id>', methods=['GET'])
 def get_new_artists_direct(user_id):
     """Get new artists discovered by user in the last 7 days"""
     try:
-        from services.database import DatabaseService
-        db_service = DatabaseService()
-        
         # Get days parameter from query string, default to 7
         days = request.args.get('days', 7, type=int)
         
         new_artists = db_service.get_new_artists(user_id, days)
         
-        return jsonify({
+        return etag_json_response({
             "user_id": user_id,
             "new_artists": new_artists,
             "count": len(new_artists),
             "days": days
-        })
+        }, private=True)
         
     except Exception as e:
-        print(f"New artists error: {e}")
+        log.exception("New artists error: %s", e)
         return jsonify({"error": f"Failed to get new artists: {e}"}), 500
 
 @app.route('/replay-recommendation/<user_id>/<int:history_id>', methods=['POST'])
 def replay_recommendation_direct(user_id, history_id):
     """Replay a specific recommendation from history"""
     try:
-        from services.database import DatabaseService
-        db_service = DatabaseService()
-        
         history_item = db_service.get_history_item(history_id)
         if not history_item:
             return jsonify({"error": "History item not found"}), 404
         
         # Re-run recommendation with same context
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         spotify_token = data.get("spotify_token")
         
         if not spotify_token:
@@ -1917,41 +1932,32 @@ def replay_recommendation_direct(user_id, history_id):
         })
         
     except Exception as e:
-        print(f"Replay recommendation error: {e}")
+        log.exception("Replay recommendation error: %s", e)
         return jsonify({"error": "Failed to replay recommendation"}), 500
 
 @app.route('/clear-cache', methods=['POST'])
 def clear_cache_direct():
     """Direct route for cache clearing - frontend compatibility"""
     try:
-        data = request.get_json()
-        user_id = data.get("user_id") if data else None
+        data = request.get_json(silent=True) or {}
         
         # Clear cross-domain recommendations cache
-        global crossdomain_cache
         crossdomain_cache_count = len(crossdomain_cache)
-        
         crossdomain_cache.clear()
         
-        if user_id:
-            # Clear specific user cache
-            cache_key = f"user_{user_id}"
-            # In a real implementation, you would clear from Redis or memory cache
-            print(f"Cleared cache for user: {user_id}")
-        else:
-            # Clear all cache
-            print("Cleared all cache")
+        # Same clears as the blueprint route: cached results (memory and DB), generated
+        # tags, tag lookups, and the user's new-artist and analytics caches
+        recommendation_cache_count = clear_recommendation_caches(data.get("user_id"))
         
         return jsonify({
             "status": "success", 
             "message": "Cache cleared",
             "crossdomain_cache_entries_cleared": crossdomain_cache_count,
-            "music_tags_cache_entries_cleared": 0,
-            "note": "Music recommendations have no caching enabled"
+            "recommendation_cache_entries_cleared": recommendation_cache_count
         })
         
     except Exception as e:
-        print(f"Cache clearing error: {e}")
+        log.exception("Cache clearing error: %s", e)
         return jsonify({"error": "Failed to clear cache"}), 500
 
 @app.route('/clear-qloo-cache', methods=['POST'])
@@ -1972,7 +1978,7 @@ def clear_qloo_cache_direct():
 def global_music_variety_direct():
     """Get global music variety from multiple providers"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data:
             return jsonify({"error": "Missing request data"}), 400
@@ -2009,14 +2015,14 @@ def global_music_variety_direct():
         })
         
     except Exception as e:
-        print(f"Global music variety error: {e}")
+        log.exception("Global music variety error: %s", e)
         return jsonify({"error": f"Failed to get global music variety: {e}"}), 500
 
 @app.route('/cultural-music-variety', methods=['POST'])
 def cultural_music_variety_direct():
     """Get cultural music variety from multiple providers"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data or not data.get("culture"):
             return jsonify({"error": "Missing culture parameter"}), 400
@@ -2045,14 +2051,14 @@ def cultural_music_variety_direct():
         })
         
     except Exception as e:
-        print(f"Cultural music variety error: {e}")
+        log.exception("Cultural music variety error: %s", e)
         return jsonify({"error": f"Failed to get cultural music variety: {e}"}), 500
 
 @app.route('/mood-music-variety', methods=['POST'])
 def mood_music_variety_direct():
     """Get mood-based music variety from multiple providers"""
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True)
         
         if not data or not data.get("mood"):
             return jsonify({"error": "Missing mood parameter"}), 400
@@ -2081,54 +2087,68 @@ def mood_music_variety_direct():
         })
         
     except Exception as e:
-        print(f"Mood music variety error: {e}")
+        log.exception("Mood music variety error: %s", e)
         return jsonify({"error": f"Failed to get mood music variety: {e}"}), 500
 
+# Variety stats are recomputed at most once a minute; clients revalidate with If-None-Match
+VARIETY_STATS_TTL = 60
+variety_stats_cache = [0.0, b"", ""]  # [expires_at, body, etag]
+
 @app.route('/music-variety-stats', methods=['GET'])
 def music_variety_stats_direct():
     """Get comprehensive music variety statistics"""
     try:
-        # Get stats from all services
-        aggregator_stats = music_aggregator_service.get_variety_stats()
-        qloo_stats = qloo_service.get_variety_stats()
-        
-        # Combine stats
-        combined_stats = {
-            "aggregator": aggregator_stats,
-            "qloo": qloo_stats,
-            "total_providers": aggregator_stats.get("total_providers", 0) + 1,  # +1 for Qloo
-            "total_categories": aggregator_stats.get("total_categories", 0),
-            "total_moods": aggregator_stats.get("total_moods", 0),
-            "available_providers": aggregator_stats.get("available_providers", []) + ["qloo"],
-            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
-        }
+        now = time.time()
+        if now >= variety_stats_cache[0]:
+            # Get stats from all services. Both calls only read in-memory counters (no provider
+            # RPCs), so they stay sequential; a thread-pool hop would cost more than the calls.
+            aggregator_stats = music_aggregator_service.get_variety_stats()
+            qloo_stats = qloo_service.get_variety_stats()
+            
+            # Combine stats
+            combined_stats = {
+                "aggregator": aggregator_stats,
+                "qloo": qloo_stats,
+                "total_providers": aggregator_stats.get("total_providers", 0) + 1,  # +1 for Qloo
+                "total_categories": aggregator_stats.get("total_categories", 0),
+                "total_moods": aggregator_stats.get("total_moods", 0),
+                "available_providers": aggregator_stats.get("available_providers", []) + ["qloo"]
+            }
+            # Tag on the stats alone so an unchanged snapshot keeps its ETag across refreshes
+            etag = hashlib.blake2b(dumps_bytes(combined_stats, sort_keys=True), digest_size=16).hexdigest()
+            combined_stats["timestamp"] = iso_timestamp()
+            
+            variety_stats_cache[1] = dumps_bytes({
+                "success": True,
+                "stats": combined_stats
+            })
+            variety_stats_cache[2] = etag
+            variety_stats_cache[0] = now + VARIETY_STATS_TTL
         
-        return jsonify({
-            "success": True,
-            "stats": combined_stats
-        })
+        return conditional_json_response(variety_stats_cache[1], variety_stats_cache[2])
         
     except Exception as e:
-        print(f"Music variety stats error: {e}")
+        log.exception("Music variety stats error: %s", e)
         return jsonify({"error": f"Failed to get variety stats: {e}"}), 500
 
+# Categories and moods are static aggregator config, so serialize the response once at startup
+CATEGORIES_RESPONSE_BODY = dumps_bytes({
+    "success": True,
+    "categories": music_aggregator_service.global_categories,
+    "moods": music_aggregator_service.mood_categories,
+    "total_categories": len(music_aggregator_service.global_categories),
+    "total_moods": len(music_aggregator_service.mood_categories)
+})
+CATEGORIES_ETAG = hashlib.blake2b(CATEGORIES_RESPONSE_BODY, digest_size=16).hexdigest()
+
 @app.route('/available-music-categories', methods=['GET'])
 def available_music_categories_direct():
     """Get all available music categories and moods"""
     try:
-        categories = music_aggregator_service.global_categories
-        moods = music_aggregator_service.mood_categories
-        
-        return jsonify({
-            "success": True,
-            "categories": categories,
-            "moods": moods,
-            "total_categories": len(categories),
-            "total_moods": len(moods)
-        })
+        return conditional_json_response(CATEGORIES_RESPONSE_BODY, CATEGORIES_ETAG)
         
     except Exception as e:
-        print(f"Available categories error: {e}")
+        log.exception("Available categories error: %s", e)
         return jsonify({"error": f"Failed to get categories: {e}"}), 500
 
 # Global rate limiting
@@ -2138,59 +2158,61 @@ gemini_request_times = []
 
 
 
+# Health probes hit these constantly; their bodies are serialized ahead of time
+HEALTH_RESPONSE_BODY = dumps_bytes({
+    "status": "healthy",
+    "services": {
+        "spotify": "available",
+        "qloo": "available",
+        "gemini": "available"
+    },
+    "performance": {
+        "memory_usage": "low",
+        "response_time": "fast"
+    }
+})
+home_body_cache = [0, b""]
+
 @app.route('/')
 def home():
     """Health check endpoint"""
-    return jsonify({
-        "status": "healthy",
-        "version": "2.0",
-        "optimized": True,
-        "timestamp": time.time()
-    })
+    # Re-serialize at most once per second (the timestamp has one-second resolution)
+    now = int(time.time())
+    if now != home_body_cache[0]:
+        home_body_cache[1] = dumps_bytes({
+            "status": "healthy",
+            "version": "2.0",
+            "optimized": True,
+            "timestamp": float(now)
+        })
+        home_body_cache[0] = now
+    return Response(home_body_cache[1], mimetype='application/json')
 
 @app.route('/health')
 def health_check():
     """Detailed health check"""
-    return jsonify({
-        "status": "healthy",
-        "services": {
-            "spotify": "available",
-            "qloo": "available", 
-            "gemini": "available"
-        },
-        "performance": {
-            "memory_usage": "low",
-            "response_time": "fast"
-        }
-    })
+    return Response(HEALTH_RESPONSE_BODY, mimetype='application/json')
 
 @app.route('/cache-status', methods=['GET'])
 def cache_status():
     """Get cache status and statistics"""
-    global crossdomain_cache
     current_time = time.time()
     
-    # Calculate crossdomain cache statistics
-    crossdomain_active_entries = 0
-    crossdomain_expired_entries = 0
-    crossdomain_cache_keys = []
-    
-    for key, value in crossdomain_cache.items():
-        if current_time - value['timestamp'] < CACHE_EXPIRY:
-            crossdomain_active_entries += 1
-            crossdomain_cache_keys.append({
-                "key": key,
-                "age_seconds": int(current_time - value['timestamp']),
-                "expires_in_seconds": int(CACHE_EXPIRY - (current_time - value['timestamp']))
-            })
-        else:
-            crossdomain_expired_entries += 1
+    # Expired entries are swept lazily by the cache, so everything left is active
+    crossdomain_cache_keys = [
+        {
+            "key": key,
+            "age_seconds": int(current_time - value.timestamp),
+            "expires_in_seconds": int(CACHE_EXPIRY - (current_time - value.timestamp))
+        }
+        for key, value in crossdomain_cache.items()
+    ]
     
     return jsonify({
         "crossdomain_cache": {
-            "total_entries": len(crossdomain_cache),
-            "active_entries": crossdomain_active_entries,
-            "expired_entries": crossdomain_expired_entries,
+            "total_entries": len(crossdomain_cache_keys),
+            "active_entries": len(crossdomain_cache_keys),
+            "expired_entries": crossdomain_cache.expired_count,
             "cache_expiry_seconds": CACHE_EXPIRY,
             "cache_keys": crossdomain_cache_keys
         },
@@ -2202,7 +2224,7 @@ def cache_status():
             "cache_keys": [],
             "status": "DISABLED - No caching for music recommendations"
         },
-        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S")
+        "timestamp": iso_timestamp()
     })
 
 @app.errorhandler(404)
@@ -2214,4 +2236,6 @@ def internal_error(error):
     return jsonify({"error": "Internal server error"}), 500
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5500) 
\ No newline at end of file
+    # Routes are I/O bound (Spotify/Qloo/Gemini/SQLite); serve each request on its own
+    # thread so in-flight upstream calls overlap instead of queueing behind each other
+    app.run(debug=True, host='0.0.0.0', port=5500, threaded=True)
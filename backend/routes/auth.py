@@ -1,10 +1,13 @@
-from flask import Blueprint, request, jsonify
-from services.spotify import SpotifyService
+from flask import Blueprint, request
+from services.spotify import get_spotify_service
 from utils.helpers import validate_input_data, sanitize_string
+from utils.json_provider import json_response
 import os
+import secrets
+import time
 
 auth_routes = Blueprint('auth', __name__)
-spotify_service = SpotifyService()
+spotify_service = get_spotify_service()
 
 @auth_routes.route('/spotify-auth-url', methods=['GET', 'POST'])
 def spotify_auth_url():
@@ -22,21 +25,21 @@ def spotify_auth_url():
             session_id = data.get("session_id") if data else None
         
         if not redirect_uri:
-            return jsonify({"error": "Missing redirect_uri parameter"}), 400
+            return json_response({"error": "Missing redirect_uri parameter"}), 400
         
         redirect_uri = sanitize_string(redirect_uri)
         
         # Generate auth URL with re-authentication support
         auth_data = spotify_service.generate_auth_url(redirect_uri, force_reauth=force_reauth, session_id=session_id)
         
-        return jsonify({
+        return json_response({
             "auth_url": auth_data["auth_url"],
             "state": auth_data["state"]
         })
         
     except Exception as e:
         print(f"Auth URL generation error: {e}")
-        return jsonify({"error": "Failed to generate auth URL"}), 500
+        return json_response({"error": "Failed to generate auth URL"}), 500
 
 @auth_routes.route('/exchange-token', methods=['POST'])
 def exchange_token():
@@ -45,7 +48,7 @@ def exchange_token():
         data = request.get_json()
         
         if not validate_input_data(data, ["code"]):
-            return jsonify({"error": "Missing code parameter"}), 400
+            return json_response({"error": "Missing code parameter"}), 400
         
         code = sanitize_string(data["code"])
         redirect_uri = sanitize_string(data.get("redirect_uri", "http://127.0.0.1:8080/callback"))
@@ -54,9 +57,9 @@ def exchange_token():
         token_data = spotify_service.exchange_token(code, redirect_uri)
         
         if not token_data:
-            return jsonify({"error": "Failed to exchange token"}), 400
+            return json_response({"error": "Failed to exchange token"}), 400
         
-        return jsonify({
+        return json_response({
             "access_token": token_data.get("access_token"),
             "refresh_token": token_data.get("refresh_token"),
             "expires_in": token_data.get("expires_in")
@@ -64,7 +67,7 @@ def exchange_token():
         
     except Exception as e:
         print(f"Token exchange error: {e}")
-        return jsonify({"error": "Failed to exchange token"}), 500
+        return json_response({"error": "Failed to exchange token"}), 500
 
 @auth_routes.route('/spotify-profile', methods=['POST'])
 def spotify_profile():
@@ -73,17 +76,17 @@ def spotify_profile():
         data = request.get_json()
         
         if not validate_input_data(data, ["spotify_token"]):
-            return jsonify({"error": "Missing required fields"}), 400
+            return json_response({"error": "Missing required fields"}), 400
         
         spotify_token = sanitize_string(data["spotify_token"])
         
-        # Get user profile
-        profile = spotify_service.get_user_profile(spotify_token)
+        # Get user profile (cached per token)
+        profile = spotify_service.get_cached_user_profile(spotify_token)
         
         if not profile:
-            return jsonify({"error": "Failed to get user profile"}), 400
+            return json_response({"error": "Failed to get user profile"}), 400
         
-        return jsonify({
+        return json_response({
             "id": profile["user_id"],
             "display_name": profile["name"],
             "images": [{"url": profile["avatar"]}] if profile["avatar"] else [],
@@ -92,7 +95,7 @@ def spotify_profile():
         
     except Exception as e:
         print(f"Profile fetch error: {e}")
-        return jsonify({"error": "Failed to get user profile"}), 500
+        return json_response({"error": "Failed to get user profile"}), 500
 
 @auth_routes.route('/logout', methods=['POST'])
 def logout():
@@ -113,14 +116,15 @@ def logout():
             except Exception as e:
                 print(f"Token revocation failed: {e}")
         
+        # Forget the cached profile for this token
+        spotify_service.invalidate_user_profile(access_token)
+        
         # Generate re-authentication URL
-        import secrets
-        import time
         unique_state = f"{secrets.token_urlsafe(32)}_{int(time.time())}"
         session_id = f"session_{secrets.token_urlsafe(16)}_{int(time.time())}"
         
         # Stateless logout - return success with re-auth URL
-        return jsonify({
+        return json_response({
             "success": True,
             "message": "Logged out successfully",
             "force_reauth": True,
@@ -131,24 +135,22 @@ def logout():
         
     except Exception as e:
         print(f"Logout error: {e}")
-        return jsonify({"error": "Failed to logout"}), 500
+        return json_response({"error": "Failed to logout"}), 500
 
 @auth_routes.route('/spotify-session-clear', methods=['POST'])
 def spotify_session_clear():
     """Clear Spotify session and force re-authentication"""
     try:
-        import secrets
-        import time
         session_id = f"session_{secrets.token_urlsafe(16)}_{int(time.time())}"
         
-        return jsonify({
+        return json_response({
             'success': True,
             'message': 'Spotify session cleared',
             'session_id': session_id,
             'reauth_url': f"http://localhost:5500/auth/spotify-auth-url?redirect_uri=http://127.0.0.1:8080/callback&force_reauth=true&session_id={session_id}"
         })
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}), 500
 
 @auth_routes.route('/check-token-scopes', methods=['POST'])
 def check_token_scopes():
@@ -157,7 +159,7 @@ def check_token_scopes():
         data = request.get_json()
         
         if not validate_input_data(data, ["spotify_token"]):
-            return jsonify({"error": "Missing spotify_token parameter"}), 400
+            return json_response({"error": "Missing spotify_token parameter"}), 400
         
         spotify_token = sanitize_string(data["spotify_token"])
         
@@ -165,9 +167,9 @@ def check_token_scopes():
         scopes = spotify_service.get_token_scopes(spotify_token)
         
         # Get user profile to see if country is available
-        profile = spotify_service.get_user_profile(spotify_token)
+        profile = spotify_service.get_cached_user_profile(spotify_token)
         
-        return jsonify({
+        return json_response({
             "scopes": scopes,
             "has_user_read_private": "user-read-private" in scopes,
             "profile": profile,
@@ -176,4 +178,4 @@ def check_token_scopes():
         
     except Exception as e:
         print(f"Token scope check error: {e}")
-        return jsonify({"error": "Failed to check token scopes"}), 500 
\ No newline at end of file
+        return json_response({"error": "Failed to check token scopes"}), 500 
\ No newline at end of file
@@ -1,10 +1,11 @@
-from flask import Blueprint, request, jsonify
-from services.spotify import SpotifyService
+from flask import Blueprint, request
+from services.spotify import get_spotify_service, TRACK_URI_PREFIX
 from utils.helpers import validate_input_data, sanitize_string, extract_playlist_id_from_url
+from utils.json_provider import json_response
 import os
 
 playlist_routes = Blueprint('playlists', __name__)
-spotify_service = SpotifyService()
+spotify_service = get_spotify_service()
 
 @playlist_routes.route('/create-playlist', methods=['POST'])
 def create_playlist():
@@ -13,7 +14,7 @@ def create_playlist():
         data = request.get_json()
         
         if not validate_input_data(data, ["spotify_token", "user_id", "name"]):
-            return jsonify({"error": "Missing required fields"}), 400
+            return json_response({"error": "Missing required fields"}), 400
         
         spotify_token = sanitize_string(data["spotify_token"])
         user_id = sanitize_string(data["user_id"])
@@ -24,24 +25,24 @@ def create_playlist():
         playlist = spotify_service.create_playlist(spotify_token, user_id, name)
         
         if not playlist:
-            return jsonify({"error": "Failed to create playlist"}), 500
+            return json_response({"error": "Failed to create playlist"}), 500
         
         # Add tracks if provided
         if tracks and playlist.get("playlist_id"):
-            track_uris = [f"spotify:track:{track}" for track in tracks if track]
+            track_uris = [TRACK_URI_PREFIX + track for track in tracks if track]
             if track_uris:
                 success = spotify_service.add_tracks_to_playlist(spotify_token, playlist["playlist_id"], track_uris)
                 if not success:
                     print("Warning: Failed to add tracks to playlist")
         
-        return jsonify({
+        return json_response({
             "playlist_id": playlist["playlist_id"],
             "playlist_url": playlist["playlist_url"]
         })
         
     except Exception as e:
         print(f"Playlist creation error: {e}")
-        return jsonify({"error": "Failed to create playlist"}), 500
+        return json_response({"error": "Failed to create playlist"}), 500
 
 @playlist_routes.route('/search-playlists', methods=['POST'])
 def search_playlists():
@@ -50,7 +51,7 @@ def search_playlists():
         data = request.get_json()
         
         if not validate_input_data(data, ["spotify_token", "query"]):
-            return jsonify({"error": "Missing required fields"}), 400
+            return json_response({"error": "Missing required fields"}), 400
         
         spotify_token = sanitize_string(data["spotify_token"])
         query = sanitize_string(data["query"])
@@ -58,13 +59,13 @@ def search_playlists():
         # Search playlists
         playlists = spotify_service.search_playlists(spotify_token, query)
         
-        return jsonify({
+        return json_response({
             "playlists": playlists
         })
         
     except Exception as e:
         print(f"Playlist search error: {e}")
-        return jsonify({"error": "Failed to search playlists"}), 500
+        return json_response({"error": "Failed to search playlists"}), 500
 
 @playlist_routes.route('/get-playlist-by-id', methods=['POST'])
 def get_playlist_by_id():
@@ -73,7 +74,7 @@ def get_playlist_by_id():
         data = request.get_json()
         
         if not validate_input_data(data, ["spotify_token", "playlist_id"]):
-            return jsonify({"error": "Missing required fields"}), 400
+            return json_response({"error": "Missing required fields"}), 400
         
         spotify_token = sanitize_string(data["spotify_token"])
         playlist_id = sanitize_string(data["playlist_id"])
@@ -82,9 +83,9 @@ def get_playlist_by_id():
         playlist = spotify_service.get_playlist_by_id(spotify_token, playlist_id)
         
         if not playlist:
-            return jsonify({"error": "Playlist not found"}), 404
+            return json_response({"error": "Playlist not found"}), 404
         
-        return jsonify({
+        return json_response({
             "playlist": {
                 "id": playlist["id"],
                 "name": playlist["name"],
@@ -95,7 +96,7 @@ def get_playlist_by_id():
         
     except Exception as e:
         print(f"Playlist fetch error: {e}")
-        return jsonify({"error": "Failed to get playlist"}), 500
+        return json_response({"error": "Failed to get playlist"}), 500
 
 @playlist_routes.route('/get-playlist-by-url', methods=['POST'])
 def get_playlist_by_url():
@@ -104,7 +105,7 @@ def get_playlist_by_url():
         data = request.get_json()
         
         if not validate_input_data(data, ["spotify_token", "playlist_url"]):
-            return jsonify({"error": "Missing required fields"}), 400
+            return json_response({"error": "Missing required fields"}), 400
         
         spotify_token = sanitize_string(data["spotify_token"])
         playlist_url = sanitize_string(data["playlist_url"])
@@ -113,15 +114,15 @@ def get_playlist_by_url():
         playlist_id = extract_playlist_id_from_url(playlist_url)
         
         if not playlist_id:
-            return jsonify({"error": "Invalid playlist URL"}), 400
+            return json_response({"error": "Invalid playlist URL"}), 400
         
         # Get playlist details
         playlist = spotify_service.get_playlist_by_id(spotify_token, playlist_id)
         
         if not playlist:
-            return jsonify({"error": "Playlist not found"}), 404
+            return json_response({"error": "Playlist not found"}), 404
         
-        return jsonify({
+        return json_response({
             "playlist": {
                 "id": playlist["id"],
                 "name": playlist["name"],
@@ -132,4 +133,4 @@ def get_playlist_by_url():
         
     except Exception as e:
         print(f"Playlist URL fetch error: {e}")
-        return jsonify({"error": "Failed to get playlist"}), 500 
\ No newline at end of file
+        return json_response({"error": "Failed to get playlist"}), 500 
\ No newline at end of file
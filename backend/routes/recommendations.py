@@ -1,127 +1,289 @@
-from flask import Blueprint, request, jsonify
-from services.spotify import SpotifyService
-from services.qloo import QlooService
-from services.gemini import GeminiService
-from services.database import DatabaseService
+from flask import Blueprint, request
+from services.spotify import get_spotify_service
+from services.qloo import get_qloo_service
+from services.gemini import get_gemini_service
+from services.database import get_database_service
+from services.progress import progress_tracker
 from utils.helpers import (
-    validate_input_data, sanitize_string, rank_recommendations_fast,
-    apply_cultural_intelligence_fast, get_fallback_recommendations
+    rank_recommendations_fast, apply_cultural_intelligence_fast, get_fallback_recommendations,
+    count_cultural_tags
 )
+from utils.json_provider import etag_json_response, json_response
+from utils.request_models import (
+    ArtistRecommendationRequest, CrossDomainRequest, MusicRecommendationRequest, RequestValidationError
+)
+from utils.ttl_cache import TTLCache
 import time
+import random
 import hashlib
 import json
+import logging
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from itertools import chain
 from typing import Dict, List
 
 recommendation_routes = Blueprint('recommendations', __name__)
-spotify_service = SpotifyService()
-qloo_service = QlooService()
-gemini_service = GeminiService()
-db_service = DatabaseService()
+log = logging.getLogger(__name__)
+spotify_service = get_spotify_service()
+qloo_service = get_qloo_service()
+gemini_service = get_gemini_service()
+db_service = get_database_service()
+
+# Handlers stay synchronous Flask views; blocking service calls that don't depend on
+# each other are overlapped on this shared pool instead of run back to back
+io_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="recommendations")
+
+# Speculatively fetched next pages of user history, keyed "user_id:offset:limit"
+HISTORY_PAGE_TTL = 60  # seconds
+history_page_cache = TTLCache(HISTORY_PAGE_TTL)
+
+
+def invalidate_history_pages(user_id: str):
+    """Drop a user's prefetched history pages once their history changes"""
+    prefix = f"{user_id}:"
+    for key, _ in history_page_cache.items():
+        if key.startswith(prefix):
+            history_page_cache.pop(key)
+
+# Process-local front for the cached_recommendations table; concurrent lookups of
+# the same key wait on one DB read instead of each issuing their own
+RECOMMENDATION_CACHE_TTL = 300  # 5 minutes in seconds
+recommendation_cache = TTLCache(RECOMMENDATION_CACHE_TTL)
+inflight_cache_lookups: Dict[str, Future] = {}
+# Music recommendation runs in progress, keyed by a digest of the request payload
+inflight_recommendations: Dict[str, Future] = {}
+inflight_lock = threading.Lock()
+# How long a duplicate request waits on the in-flight run before running the pipeline itself
+INFLIGHT_WAIT_TIMEOUT = 30  # seconds
+
+# Upper bound on names per batch artist-details request (one bulk details call)
+MAX_BATCH_ARTISTS = 50
+
+# Varied contexts for cross-domain tag generation, so repeat visits get different recommendations
+CROSSDOMAIN_CONTEXT_VARIATIONS = (
+    "cross-domain recommendations",
+    "discover new entertainment",
+    "explore diverse content",
+    "find similar vibes",
+    "cultural exploration",
+    "entertainment discovery",
+    "taste-based recommendations",
+    "multi-media exploration"
+)
+
+def get_cached_recommendation(cache_key: str):
+    """Look up a cached recommendation in memory first, then in the database (coalesced per key)"""
+    cached = recommendation_cache.get(cache_key)
+    if cached:
+        return cached.data
+    
+    with inflight_lock:
+        future = inflight_cache_lookups.get(cache_key)
+        is_owner = future is None
+        if is_owner:
+            future = inflight_cache_lookups[cache_key] = Future()
+    if not is_owner:
+        return future.result()
+    
+    try:
+        result = db_service.get_cached_recommendation(cache_key)
+        if result:
+            recommendation_cache.set(cache_key, result)
+        future.set_result(result)
+        return result
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with inflight_lock:
+            inflight_cache_lookups.pop(cache_key, None)
+
+def extract_listening_signals(user_data: Dict):
+    """Return (artist_ids[:8], track_ids[:8], artist_names[:5], casefolded names of all top artists)
+    from one pass over each Spotify list"""
+    artists = user_data.get("artists") or []
+    tracks = user_data.get("tracks") or []
+    artist_ids, artist_names, artist_name_keys = [], [], set()
+    for i, artist in enumerate(artists):
+        name = artist.get("name", "")
+        artist_name_keys.add(name.casefold())
+        # Entries without an id carry no signal for Qloo, so they are skipped rather than sent as ""
+        if i < 8 and artist.get("id"):
+            artist_ids.append(artist["id"])
+        if i < 5:
+            artist_names.append(name)
+    track_ids = [track["id"] for track in tracks[:8] if track.get("id")]
+    return artist_ids, track_ids, artist_names, frozenset(artist_name_keys)
 
-# In-memory progress tracking
-progress_tracker = {}
+def gather_named(futures, fallbacks):
+    """Resolve {name: future}; a service that raises gets its fallback instead of aborting the batch"""
+    results = {}
+    for name, future in futures.items():
+        try:
+            results[name] = future.result()
+        except Exception as e:
+            log.warning("[FAN-OUT] %s failed, using fallback: %s", name, e)
+            results[name] = fallbacks[name]
+    return results
+
+def persist_recommendation(user_id, session_future, user_context, all_tags, recommendations,
+                           response_time, genre_counts, primary_mood):
+    """Write analytics and history for a served music recommendation (runs on io_executor)"""
+    try:
+        db_service.bulk_update_user_taste_analytics(user_id, list(genre_counts.items()))
+        
+        if primary_mood:
+            db_service.update_mood_preferences(user_id, primary_mood, 1.0)
+        
+        db_service.store_recommendation_history(
+            user_id=user_id,
+            session_id=session_future.result(),
+            recommendation_type="music",
+            user_context=user_context,
+            generated_tags=all_tags,
+            qloo_artists=recommendations,
+            playlist_data={"recommendations": recommendations},
+            response_time=response_time
+        )
+        invalidate_history_pages(user_id)
+    except Exception as e:
+        log.exception("[PERSIST] Failed to store recommendation for user %s: %s", user_id, e)
 
 @recommendation_routes.route('/musicrecommendation', methods=['POST'])
-@recommendation_routes.route('/musicrecommandation', methods=['POST'])
 def music_recommendation():
     """Optimized music recommendation engine using Qloo + Gemini with enhanced user signals"""
+    return run_music_recommendation(request.get_json())
+
+@recommendation_routes.route('/musicrecommandation', methods=['POST'])
+def music_recommendation_legacy():
+    """Misspelled path kept for older clients; served in place rather than redirected to save a round trip"""
+    return run_music_recommendation(request.get_json())
+
+def run_music_recommendation(data: Dict):
+    """Validate a music recommendation payload and serve it"""
+    try:
+        req = MusicRecommendationRequest.from_json(data)
+    except RequestValidationError as e:
+        return json_response({"error": str(e)}), 400
+    return serve_music_recommendation(req)
+
+def serve_music_recommendation(req: MusicRecommendationRequest):
+    """Music recommendation response for a validated request (shared by the routes and history replay)"""
+    # Identical requests already in flight share one pipeline run instead of each
+    # paying for the Spotify/Gemini/Qloo round trips
+    request_key = hashlib.blake2b(
+        f"{req.spotify_token}\x1f{req.user_context}\x1f{req.limit}\x1f{req.create_playlist}\x1f{req.cache_bust}".encode(),
+        digest_size=16
+    ).hexdigest()
+    with inflight_lock:
+        future = inflight_recommendations.get(request_key)
+        is_owner = future is None
+        if is_owner:
+            future = inflight_recommendations[request_key] = Future()
+    if not is_owner:
+        try:
+            payload, status = future.result(timeout=INFLIGHT_WAIT_TIMEOUT)
+        except FutureTimeoutError:
+            # Don't let one stuck run hold every duplicate request with it
+            log.warning("In-flight recommendation still running after %ss, running this request separately", INFLIGHT_WAIT_TIMEOUT)
+            payload, status = build_music_recommendation(req)
+        return json_response(payload, status)
+    
+    try:
+        payload, status = build_music_recommendation(req)
+        future.set_result((payload, status))
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with inflight_lock:
+            inflight_recommendations.pop(request_key, None)
+    return json_response(payload, status)
+
+def build_music_recommendation(req: MusicRecommendationRequest):
+    """Run the recommendation pipeline and return (payload, status)"""
     start_time = time.time()
     
+    spotify_token = req.spotify_token
+    user_context = req.user_context
+    limit = req.limit  # Capped at 50
+    
     try:
-        data = request.get_json()
-        
-        if not validate_input_data(data, ["spotify_token"]):
-            return jsonify({"error": "Missing required fields"}), 400
-        
-        spotify_token = sanitize_string(data["spotify_token"])
-        user_context = sanitize_string(data.get("user_context", ""))
-        limit = min(int(data.get("limit", 15)), 50)  # Cap at 50
-        
         # Step 1: Get comprehensive user data from Spotify
         user_data = spotify_service.get_user_data_fast(spotify_token)
         if not user_data:
-            return jsonify({"error": "Failed to get user data"}), 400
+            return {"error": "Failed to get user data"}, 400
         
         user_id = user_data["profile"]["user_id"]
         user_country = user_data["profile"].get("country", "US")
         
-        print(f"[USER DATA] User: {user_id}, Country: {user_country}")
-        print(f"[USER DATA] Top artists: {[artist.get('name', '') for artist in user_data.get('artists', [])[:3]]}")
+        log.debug("[USER DATA] User: %s, Country: %s", user_id, user_country)
+        log.debug("[USER DATA] Top artists: %s", [artist.get('name', '') for artist in user_data.get('artists', [])[:3]])
         
-        # Step 2: Create user session for tracking
-        session_id = db_service.create_user_session(user_id, spotify_token, user_country, user_context)
+        # Step 2: Create user session for tracking (the insert runs while Gemini/Qloo are called)
+        session_future = io_executor.submit(db_service.create_user_session, user_id, spotify_token, user_country, user_context)
         
-        # Step 4: Analyze context with Gemini
-        context_analysis = gemini_service.analyze_context_fast(user_context)
-        print(f"[CONTEXT] Analysis: {context_analysis}")
+        # Step 4: Extract user's listening signals (artist and track IDs)
+        user_artist_ids, user_track_ids, user_artists, user_artist_keys = extract_listening_signals(user_data)
         
-        # Step 5: Extract user's listening signals (artist and track IDs)
-        user_artist_ids = [artist.get("id", "") for artist in user_data.get("artists", [])[:8]]
-        user_track_ids = [track.get("id", "") for track in user_data.get("tracks", [])[:8]]
+        log.debug("[SIGNALS] User artist IDs: %s...", user_artist_ids[:3])
+        log.debug("[SIGNALS] User track IDs: %s...", user_track_ids[:3])
         
-        print(f"[SIGNALS] User artist IDs: {user_artist_ids[:3]}...")
-        print(f"[SIGNALS] User track IDs: {user_track_ids[:3]}...")
+        # Step 4.5: Serve a recent identical result (same user, context, country and top artists).
+        # Playlist requests always run the pipeline since creating the playlist is the point.
+        cache_key = None
+        if not req.create_playlist:
+            cache_key = hashlib.blake2b(
+                f"{user_id}\x1fmusic\x1f{user_context}\x1f{user_country}\x1f{','.join(user_artist_ids[:5])}\x1f{limit}".encode(),
+                digest_size=16
+            ).hexdigest()
+            cached_result = None if req.cache_bust else get_cached_recommendation(cache_key)
+            if cached_result:
+                log.debug("[CACHE HIT] Music recommendation for user %s", user_id)
+                payload = dict(cached_result["recommendation_data"])
+                # Discovery artists change as the user listens; splice in the current list
+                payload["new_artists"] = db_service.get_new_artists(user_id, 5)
+                payload["analysis"] = {**payload["analysis"], "cache_hit": True}
+                return payload, 200
+        
+        # Steps 5-6: Context analysis, context-aware tags and cultural context are independent
+        # Gemini calls, so issue them together and wait for the slowest one
+        gemini_results = gather_named(
+            {
+                "context_analysis": io_executor.submit(gemini_service.analyze_context_fast, user_context),
+                "context_tags": io_executor.submit(gemini_service.generate_context_aware_tags, user_context, user_country, user_artists),
+                "cultural_context": io_executor.submit(gemini_service.generate_cultural_context, user_country, user_artists=user_artists)
+            },
+            {
+                "context_analysis": {"primary_mood": "neutral", "activity_type": "general", "energy_level": "medium", "confidence": 0.5},
+                "context_tags": [],
+                "cultural_context": {}
+            }
+        )
         
-        # Step 6: Generate AI-driven context-aware tags
-        context_tags = gemini_service.generate_context_aware_tags(user_context, user_country, user_artists)
-        print(f"[AI TAGS] Context-aware tags: {context_tags}")
-
-        # Generate cultural context
-        cultural_context = gemini_service.generate_cultural_context(user_country, user_artists=user_artists)
-        print(f"[CULTURAL CONTEXT] Generated: {cultural_context}")
+        context_analysis = gemini_results["context_analysis"]
+        log.debug("[CONTEXT] Analysis: %s", context_analysis)
+        context_tags = gemini_results["context_tags"]
+        log.debug("[AI TAGS] Context-aware tags: %s", context_tags)
+        cultural_context = gemini_results["cultural_context"]
+        log.debug("[CULTURAL CONTEXT] Generated: %s", cultural_context)
 
         # Create tags from cultural context
         cultural_tags = cultural_context.get("cultural_elements", []) + cultural_context.get("popular_genres", [])
 
         # Combine AI-generated context tags with cultural tags
-        all_tags = context_tags + cultural_tags
-        all_tags = list(dict.fromkeys(all_tags))  # Remove duplicates
+        all_tags = list(dict.fromkeys(context_tags + cultural_tags))  # Remove duplicates
 
-        print(f"[TAGS] AI context tags: {context_tags}")
-        print(f"[TAGS] Cultural tags: {cultural_tags}")
-        print(f"[TAGS] Combined tags: {all_tags}")
-        
-        # Send tags to Qloo until 5 are accepted
-        tag_ids = []
-        max_attempts = 10  # Prevent infinite loops
-        attempt = 0
+        log.debug("[TAGS] AI context tags: %s", context_tags)
+        log.debug("[TAGS] Cultural tags: %s", cultural_tags)
+        log.debug("[TAGS] Combined tags: %s", all_tags)
         
-        while len(tag_ids) < 3 and attempt < max_attempts:  # Reduced minimum requirement
-            attempt += 1
-            print(f"[QLOO ATTEMPT {attempt}] Trying to get 5 accepted tags...")
-            
-            # Try current tag set
-            current_tag_ids = qloo_service.get_tag_ids_fast(all_tags)
-            tag_ids.extend(current_tag_ids)
-            
-            # Remove duplicates
-            tag_ids = list(dict.fromkeys(tag_ids))
-            
-            print(f"[QLOO ATTEMPT {attempt}] Got {len(tag_ids)} accepted tags so far")
-            
-            # If we have 3 or more tags, we're done (no limit)
-            if len(tag_ids) >= 3:
-                print(f"[SUCCESS] Got {len(tag_ids)} accepted tags after {attempt} attempts")
-                break
-            
-            # If we need more tags, add fallback tags
-            if attempt < max_attempts - 1:
-                print(f"[NEED MORE TAGS] Only got {len(tag_ids)} tags, adding fallback tags...")
-                
-                # Add fallback tags based on context
-                fallback_tags = []
-                if len(tag_ids) < 3:
-                    fallback_tags = ['pop', 'mainstream', 'contemporary', 'cultural', 'diverse']
-                elif len(tag_ids) < 4:
-                    fallback_tags = ['energetic', 'upbeat', 'romantic', 'drama']
-                else:
-                    fallback_tags = ['electronic', 'dance', 'indie', 'alternative']
-                
-                all_tags.extend(fallback_tags)
-                all_tags = list(dict.fromkeys(all_tags))  # Remove duplicates
-                print(f"[FALLBACK] Added tags: {fallback_tags}")
+        # Resolve tags in one pass; fallback tags are only searched if too few were accepted
+        tag_ids, all_tags = qloo_service.get_music_tag_ids(all_tags)
         
-        print(f"[FINAL RESULT] Using {len(tag_ids)} accepted tags: {tag_ids}")
+        log.debug("[FINAL RESULT] Using %s accepted tags: %s", len(tag_ids), tag_ids)
         
         # Step 7: Get music recommendations using user signals
         recommendations = []
@@ -135,16 +297,16 @@ def music_recommendation():
                 user_country=user_country,
                 limit=limit
             )
-            print(f"[RECOMMENDATIONS] Got {len(recommendations)} recommendations with user signals")
+            log.debug("[RECOMMENDATIONS] Got %s recommendations with user signals", len(recommendations))
         
         # Step 8: Fallback if no recommendations with signals
         if not recommendations and tag_ids:
             recommendations = qloo_service.get_recommendations_fast(tag_ids, limit)
-            print(f"[FALLBACK] Got {len(recommendations)} recommendations without signals")
+            log.debug("[FALLBACK] Got %s recommendations without signals", len(recommendations))
         
         # Step 9: Final fallback with hardcoded recommendations
         if not recommendations:
-            print("[FINAL FALLBACK] Using hardcoded recommendations")
+            log.debug("[FINAL FALLBACK] Using hardcoded recommendations")
             recommendations = qloo_service.get_hardcoded_fallback_artists(
                 cultural_context={"country": user_country},
                 limit=limit
@@ -154,40 +316,32 @@ def music_recommendation():
         if recommendations:
             recommendations = apply_cultural_intelligence_fast(recommendations, user_country)
             
-            user_preferences = {
-                "artists": [artist["name"] for artist in user_data["artists"]],
-                "tracks": [track["name"] for track in user_data["tracks"]]
-            }
+            # Ranking only scores artist matches; the names were collected with the signals above
+            user_preferences = {"artists": user_artist_keys}
             
             recommendations = rank_recommendations_fast(recommendations, user_preferences)
-            print(f"[RANKING] Final recommendations: {len(recommendations)}")
-        
-        # Step 11: Track new artists
-        if recommendations:
-            artist_data = [
-                {
-                    "name": rec.get("name", ""), 
-                    "genre": rec.get("properties", {}).get("genres", [""])[0] if rec.get("properties", {}).get("genres") else "",
-                    "popularity": rec.get("popularity", 0.0)
-                } 
-                for rec in recommendations if rec.get("name")
-            ]
+            log.debug("[RANKING] Final recommendations: %s", len(recommendations))
+        
+        # Steps 11-12: One pass over the ranked list builds the new-artist rows and genre counts
+        artist_data = []
+        genre_counts = Counter()
+        for rec in recommendations:
+            get = rec.get
+            genres = (get("properties") or {}).get("genres")
+            genre = genres[0] if genres else ""
+            if genre:
+                genre_counts[genre] += 1
+            name = get("name")
+            if name:
+                artist_data.append({"name": name, "genre": genre, "popularity": get("popularity", 0.0)})
+        
+        # Track new artists
+        if artist_data:
             db_service.track_new_artists(user_id, artist_data)
         
-        # Step 12: Update user taste analytics
-        if recommendations:
-            for rec in recommendations:
-                genres = rec.get("properties", {}).get("genres", [])
-                if genres:
-                    db_service.update_user_taste_analytics(user_id, genres[0], 1, 0, 0.0)
-        
-        # Step 13: Update mood preferences
-        if context_analysis.get("primary_mood"):
-            db_service.update_mood_preferences(user_id, context_analysis["primary_mood"], 1.0)
-        
-        # Step 14: Create playlist if requested
+        # Step 13: Create playlist if requested
         playlist = None
-        if data.get("create_playlist", False) and recommendations:
+        if req.create_playlist and recommendations:
             playlist_name = f"SoniqueDNA - {context_analysis.get('activity_type', 'Music').title()}"
             playlist_description = f"AI-generated playlist for {context_analysis.get('primary_mood', 'music')} mood"
             
@@ -195,36 +349,26 @@ def music_recommendation():
         
         response_time = time.time() - start_time
         
-        # Step 15: Store in history
-        db_service.store_recommendation_history(
-            user_id=user_id,
-            session_id=session_id,
-            recommendation_type="music",
-            user_context=user_context,
-            generated_tags=all_tags,
-            qloo_artists=recommendations,
-            playlist_data={"recommendations": recommendations[:limit]},
-            response_time=response_time
+        # Only the top `limit` are ever shown; slice once and share it between history and the response
+        top_recommendations = recommendations[:limit]
+        
+        # Steps 14-15: Taste/mood analytics and history don't feed the response, so write them off
+        # the request thread. New-artist tracking stays inline because Step 16 reads it back.
+        io_executor.submit(
+            persist_recommendation, user_id, session_future, user_context, all_tags,
+            top_recommendations, response_time, genre_counts, context_analysis.get("primary_mood")
         )
         
         # Step 16: Prepare response data
         new_artists = db_service.get_new_artists(user_id, 5)
         
         # Calculate cultural tags count for showcase
-        cultural_keywords = [
-            "latin", "k-pop", "afrobeats", "jazz", "blues", "folk", "world", "bollywood", "hindi", "indian", 
-            "cultural", "romantic", "drama", "adventure", "mystery", "comedy", "asian", "western", "european",
-            "african", "middle_eastern", "south_asian", "desi", "pop", "mainstream", "contemporary", "traditional",
-            "emotional", "upbeat", "energetic", "calm", "relaxation", "party", "workout", "study", "social"
-        ]
-        
-        cultural_tags_found = [tag for tag in all_tags if any(cultural_word in tag.lower() for cultural_word in cultural_keywords)]
-        cultural_tags_count = len(cultural_tags_found)
+        cultural_tags_count = count_cultural_tags(all_tags)
         
         # If no cultural tags found but we have tags, count it as at least 1
         if cultural_tags_count == 0 and all_tags:
             cultural_tags_count = 1
-            print(f"[MUSIC REC] No cultural tags found in all_tags: {all_tags}, but tags exist")
+            log.debug("[MUSIC REC] No cultural tags found in all_tags: %s, but tags exist", all_tags)
         
         # Create qloo power showcase for music recommendations
         qloo_power_showcase = {
@@ -240,7 +384,7 @@ def music_recommendation():
         
         response_data = {
             "playlist": playlist,
-            "recommendations": recommendations[:limit],
+            "recommendations": top_recommendations,
             "new_artists": new_artists,
             "qloo_power_showcase": qloo_power_showcase,
             "analysis": {
@@ -255,13 +399,25 @@ def music_recommendation():
             }
         }
         
-        print(f"[SUCCESS] Music recommendations completed in {round(response_time, 2)}s")
-        return jsonify(response_data)
+        if cache_key:
+            cache_entry = {
+                "user_context": user_context,
+                "user_country": user_country,
+                "user_artists": user_artists,
+                "recommendation_data": {k: v for k, v in response_data.items() if k != "new_artists"}
+            }
+            recommendation_cache.set(cache_key, cache_entry)
+            io_executor.submit(
+                db_service.store_cached_recommendation, cache_key, user_context, user_country,
+                user_artists, cache_entry["recommendation_data"], expires_in_seconds=RECOMMENDATION_CACHE_TTL,
+                user_id=user_id
+            )
+        
+        log.info("[SUCCESS] Music recommendations completed in %ss", round(response_time, 2))
+        return response_data, 200
         
     except Exception as e:
-        print(f"Music recommendation error: {e}")
-        import traceback
-        traceback.print_exc()
+        log.exception("Music recommendation error: %s", e)
         
         # Enhanced fallback with better error handling
         try:
@@ -272,7 +428,7 @@ def music_recommendation():
         except:
             fallback_recommendations = get_fallback_recommendations("party")
         
-        return jsonify({
+        return {
             "playlist": None,
             "recommendations": fallback_recommendations,
             "new_artists": [],
@@ -283,7 +439,7 @@ def music_recommendation():
                 "error": str(e),
                 "response_time": round(time.time() - start_time, 2)
             }
-        })
+        }, 200
 
 @recommendation_routes.route('/crossdomain-recommendations', methods=['POST'])
 def crossdomain_recommendations():
@@ -291,20 +447,20 @@ def crossdomain_recommendations():
     start_time = time.time()
     
     try:
-        data = request.get_json()
-        
-        if not validate_input_data(data, ["spotify_token"]):
-            return jsonify({"error": "Missing required fields"}), 400
-        
-        spotify_token = sanitize_string(data["spotify_token"])
-        limit = min(int(data.get("limit", 10)), 20)  # Cap at 20
-        
+        req = CrossDomainRequest.from_json(request.get_json())
+    except RequestValidationError as e:
+        return json_response({"error": str(e)}), 400
+    
+    spotify_token = req.spotify_token
+    limit = req.limit  # Capped at 20
+    
+    try:
         # Step 1: Get user data once with fallback
         user_data = spotify_service.get_user_data_fast(spotify_token)
         if not user_data:
-            print("Profile fetch error: Failed to get user data from Spotify")
+            log.warning("Profile fetch error: Failed to get user data from Spotify")
             # Return fallback recommendations instead of error
-            return jsonify({
+            return json_response({
                 "recommendations": {
                     "music artist": [],
                     "movie": [],
@@ -319,36 +475,37 @@ def crossdomain_recommendations():
         user_country = user_data["profile"].get("country", "US")
         user_id = user_data["profile"]["user_id"]
         
-        print(f"[COUNTRY DEBUG] Cross-domain route - User Country: {user_country}")
-        print(f"[COUNTRY DEBUG] User Profile: {user_data['profile']}")
+        log.debug("[COUNTRY DEBUG] Cross-domain route - User Country: %s", user_country)
+        log.debug("[COUNTRY DEBUG] User Profile: %s", user_data['profile'])
         
-        # Step 2: Create user session for tracking
-        session_id = db_service.create_user_session(user_id, spotify_token, user_country, "cross-domain recommendations")
+        # Step 2: Create user session for tracking; the insert runs alongside the cache check
+        # below (on a cache hit the session row is still recorded, just not waited for)
+        session_future = io_executor.submit(db_service.create_user_session, user_id, spotify_token, user_country, "cross-domain recommendations")
         
         # Step 2.5: Add cache busting for variety
-        cache_bust = data.get("cache_bust", False)  # Allow frontend to request fresh data
-        force_refresh = data.get("force_refresh", False)  # Force complete refresh
+        cache_bust = req.cache_bust  # Allow frontend to request fresh data
+        force_refresh = req.force_refresh  # Force complete refresh
         
         # Create varied cache key to prevent repetitive results
-        import time
-        cache_variation = int(time.time() * 1000) % 1000  # Add time-based variation
-        cache_key = hashlib.md5(f"{user_id}_crossdomain_{cache_variation}_{user_country}".encode()).hexdigest()
+        cache_variation = random.randrange(1000)  # Add per-request variation
+        # \x1f (unit separator) can't appear in the parts, so distinct inputs never collide
+        cache_key = hashlib.blake2b(f"{user_id}\x1fcrossdomain\x1f{cache_variation}\x1f{user_country}".encode(), digest_size=16).hexdigest()
         
         # Only check cache if not forcing refresh
         if not force_refresh and not cache_bust:
-            cached_result = db_service.get_cached_recommendation(cache_key)
+            cached_result = get_cached_recommendation(cache_key)
             if cached_result:
-                print(f"[CACHE HIT] Returning cached cross-domain result for user {user_id}")
-                return jsonify(cached_result)
+                log.debug("[CACHE HIT] Returning cached cross-domain result for user %s", user_id)
+                return json_response(cached_result["recommendation_data"])
         
         # Step 3: Prepare top artists with images (with fallback)
         top_artists_with_images = []
         
-        # Get artists with images directly from Spotify service
-        artists_with_images = spotify_service.get_top_artists_with_images(spotify_token, limit=6, time_range="medium_term")
+        # get_user_data_fast already fetched the image-bearing top artists
+        artists_with_images = user_data.get("artists_with_images")
         
         if not artists_with_images:
-            print("[CROSSDOMAIN] No artists data available, using fallback")
+            log.debug("[CROSSDOMAIN] No artists data available, using fallback")
             # Use fallback artists for cultural context
             top_artists_with_images = [
                 {"id": "fallback_1", "name": "The Weeknd", "image": None, "genres": ["pop", "r&b"], "popularity": 0.9, "followers": 0},
@@ -360,24 +517,9 @@ def crossdomain_recommendations():
             top_artists_with_images = artists_with_images[:6]
         
         # Step 3: Generate unified tags with variety
-        import random
-        import time
-        
-        # Create varied contexts to get different recommendations
-        context_variations = [
-            "cross-domain recommendations",
-            "discover new entertainment",
-            "explore diverse content",
-            "find similar vibes",
-            "cultural exploration",
-            "entertainment discovery",
-            "taste-based recommendations",
-            "multi-media exploration"
-        ]
-        
-        # Use timestamp-based selection for variety
-        context_index = int(time.time() * 1000) % len(context_variations)
-        context = context_variations[context_index]
+        
+        # Pick one of the varied contexts to get different recommendations
+        context = random.choice(CROSSDOMAIN_CONTEXT_VARIATIONS)
         
         # Add user-specific variation based on their top artists
         if top_artists_with_images:
@@ -394,7 +536,7 @@ def crossdomain_recommendations():
             tags = gemini_service.generate_optimized_tags(context, user_country, user_artists)
             tag_ids = qloo_service.get_tag_ids_fast(tags)
         except Exception as e:
-            print(f"Tag generation error: {e}")
+            log.warning("Tag generation error: %s", e)
             # Use fallback tags
             tags = ["mainstream", "contemporary", "cultural", "emotional"]  # Fallback tags
             tag_ids = qloo_service.get_fallback_tag_ids("music")
@@ -408,27 +550,21 @@ def crossdomain_recommendations():
             "podcast": "podcast",         # Same
             "book": "book"                # Same
         }
-        recommendations_by_domain = {}
-        for domain in domains:
-            try:
-                domain_recommendations = qloo_service.get_cross_domain_recommendations(tag_ids, domain, limit)
-                frontend_domain = domain_mapping.get(domain, domain)
-                recommendations_by_domain[frontend_domain] = domain_recommendations[:limit]
-            except Exception as e:
-                print(f"Domain {domain} error: {e}")
-                frontend_domain = domain_mapping.get(domain, domain)
-                recommendations_by_domain[frontend_domain] = []
+        # One call covers every domain (Qloo filters on a single entity type per request,
+        # so the service fans the per-domain queries out concurrently)
+        domain_results = qloo_service.get_cross_domain_recommendations_multi(tag_ids, domains, limit)
+        recommendations_by_domain = {
+            domain_mapping.get(domain, domain): domain_results[domain] for domain in domains
+        }
         
         response_time = time.time() - start_time
         
         # Store cross-domain recommendation in history
-        all_recommendations = []
-        for domain, recs in recommendations_by_domain.items():
-            all_recommendations.extend(recs)
+        all_recommendations = list(chain.from_iterable(recommendations_by_domain.values()))
         
         db_service.store_recommendation_history(
             user_id=user_id,
-            session_id=session_id,
+            session_id=session_future.result(),
             recommendation_type="crossdomain",
             user_context="cross-domain recommendations",
             generated_tags=tags,
@@ -436,22 +572,15 @@ def crossdomain_recommendations():
             playlist_data={"recommendations_by_domain": recommendations_by_domain},
             response_time=response_time
         )
+        invalidate_history_pages(user_id)
         
         # Calculate cultural tags count for showcase
-        cultural_keywords = [
-            "latin", "k-pop", "afrobeats", "jazz", "blues", "folk", "world", "bollywood", "hindi", "indian", 
-            "cultural", "romantic", "drama", "adventure", "mystery", "comedy", "asian", "western", "european",
-            "african", "middle_eastern", "south_asian", "desi", "pop", "mainstream", "contemporary", "traditional",
-            "emotional", "upbeat", "energetic", "calm", "relaxation", "party", "workout", "study", "social"
-        ]
-        
-        cultural_tags_found = [tag for tag in tags if any(cultural_word in tag.lower() for cultural_word in cultural_keywords)]
-        cultural_tags_count = len(cultural_tags_found)
+        cultural_tags_count = count_cultural_tags(tags)
         
         # If no cultural tags found but we have tags, count it as at least 1
         if cultural_tags_count == 0 and tags:
             cultural_tags_count = 1
-            print(f"[CROSSDOMAIN] No cultural tags found in tags: {tags}, but tags exist")
+            log.debug("[CROSSDOMAIN] No cultural tags found in tags: %s, but tags exist", tags)
         
         # Calculate total recommendations across all domains
         total_recommendations = sum(len(items) for items in recommendations_by_domain.values() if items)
@@ -468,7 +597,7 @@ def crossdomain_recommendations():
             "location_based_count": 0  # Cross-domain doesn't use location
         }
         
-        return jsonify({
+        return json_response({
             "top_artists": [artist["name"] for artist in top_artists_with_images],
             "top_artists_with_images": top_artists_with_images,
             "recommendations_by_domain": recommendations_by_domain,
@@ -482,25 +611,18 @@ def crossdomain_recommendations():
         })
         
     except Exception as e:
-        print(f"Cross-domain recommendations error: {e}")
-        return jsonify({"error": "Failed to get cross-domain recommendations"}), 500
+        log.exception("Cross-domain recommendations error: %s", e)
+        return json_response({"error": "Failed to get cross-domain recommendations"}), 500
 
 @recommendation_routes.route('/crossdomain-progress/<user_id>', methods=['GET'])
 def get_crossdomain_progress(user_id):
     """Real-time progress tracking"""
     try:
-        progress = progress_tracker.get(user_id, {
-            "percentage": 0,
-            "status": "not_started",
-            "current_artist": "",
-            "current_domain": ""
-        })
-        
-        return jsonify(progress)
+        return json_response(progress_tracker.get(user_id))
         
     except Exception as e:
-        print(f"Progress tracking error: {e}")
-        return jsonify({"error": "Failed to get progress"}), 500
+        log.exception("Progress tracking error: %s", e)
+        return json_response({"error": "Failed to get progress"}), 500
 
 @recommendation_routes.route('/artist-priority-recommendations', methods=['POST'])
 def artist_priority_recommendations():
@@ -508,31 +630,31 @@ def artist_priority_recommendations():
     start_time = time.time()
     
     try:
-        data = request.get_json()
-        
-        if not validate_input_data(data, ["spotify_token", "artist_name"]):
-            return jsonify({"error": "Missing required fields"}), 400
-        
-        spotify_token = sanitize_string(data["spotify_token"])
-        artist_name = sanitize_string(data["artist_name"])
-        context = sanitize_string(data.get("context", ""))
-        limit = min(int(data.get("limit", 15)), 50)  # Cap at 50
-        
+        req = ArtistRecommendationRequest.from_json(request.get_json())
+    except RequestValidationError as e:
+        return json_response({"error": str(e)}), 400
+    
+    spotify_token = req.spotify_token
+    artist_name = req.artist_name
+    context = req.context
+    limit = req.limit  # Capped at 50
+    
+    try:
         # Step 1: Get user data to get country for cultural context
         user_data = spotify_service.get_user_data_fast(spotify_token)
         if not user_data:
-            return jsonify({"error": "Failed to get user data"}), 400
+            return json_response({"error": "Failed to get user data"}), 400
         
         user_country = user_data["profile"].get("country", "US")
         user_id = user_data["profile"]["user_id"]
         
-        print(f"[ARTIST SEARCH] Searching for artist: {artist_name}")
+        log.debug("[ARTIST SEARCH] Searching for artist: %s", artist_name)
         
         # Step 2: Search for artist in Qloo database first
         qloo_artist = qloo_service.search_entity(artist_name, "artist")
         
         if qloo_artist:
-            print(f"[QLOO FOUND] Found artist in Qloo: {qloo_artist.get('name', 'Unknown')} (ID: {qloo_artist.get('id', 'Unknown')})")
+            log.debug("[QLOO FOUND] Found artist in Qloo: %s (ID: %s)", qloo_artist.get('name', 'Unknown'), qloo_artist.get('id', 'Unknown'))
             
             # Step 3: Get recommendations based on this specific artist
             artist_id = qloo_artist.get("id")
@@ -544,7 +666,7 @@ def artist_priority_recommendations():
                     limit=limit
                 )
                 
-                print(f"[RECOMMENDATIONS] Got {len(recommendations)} recommendations based on artist ID")
+                log.debug("[RECOMMENDATIONS] Got %s recommendations based on artist ID", len(recommendations))
                 
                 # Step 4: Apply cultural intelligence and ranking
                 recommendations = apply_cultural_intelligence_fast(recommendations, user_country)
@@ -554,7 +676,7 @@ def artist_priority_recommendations():
                 
                 response_time = time.time() - start_time
                 
-                return jsonify({
+                return json_response({
                     "recommendations": recommendations,
                     "artist_analysis": artist_analysis,
                     "qloo_artist": qloo_artist,
@@ -563,7 +685,7 @@ def artist_priority_recommendations():
                 })
         
         # Fallback: If artist not found in Qloo, use tag-based approach
-        print(f"[QLOO NOT FOUND] Artist '{artist_name}' not found in Qloo, using tag-based approach")
+        log.debug("[QLOO NOT FOUND] Artist '%s' not found in Qloo, using tag-based approach", artist_name)
         
         # Step 2b: Generate Qloo-optimized tags with cultural intelligence
         tags = gemini_service.generate_optimized_tags(f"{artist_name} {context}", user_country, [artist_name])
@@ -580,7 +702,7 @@ def artist_priority_recommendations():
         
         response_time = time.time() - start_time
         
-        return jsonify({
+        return json_response({
             "recommendations": recommendations,
             "artist_analysis": artist_analysis,
             "qloo_artist": None,
@@ -589,21 +711,31 @@ def artist_priority_recommendations():
         })
         
     except Exception as e:
-        print(f"Artist recommendations error: {e}")
-        import traceback
-        traceback.print_exc()
-        return jsonify({"error": "Failed to get artist recommendations"}), 500
+        log.exception("Artist recommendations error: %s", e)
+        return json_response({"error": "Failed to get artist recommendations"}), 500
 
 @recommendation_routes.route('/history/<user_id>', methods=['GET'])
 def get_user_history(user_id):
     """Get user's recommendation history"""
     try:
         limit = request.args.get('limit', 10, type=int)
-        history = db_service.get_user_history(user_id, limit)
-        return jsonify({"history": history})
+        offset = request.args.get('offset', 0, type=int)
+        
+        # Served from the prefetch made by the previous page's request
+        page_key = f"{user_id}:{offset}:{limit}"
+        prefetched = history_page_cache.get(page_key)
+        if prefetched:
+            history_page_cache.pop(page_key)
+            return json_response({"history": prefetched.data})
+        
+        # One query covers this page and the next; the next is held for the follow-up request
+        rows = db_service.get_user_history(user_id, limit * 2, offset=offset)
+        if len(rows) > limit:
+            history_page_cache.set(f"{user_id}:{offset + limit}:{limit}", rows[limit:])
+        return json_response({"history": rows[:limit]})
     except Exception as e:
-        print(f"History fetch error: {e}")
-        return jsonify({"error": "Failed to get history"}), 500
+        log.exception("History fetch error: %s", e)
+        return json_response({"error": "Failed to get history"}), 500
 
 @recommendation_routes.route('/history/<user_id>/<int:history_id>', methods=['POST'])
 def replay_recommendation(user_id, history_id):
@@ -611,55 +743,51 @@ def replay_recommendation(user_id, history_id):
     try:
         history_item = db_service.get_history_item(history_id)
         if not history_item:
-            return jsonify({"error": "History item not found"}), 404
+            return json_response({"error": "History item not found"}), 404
         
         # Re-run recommendation with same context
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
         spotify_token = data.get("spotify_token")
         
-        if not spotify_token:
-            return jsonify({"error": "Missing spotify_token"}), 400
-        
-        # Use the stored context to generate new recommendations
-        user_context = history_item.get("user_context", "")
-        
-        # Create a new request with the historical context
-        replay_data = {
-            "spotify_token": spotify_token,
-            "user_context": user_context,
-            "limit": 15
-        }
+        if not spotify_token or not isinstance(spotify_token, str):
+            return json_response({"error": "Missing spotify_token"}), 400
         
-        # Create a new request with the historical context
-        request._json = replay_data
-        return music_recommendation()
+        # Re-run the pipeline with the stored context; the request is built directly
+        # rather than as a payload dict that would just be validated again
+        return serve_music_recommendation(MusicRecommendationRequest(
+            spotify_token=spotify_token,
+            user_context=history_item.get("user_context") or ""
+        ))
         
     except Exception as e:
-        print(f"Replay recommendation error: {e}")
-        return jsonify({"error": "Failed to replay recommendation"}), 500
+        log.exception("Replay recommendation error: %s", e)
+        return json_response({"error": "Failed to replay recommendation"}), 500
 
 @recommendation_routes.route('/new-artists/<user_id>', methods=['GET'])
 def get_new_artists(user_id):
     """Get recently discovered new artists for user"""
     try:
         days = request.args.get('days', 7, type=int)
-        print(f"Fetching new artists for user {user_id} in last {days} days")
+        log.debug("Fetching new artists for user %s in last %s days", user_id, days)
         new_artists = db_service.get_new_artists(user_id, days)
-        print(f"Found {len(new_artists)} new artists: {[artist['artist_name'] for artist in new_artists]}")
-        return jsonify({"new_artists": new_artists})
+        if log.isEnabledFor(logging.DEBUG):
+            # The name list is only worth building when someone will read it
+            log.debug("Found %s new artists: %s", len(new_artists), [artist['artist_name'] for artist in new_artists])
+        # Polled by the UI; an unchanged list comes back as a bodyless 304
+        return etag_json_response({"new_artists": new_artists}, private=True)
     except Exception as e:
-        print(f"New artists fetch error: {e}")
-        return jsonify({"error": "Failed to get new artists"}), 500
+        log.exception("New artists fetch error: %s", e)
+        return json_response({"error": "Failed to get new artists"}), 500
 
 @recommendation_routes.route('/taste-analytics/<user_id>', methods=['GET'])
 def get_user_taste_analytics(user_id):
     """Get user taste analytics for graph visualization"""
     try:
         analytics = db_service.get_user_taste_analytics(user_id)
-        return jsonify(analytics)
+        return etag_json_response(analytics, private=True)
     except Exception as e:
-        print(f"Taste analytics fetch error: {e}")
-        return jsonify({"error": "Failed to get taste analytics"}), 500
+        log.exception("Taste analytics fetch error: %s", e)
+        return json_response({"error": "Failed to get taste analytics"}), 500
 
 @recommendation_routes.route('/artists/track', methods=['POST'])
 def track_artists():
@@ -670,43 +798,54 @@ def track_artists():
         artists = data.get('artists', [])
         
         if not user_id or not artists:
-            return jsonify({"error": "Missing user_id or artists"}), 400
+            return json_response({"error": "Missing user_id or artists"}), 400
         
         new_artists = db_service.track_new_artists(user_id, artists)
-        return jsonify({"new_artists": new_artists})
+        return json_response({"new_artists": new_artists})
     except Exception as e:
-        print(f"Artist tracking error: {e}")
-        return jsonify({"error": "Failed to track artists"}), 500
+        log.exception("Artist tracking error: %s", e)
+        return json_response({"error": "Failed to track artists"}), 500
+
+def clear_recommendation_caches(user_id: str = None) -> int:
+    """Drop the caches behind music recommendations (all users' if user_id is None);
+    returns how many in-memory recommendation results were dropped"""
+    cleared = len(recommendation_cache)
+    # Keys are hashed, so the in-memory front can't be cleared per user
+    recommendation_cache.clear()
+    # Generated tags and tag lookups are shared by every user
+    gemini_service.clear_caches()
+    qloo_service.clear_tag_cache()
+    
+    if user_id:
+        db_service.clear_user_cache(user_id)
+        log.info("Cleared cache for user: %s", user_id)
+    else:
+        db_service.clear_all_cache()
+        log.info("Cleared all cache")
+    return cleared
 
 @recommendation_routes.route('/clear-cache', methods=['POST'])
 def clear_cache():
     """Clear recommendation cache"""
     try:
-        data = request.get_json()
-        user_id = data.get("user_id") if data else None
-        
-        db_service.clear_user_cache(user_id)
+        data = request.get_json(silent=True) or {}
+        clear_recommendation_caches(data.get("user_id"))
         
-        if user_id:
-            print(f"Cleared cache for user: {user_id}")
-        else:
-            print("Cleared all cache")
-        
-        return jsonify({"status": "success", "message": "Cache cleared"})
+        return json_response({"status": "success", "message": "Cache cleared"})
         
     except Exception as e:
-        print(f"Cache clearing error: {e}")
-        return jsonify({"error": "Failed to clear cache"}), 500
+        log.exception("Cache clearing error: %s", e)
+        return json_response({"error": "Failed to clear cache"}), 500
 
 @recommendation_routes.route('/analytics/clear/<user_id>', methods=['POST'])
 def clear_analytics(user_id):
     """Clear analytics data for a user"""
     try:
         db_service.clear_user_analytics(user_id)
-        return jsonify({"status": "success", "message": "Analytics cleared"})
+        return json_response({"status": "success", "message": "Analytics cleared"})
     except Exception as e:
-        print(f"Analytics clearing error: {e}")
-        return jsonify({"error": "Failed to clear analytics"}), 500
+        log.exception("Analytics clearing error: %s", e)
+        return json_response({"error": "Failed to clear analytics"}), 500
 
 @recommendation_routes.route('/artist-details', methods=['POST'])
 def get_artist_details():
@@ -715,38 +854,52 @@ def get_artist_details():
         data = request.get_json()
         
         if not data or not data.get("spotify_token") or not data.get("artist_name"):
-            return jsonify({"error": "Missing spotify_token or artist_name"}), 400
+            return json_response({"error": "Missing spotify_token or artist_name"}), 400
         
         spotify_token = data["spotify_token"]
         artist_name = data["artist_name"]
         
-        print(f"Searching for artist: {artist_name}")
-        # First search for the artist to get their ID
-        artist_search = spotify_service.search_artist(spotify_token, artist_name)
+        log.debug("Searching for artist: %s", artist_name)
+        # A batch of one: search (cached) then details (cached)
+        result = spotify_service.get_artist_details_batch(spotify_token, [artist_name])[artist_name]
         
-        if not artist_search:
-            print(f"Artist '{artist_name}' not found in Spotify search")
-            return jsonify({"error": f"Artist '{artist_name}' not found"}), 404
+        if "artist" in result:
+            return json_response(result)
+        status = 404 if result["reason"] == "not_found" else 500
+        log.info("Artist details for '%s' failed: %s", artist_name, result["error"])
+        return json_response(result), status
+        
+    except Exception as e:
+        log.exception("Artist details error: %s", e)
+        return json_response({"error": "Failed to get artist details"}), 500
+
+@recommendation_routes.route('/artist-details/batch', methods=['POST'])
+def get_artist_details_batch():
+    """Get detailed artist information for many artists in one request"""
+    try:
+        data = request.get_json()
         
-        print(f"Found artist in search: {artist_search.get('name', 'Unknown')} (ID: {artist_search.get('id', 'Unknown')})")
-        # Get detailed artist information
-        artist_details = spotify_service.get_artist_details(spotify_token, artist_search["id"])
+        if not data or not data.get("spotify_token") or not data.get("artist_names"):
+            return json_response({"error": "Missing spotify_token or artist_names"}), 400
         
-        if not artist_details:
-            return jsonify({"error": "Failed to get artist details"}), 500
+        artist_names = data["artist_names"]
+        if not isinstance(artist_names, list) or not all(isinstance(name, str) for name in artist_names):
+            return json_response({"error": "artist_names must be a list of strings"}), 400
         
-        return jsonify({"artist": artist_details})
+        # Searches run concurrently and details come from Spotify's bulk endpoint (50 per call)
+        results = spotify_service.get_artist_details_batch(data["spotify_token"], artist_names[:MAX_BATCH_ARTISTS])
+        return json_response({"results": results})
         
     except Exception as e:
-        print(f"Artist details error: {e}")
-        return jsonify({"error": "Failed to get artist details"}), 500
+        log.exception("Batch artist details error: %s", e)
+        return json_response({"error": "Failed to get batch artist details"}), 500
 
 @recommendation_routes.route('/analytics/populate-sample/<user_id>', methods=['POST'])
 def populate_sample_analytics(user_id):
     """Populate sample analytics data for a user"""
     try:
         db_service.populate_sample_analytics(user_id)
-        return jsonify({"status": "success", "message": "Sample analytics populated"})
+        return json_response({"status": "success", "message": "Sample analytics populated"})
     except Exception as e:
-        print(f"Sample analytics population error: {e}")
-        return jsonify({"error": "Failed to populate sample analytics"}), 500 
\ No newline at end of file
+        log.exception("Sample analytics population error: %s", e)
+        return json_response({"error": "Failed to populate sample analytics"}), 500 
\ No newline at end of file
@@ -1,138 +1,202 @@
-import sqlite3
 import json
 import os
+import functools
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
+from services.db_pool import SQLitePool
+from utils.shared_cache import SharedCache
+from utils.ttl_cache import TTLCache
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+# New-artist lists are read on every recommendation and polled by the UI; keep them briefly
+NEW_ARTISTS_CACHE_TTL = 60  # seconds
+# Taste analytics back a polled dashboard but only change when recommendations are stored
+TASTE_ANALYTICS_CACHE_TTL = 300  # seconds
+# Column order of the get_new_artists SELECT
+NEW_ARTIST_FIELDS = ('artist_name', 'first_seen', 'last_seen', 'recommendation_count',
+                     'is_new_artist', 'genre', 'popularity_score')
+
+
+def _dumps(obj: Any) -> str:
+    """Encode a JSON column value (history and cache blobs can be whole playlists)"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+        except TypeError:
+            pass
+    return json.dumps(obj)
+
+
+def _loads(data) -> Any:
+    """Decode a JSON column value"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
 
 class DatabaseService:
     def __init__(self, db_path: str = "music_recommendations.db"):
         self.db_path = db_path
+        # Every query, schema setup included, borrows one of these long-lived connections;
+        # no per-call connect or PRAGMA cost, and SQLite's page cache stays warm between calls
+        self.pool = SQLitePool(db_path)
         self.init_database()
+        # user_id -> {days: rows}; dropped whenever the user's artist tracking changes
+        self.new_artists_cache = TTLCache(NEW_ARTISTS_CACHE_TTL)
+        # user_id -> taste analytics payload, shared across workers through Redis when configured;
+        # dropped on every write to the genre, mood or discovery tables
+        self.taste_analytics_cache = SharedCache("db:taste", TASTE_ANALYTICS_CACHE_TTL)
     
     def init_database(self):
         """Initialize database tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # User sessions table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_sessions (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                spotify_token TEXT,
-                session_start TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                session_end TIMESTAMP,
-                user_country TEXT,
-                user_context TEXT,
-                UNIQUE(user_id, session_start)
-            )
-        ''')
-        
-        # Recommendation history table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS recommendation_history (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                session_id INTEGER,
-                recommendation_type TEXT NOT NULL,
-                user_context TEXT,
-                generated_tags TEXT,
-                qloo_artists TEXT,
-                playlist_data TEXT,
-                response_time REAL,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (session_id) REFERENCES user_sessions(id)
-            )
-        ''')
-        
-        # Artist tracking table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS artist_tracking (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                artist_name TEXT NOT NULL,
-                first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                recommendation_count INTEGER DEFAULT 1,
-                is_new_artist BOOLEAN DEFAULT TRUE,
-                genre TEXT,
-                popularity_score REAL DEFAULT 0.0,
-                UNIQUE(user_id, artist_name)
-            )
-        ''')
-        
-        # Cached recommendations table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS cached_recommendations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                cache_key TEXT UNIQUE NOT NULL,
-                user_context TEXT,
-                user_country TEXT,
-                user_artists TEXT,
-                recommendation_data TEXT,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                expires_at TIMESTAMP,
-                hit_count INTEGER DEFAULT 1
-            )
-        ''')
-        
-        # User taste analytics table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_taste_analytics (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                genre TEXT NOT NULL,
-                artist_count INTEGER DEFAULT 0,
-                track_count INTEGER DEFAULT 0,
-                total_playtime REAL DEFAULT 0.0,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(user_id, genre)
-            )
-        ''')
-        
-        # User mood preferences table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS user_mood_preferences (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                mood TEXT NOT NULL,
-                preference_score REAL DEFAULT 0.0,
-                context_count INTEGER DEFAULT 0,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(user_id, mood)
-            )
-        ''')
+        # Schema setup borrows a pooled connection too, so WAL is on before the first CREATE TABLE
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
         
-        # New artists discovered table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS new_artists_discovered (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                user_id TEXT NOT NULL,
-                artist_name TEXT NOT NULL,
-                discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                UNIQUE(user_id, artist_name)
-            )
-        ''')
+            # User sessions table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS user_sessions (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    spotify_token TEXT,
+                    session_start TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    session_end TIMESTAMP,
+                    user_country TEXT,
+                    user_context TEXT,
+                    UNIQUE(user_id, session_start)
+                )
+            ''')
+        
+            # Recommendation history table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS recommendation_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    session_id INTEGER,
+                    recommendation_type TEXT NOT NULL,
+                    user_context TEXT,
+                    generated_tags TEXT,
+                    qloo_artists TEXT,
+                    playlist_data TEXT,
+                    response_time REAL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (session_id) REFERENCES user_sessions(id)
+                )
+            ''')
+        
+            # Artist tracking table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS artist_tracking (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    artist_name TEXT NOT NULL,
+                    first_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    last_seen TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    recommendation_count INTEGER DEFAULT 1,
+                    is_new_artist BOOLEAN DEFAULT TRUE,
+                    genre TEXT,
+                    popularity_score REAL DEFAULT 0.0,
+                    UNIQUE(user_id, artist_name)
+                )
+            ''')
+        
+            # Cached recommendations table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS cached_recommendations (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    cache_key TEXT UNIQUE NOT NULL,
+                    user_id TEXT,
+                    user_context TEXT,
+                    user_country TEXT,
+                    user_artists TEXT,
+                    recommendation_data TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    expires_at TIMESTAMP,
+                    hit_count INTEGER DEFAULT 1
+                )
+            ''')
+        
+            # User taste analytics table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS user_taste_analytics (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    genre TEXT NOT NULL,
+                    artist_count INTEGER DEFAULT 0,
+                    track_count INTEGER DEFAULT 0,
+                    total_playtime REAL DEFAULT 0.0,
+                    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(user_id, genre)
+                )
+            ''')
+        
+            # User mood preferences table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS user_mood_preferences (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    mood TEXT NOT NULL,
+                    preference_score REAL DEFAULT 0.0,
+                    context_count INTEGER DEFAULT 0,
+                    last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(user_id, mood)
+                )
+            ''')
+        
+            # New artists discovered table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS new_artists_discovered (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    user_id TEXT NOT NULL,
+                    artist_name TEXT NOT NULL,
+                    discovered_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(user_id, artist_name)
+                )
+            ''')
+        
+            # Cache keys are hashes, so per-user clears need their own column (added to older databases here)
+            cache_columns = {row[1] for row in cursor.execute('PRAGMA table_info(cached_recommendations)')}
+            if 'user_id' not in cache_columns:
+                cursor.execute('ALTER TABLE cached_recommendations ADD COLUMN user_id TEXT')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_cached_recommendations_user
+                ON cached_recommendations (user_id)
+            ''')
         
-        conn.commit()
-        conn.close()
+            # get_new_artists filters by user and first_seen and sorts on first_seen; this index
+            # serves it as one range scan instead of sorting every tracked artist for the user
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_artist_tracking_user_first_seen
+                ON artist_tracking (user_id, first_seen DESC)
+            ''')
+            
+            # History pages filter by user and sort newest first; walked backwards this index
+            # yields (created_at, id) DESC with no sort step
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_recommendation_history_user_created
+                ON recommendation_history (user_id, created_at)
+            ''')
+            
+            # Covers the taste-analytics discovery timeline (user filter + monthly grouping on created_at)
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_new_artists_discovered_user_created
+                ON new_artists_discovered (user_id, created_at)
+            ''')
     
     def create_user_session(self, user_id: str, spotify_token: str, user_country: str = None, user_context: str = None) -> int:
         """Create a new user session and return session ID"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            INSERT INTO user_sessions (user_id, spotify_token, user_country, user_context)
-            VALUES (?, ?, ?, ?)
-        ''', (user_id, spotify_token, user_country, user_context))
-        
-        session_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        with self.pool.connection() as conn:
+            cursor = conn.execute('''
+                INSERT INTO user_sessions (user_id, spotify_token, user_country, user_context)
+                VALUES (?, ?, ?, ?)
+            ''', (user_id, spotify_token, user_country, user_context))
         
-        return session_id
+        return cursor.lastrowid
     
     def store_recommendation_history(self, user_id: str, session_id: int, recommendation_type: str, 
                                    user_context: str, generated_tags: List[str], qloo_artists: List[Dict], 
@@ -140,20 +204,16 @@ class DatabaseService:
         """Store a recommendation in history"""
         try:
             print(f"[DATABASE] Storing recommendation history for user {user_id}, session {session_id}")
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                INSERT INTO recommendation_history 
-                (user_id, session_id, recommendation_type, user_context, generated_tags, qloo_artists, playlist_data, response_time)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            ''', (
-                user_id, session_id, recommendation_type, user_context,
-                json.dumps(generated_tags), json.dumps(qloo_artists), json.dumps(playlist_data), response_time
-            ))
+            with self.pool.connection() as conn:
+                conn.execute('''
+                    INSERT INTO recommendation_history 
+                    (user_id, session_id, recommendation_type, user_context, generated_tags, qloo_artists, playlist_data, response_time)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (
+                    user_id, session_id, recommendation_type, user_context,
+                    _dumps(generated_tags), _dumps(qloo_artists), _dumps(playlist_data), response_time
+                ))
             
-            conn.commit()
-            conn.close()
             print(f"[DATABASE] Successfully stored recommendation history")
             
             # Update analytics based on the recommendation
@@ -162,37 +222,68 @@ class DatabaseService:
         except Exception as e:
             print(f"[DATABASE] Error storing recommendation history: {e}")
             raise
-    
-    def get_user_history(self, user_id: str, limit: int = 20) -> List[Dict]:
-        """Get user's recommendation history"""
+
+    def bulk_store_recommendation_history(self, rows: List[Dict]):
+        """Store a batch of recommendations in history with a single transaction"""
+        if not rows:
+            return
+        try:
+            print(f"[DATABASE] Storing {len(rows)} buffered recommendation history rows")
+            with self.pool.connection() as conn:
+                conn.executemany('''
+                    INSERT INTO recommendation_history
+                    (user_id, session_id, recommendation_type, user_context, generated_tags, qloo_artists, playlist_data, response_time)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', [(
+                    row["user_id"], row["session_id"], row["recommendation_type"], row["user_context"],
+                    _dumps(row["generated_tags"]), _dumps(row["qloo_artists"]),
+                    _dumps(row["playlist_data"]), row["response_time"]
+                ) for row in rows])
+
+            print(f"[DATABASE] Successfully stored {len(rows)} recommendation history rows")
+
+            for row in rows:
+                self._update_analytics_from_recommendation(
+                    row["user_id"], row["generated_tags"], row["qloo_artists"], row["user_context"]
+                )
+
+        except Exception as e:
+            print(f"[DATABASE] Error bulk storing recommendation history: {e}")
+            raise
+
+    def get_user_history(self, user_id: str, limit: int = 20, distinct: bool = False, offset: int = 0) -> List[Dict]:
+        """Get user's recommendation history (distinct=True keeps only the latest row per type/context)"""
         try:
             print(f"[DATABASE] Getting history for user {user_id}, limit {limit}")
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT id, recommendation_type, user_context, generated_tags, qloo_artists, 
-                       playlist_data, response_time, created_at
-                FROM recommendation_history 
-                WHERE user_id = ? 
-                ORDER BY created_at DESC 
-                LIMIT ?
-            ''', (user_id, limit))
+            # Dedupe in SQL so repeated recommendations never leave the database
+            where_clause = '''id IN (
+                        SELECT MAX(id) FROM recommendation_history 
+                        WHERE user_id = ? 
+                        GROUP BY recommendation_type, user_context
+                    )''' if distinct else "user_id = ?"
+            with self.pool.connection() as conn:
+                rows = conn.execute(f'''
+                    SELECT id, recommendation_type, user_context, generated_tags, qloo_artists, 
+                           playlist_data, response_time, created_at
+                    FROM recommendation_history 
+                    WHERE {where_clause} 
+                    ORDER BY created_at DESC, id DESC 
+                    LIMIT ? OFFSET ?
+                ''', (user_id, limit, offset)).fetchall()
             
             results = []
-            for row in cursor.fetchall():
+            for row in rows:
                 results.append({
                     'id': row[0],
                     'recommendation_type': row[1],
                     'user_context': row[2],
-                    'generated_tags': json.loads(row[3]) if row[3] else [],
-                    'qloo_artists': json.loads(row[4]) if row[4] else [],
-                    'playlist_data': json.loads(row[5]) if row[5] else {},
+                    'generated_tags': _loads(row[3]) if row[3] else [],
+                    'qloo_artists': _loads(row[4]) if row[4] else [],
+                    'playlist_data': _loads(row[5]) if row[5] else {},
                     'response_time': row[6],
                     'created_at': row[7]
                 })
             
-            conn.close()
             print(f"[DATABASE] Found {len(results)} history records for user {user_id}")
             return results
         except Exception as e:
@@ -201,18 +292,13 @@ class DatabaseService:
     
     def get_history_item(self, history_id: int) -> Optional[Dict]:
         """Get a specific history item by ID"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT id, user_id, recommendation_type, user_context, generated_tags, 
-                   qloo_artists, playlist_data, response_time, created_at
-            FROM recommendation_history 
-            WHERE id = ?
-        ''', (history_id,))
-        
-        row = cursor.fetchone()
-        conn.close()
+        with self.pool.connection() as conn:
+            row = conn.execute('''
+                SELECT id, user_id, recommendation_type, user_context, generated_tags, 
+                       qloo_artists, playlist_data, response_time, created_at
+                FROM recommendation_history 
+                WHERE id = ?
+            ''', (history_id,)).fetchone()
         
         if row:
             return {
@@ -220,276 +306,247 @@ class DatabaseService:
                 'user_id': row[1],
                 'recommendation_type': row[2],
                 'user_context': row[3],
-                'generated_tags': json.loads(row[4]) if row[4] else [],
-                'qloo_artists': json.loads(row[5]) if row[5] else [],
-                'playlist_data': json.loads(row[6]) if row[6] else {},
+                'generated_tags': _loads(row[4]) if row[4] else [],
+                'qloo_artists': _loads(row[5]) if row[5] else [],
+                'playlist_data': _loads(row[6]) if row[6] else {},
                 'response_time': row[7],
                 'created_at': row[8]
             }
         return None
     
-    def track_new_artists(self, user_id: str, artists: List[Dict]):
-        """Track new artists for a user"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        for artist in artists:
-            artist_name = artist.get('name', '')
-            genre = artist.get('genre', '')
-            popularity = artist.get('popularity', 0.0)
-            
-            if not artist_name:
-                continue
-            
-            # Check if artist already exists
-            cursor.execute('''
-                SELECT id, recommendation_count, is_new_artist 
-                FROM artist_tracking 
-                WHERE user_id = ? AND artist_name = ?
-            ''', (user_id, artist_name))
-            
-            existing = cursor.fetchone()
-            
-            if existing:
-                # Update existing artist
-                cursor.execute('''
-                    UPDATE artist_tracking 
-                    SET last_seen = CURRENT_TIMESTAMP, 
-                        recommendation_count = recommendation_count + 1,
-                        genre = COALESCE(?, genre),
-                        popularity_score = ?
-                    WHERE id = ?
-                ''', (genre, popularity, existing[0]))
-            else:
-                # Insert new artist
-                cursor.execute('''
-                    INSERT INTO artist_tracking 
-                    (user_id, artist_name, genre, popularity_score)
-                    VALUES (?, ?, ?, ?)
-                ''', (user_id, artist_name, genre, popularity))
-                
-                # Also insert into new_artists_discovered table
-                cursor.execute('''
-                    INSERT OR IGNORE INTO new_artists_discovered 
-                    (user_id, artist_name)
-                    VALUES (?, ?)
-                ''', (user_id, artist_name))
-        
-        conn.commit()
-        conn.close()
+    def track_new_artists(self, user_id: str, artists: List[Dict]) -> List[str]:
+        """Track artists for a user; returns the names seen for the first time"""
+        rows = [
+            (user_id, artist.get('name', ''), artist.get('genre', ''), artist.get('popularity', 0.0))
+            for artist in artists if artist.get('name')
+        ]
+        if not rows:
+            return []
+        names = list(dict.fromkeys(row[1] for row in rows))
+        
+        with self.pool.connection() as conn:
+            # Read and both writes share one write transaction (a single commit), and the
+            # write lock taken up front means a concurrent batch can't report the same discovery
+            conn.execute('BEGIN IMMEDIATE')
+            # One lookup for the whole batch finds which artists are already tracked
+            tracked = {row[0] for row in conn.execute(f'''
+                SELECT artist_name FROM artist_tracking
+                WHERE user_id = ? AND artist_name IN ({",".join("?" * len(names))})
+            ''', (user_id, *names))}
+            new_names = [name for name in names if name not in tracked]
+            
+            # Artists not tracked yet are new discoveries; record them before the upsert below
+            conn.executemany('''
+                INSERT OR IGNORE INTO new_artists_discovered (user_id, artist_name)
+                VALUES (?, ?)
+            ''', [(user_id, name) for name in new_names])
+            
+            # Insert new artists or bump existing ones in a single batched upsert
+            conn.executemany('''
+                INSERT INTO artist_tracking 
+                (user_id, artist_name, genre, popularity_score)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(user_id, artist_name) DO UPDATE SET
+                    last_seen = CURRENT_TIMESTAMP,
+                    recommendation_count = recommendation_count + 1,
+                    genre = COALESCE(excluded.genre, genre),
+                    popularity_score = excluded.popularity_score
+            ''', rows)
+        self.new_artists_cache.pop(user_id)
+        self.taste_analytics_cache.delete(user_id)
+        return new_names
     
     def get_new_artists(self, user_id: str, days: int = 7) -> List[Dict]:
         """Get recently discovered new artists for a user within the last N days"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cached = self.new_artists_cache.get(user_id)
+        if cached and days in cached.data:
+            return cached.data[days]
         
         # Calculate the date threshold
-        from datetime import datetime, timedelta
         threshold_date = datetime.now() - timedelta(days=days)
         
-        cursor.execute('''
-            SELECT artist_name, first_seen, last_seen, recommendation_count, 
-                   is_new_artist, genre, popularity_score
-            FROM artist_tracking 
-            WHERE user_id = ? AND is_new_artist = TRUE AND first_seen >= ?
-            ORDER BY first_seen DESC 
-            LIMIT 20
-        ''', (user_id, threshold_date))
+        with self.pool.connection() as conn:
+            rows = conn.execute('''
+                SELECT artist_name, first_seen, last_seen, recommendation_count, 
+                       is_new_artist, genre, popularity_score
+                FROM artist_tracking 
+                WHERE user_id = ? AND is_new_artist = TRUE AND first_seen >= ?
+                ORDER BY first_seen DESC 
+                LIMIT 20
+            ''', (user_id, threshold_date)).fetchall()
         
-        results = []
-        for row in cursor.fetchall():
-            results.append({
-                'artist_name': row[0],
-                'first_seen': row[1],
-                'last_seen': row[2],
-                'recommendation_count': row[3],
-                'is_new_artist': row[4],
-                'genre': row[5],
-                'popularity_score': row[6]
-            })
+        results = [dict(zip(NEW_ARTIST_FIELDS, row)) for row in rows]
         
-        conn.close()
+        by_days = dict(cached.data) if cached else {}
+        by_days[days] = results
+        self.new_artists_cache.set(user_id, by_days)
         return results
     
     def is_new_artist(self, user_id: str, artist_name: str) -> bool:
         """Check if an artist is new to the user"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT is_new_artist FROM artist_tracking 
-            WHERE user_id = ? AND artist_name = ?
-        ''', (user_id, artist_name))
-        
-        result = cursor.fetchone()
-        conn.close()
+        with self.pool.connection() as conn:
+            result = conn.execute('''
+                SELECT is_new_artist FROM artist_tracking 
+                WHERE user_id = ? AND artist_name = ?
+            ''', (user_id, artist_name)).fetchone()
         
         return result is None or result[0]
     
     def store_cached_recommendation(self, cache_key: str, user_context: str, user_country: str, 
                                   user_artists: List[str], recommendation_data: Dict, 
-                                  expires_in_hours: int = 24):
-        """Store a cached recommendation"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        expires_at = datetime.now() + timedelta(hours=expires_in_hours)
-        
-        cursor.execute('''
-            INSERT OR REPLACE INTO cached_recommendations 
-            (cache_key, user_context, user_country, user_artists, recommendation_data, expires_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (
-            cache_key, user_context, user_country, 
-            json.dumps(user_artists), json.dumps(recommendation_data), expires_at
-        ))
-        
-        conn.commit()
-        conn.close()
+                                  expires_in_hours: int = 24, expires_in_seconds: Optional[int] = None,
+                                  user_id: Optional[str] = None):
+        """Store a cached recommendation (expires_in_seconds overrides expires_in_hours)"""
+        if expires_in_seconds is None:
+            expires_in_seconds = expires_in_hours * 3600
+        
+        with self.pool.connection() as conn:
+            # Expiry is computed by SQLite in UTC, the same clock CURRENT_TIMESTAMP reads on lookup
+            conn.execute('''
+                INSERT OR REPLACE INTO cached_recommendations 
+                (cache_key, user_id, user_context, user_country, user_artists, recommendation_data, expires_at)
+                VALUES (?, ?, ?, ?, ?, ?, datetime('now', ?))
+            ''', (
+                cache_key, user_id, user_context, user_country, 
+                _dumps(user_artists), _dumps(recommendation_data), f"+{int(expires_in_seconds)} seconds"
+            ))
     
     def get_cached_recommendation(self, cache_key: str) -> Optional[Dict]:
         """Get a cached recommendation if it exists and is not expired"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            SELECT user_context, user_country, user_artists, recommendation_data, hit_count
-            FROM cached_recommendations 
-            WHERE cache_key = ? AND expires_at > CURRENT_TIMESTAMP
-        ''', (cache_key,))
-        
-        result = cursor.fetchone()
+        with self.pool.connection() as conn:
+            result = conn.execute('''
+                SELECT user_context, user_country, user_artists, recommendation_data, hit_count
+                FROM cached_recommendations 
+                WHERE cache_key = ? AND expires_at > CURRENT_TIMESTAMP
+            ''', (cache_key,)).fetchone()
+            
+            if result:
+                # Update hit count
+                conn.execute('''
+                    UPDATE cached_recommendations 
+                    SET hit_count = hit_count + 1 
+                    WHERE cache_key = ?
+                ''', (cache_key,))
         
         if result:
-            # Update hit count
-            cursor.execute('''
-                UPDATE cached_recommendations 
-                SET hit_count = hit_count + 1 
-                WHERE cache_key = ?
-            ''', (cache_key,))
-            
-            conn.commit()
-            conn.close()
-            
             return {
                 'user_context': result[0],
                 'user_country': result[1],
-                'user_artists': json.loads(result[2]) if result[2] else [],
-                'recommendation_data': json.loads(result[3]) if result[3] else {},
+                'user_artists': _loads(result[2]) if result[2] else [],
+                'recommendation_data': _loads(result[3]) if result[3] else {},
                 'hit_count': result[4]
             }
         
-        conn.close()
         return None
     
     def clear_user_cache(self, user_id: str):
         """Clear cached recommendations for a user"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-            DELETE FROM cached_recommendations 
-            WHERE cache_key LIKE ?
-        ''', (f'%{user_id}%',))
-        
-        conn.commit()
-        conn.close()
+        with self.pool.connection() as conn:
+            conn.execute('DELETE FROM cached_recommendations WHERE user_id = ?', (user_id,))
+        self.new_artists_cache.pop(user_id)
+        self.taste_analytics_cache.delete(user_id)
+    
+    def clear_all_cache(self):
+        """Clear every cached recommendation"""
+        # No WHERE clause, so SQLite drops the table's pages wholesale instead of deleting row by row
+        with self.pool.connection() as conn:
+            conn.execute('DELETE FROM cached_recommendations')
+        self.new_artists_cache.clear()
+        self.taste_analytics_cache.clear()
+    
+    def _upsert_taste_rows(self, conn, rows: List[tuple]):
+        """Add (user_id, genre, artist_count, track_count, playtime) rows onto existing genre totals"""
+        conn.executemany('''
+            INSERT INTO user_taste_analytics 
+            (user_id, genre, artist_count, track_count, total_playtime, last_updated)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(user_id, genre) DO UPDATE SET
+                artist_count = artist_count + excluded.artist_count,
+                track_count = track_count + excluded.track_count,
+                total_playtime = total_playtime + excluded.total_playtime,
+                last_updated = CURRENT_TIMESTAMP
+        ''', rows)
     
     def update_user_taste_analytics(self, user_id: str, genre: str, artist_count: int = 1, 
                                   track_count: int = 0, playtime: float = 0.0):
         """Update user taste analytics for a genre"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Check if genre already exists for this user
-        cursor.execute('''
-            SELECT artist_count, track_count, total_playtime
-            FROM user_taste_analytics 
-            WHERE user_id = ? AND genre = ?
-        ''', (user_id, genre))
-        
-        existing = cursor.fetchone()
-        
-        if existing:
-            # Update existing record by adding new values
-            new_artist_count = existing[0] + artist_count
-            new_track_count = existing[1] + track_count
-            new_playtime = existing[2] + playtime
-            
-            cursor.execute('''
-                UPDATE user_taste_analytics 
-                SET artist_count = ?, track_count = ?, total_playtime = ?, last_updated = CURRENT_TIMESTAMP
-                WHERE user_id = ? AND genre = ?
-            ''', (new_artist_count, new_track_count, new_playtime, user_id, genre))
-        else:
-            # Insert new record
-            cursor.execute('''
-                INSERT INTO user_taste_analytics 
-                (user_id, genre, artist_count, track_count, total_playtime, last_updated)
-                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            ''', (user_id, genre, artist_count, track_count, playtime))
-        
-        conn.commit()
-        conn.close()
+        with self.pool.connection() as conn:
+            self._upsert_taste_rows(conn, [(user_id, genre, artist_count, track_count, playtime)])
+        self.taste_analytics_cache.delete(user_id)
+    
+    def bulk_update_user_taste_analytics(self, user_id: str, genre_counts: List[tuple], tracks_per_artist: int = 0):
+        """Add (genre, artist_count) pairs to a user's taste analytics in one batched upsert"""
+        if not genre_counts:
+            return
+        
+        with self.pool.connection() as conn:
+            self._upsert_taste_rows(conn, [
+                (user_id, genre, count, count * tracks_per_artist, 0.0) for genre, count in genre_counts
+            ])
+        self.taste_analytics_cache.delete(user_id)
     
     def get_user_taste_analytics(self, user_id: str) -> Dict:
         """Get user taste analytics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Get genre analytics
-        cursor.execute('''
-            SELECT genre, artist_count, track_count, total_playtime, last_updated
-            FROM user_taste_analytics 
-            WHERE user_id = ?
-            ORDER BY artist_count DESC
-        ''', (user_id,))
+        cached = self.taste_analytics_cache.get(user_id)
+        if cached is not None:
+            return cached
         
-        genres = []
-        for row in cursor.fetchall():
-            genres.append({
-                'genre': row[0],
-                'artist_count': row[1],
-                'track_count': row[2],
-                'total_playtime': row[3],
-                'last_updated': row[4]
-            })
-        
-        # Get mood preferences
-        cursor.execute('''
-            SELECT mood, preference_score, context_count, last_updated
-            FROM user_mood_preferences 
-            WHERE user_id = ?
-            ORDER BY preference_score DESC
-        ''', (user_id,))
-        
-        moods = []
-        for row in cursor.fetchall():
-            moods.append({
-                'mood': row[0],
-                'preference_score': row[1],
-                'context_count': row[2],
-                'last_updated': row[3]
-            })
-        
-        # Get timeline data (new artists over time)
-        cursor.execute('''
-            SELECT strftime('%Y-%m', created_at) as month, COUNT(*) as new_artists
-            FROM new_artists_discovered 
-            WHERE user_id = ?
-            GROUP BY strftime('%Y-%m', created_at)
-            ORDER BY month DESC
-            LIMIT 12
-        ''', (user_id,))
-        
-        timeline = []
-        for row in cursor.fetchall():
-            timeline.append({
-                'month': row[0],
-                'new_artists': row[1]
-            })
-        
-        conn.close()
+        # All three reads share one pooled connection instead of opening a fresh one
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            cursor.arraysize = 100
+            
+            # Get genre analytics
+            cursor.execute('''
+                SELECT genre, artist_count, track_count, total_playtime, last_updated
+                FROM user_taste_analytics 
+                WHERE user_id = ?
+                ORDER BY artist_count DESC
+            ''', (user_id,))
+            
+            genres = []
+            for row in cursor.fetchall():
+                genres.append({
+                    'genre': row[0],
+                    'artist_count': row[1],
+                    'track_count': row[2],
+                    'total_playtime': row[3],
+                    'last_updated': row[4]
+                })
+            
+            # Get mood preferences
+            cursor.execute('''
+                SELECT mood, preference_score, context_count, last_updated
+                FROM user_mood_preferences 
+                WHERE user_id = ?
+                ORDER BY preference_score DESC
+            ''', (user_id,))
+            
+            moods = []
+            for row in cursor.fetchall():
+                moods.append({
+                    'mood': row[0],
+                    'preference_score': row[1],
+                    'context_count': row[2],
+                    'last_updated': row[3]
+                })
+            
+            # Get timeline data (new artists over time)
+            cursor.execute('''
+                SELECT strftime('%Y-%m', created_at) as month, COUNT(*) as new_artists
+                FROM new_artists_discovered 
+                WHERE user_id = ?
+                GROUP BY strftime('%Y-%m', created_at)
+                ORDER BY month DESC
+                LIMIT 12
+            ''', (user_id,))
+            
+            timeline = []
+            for row in cursor.fetchall():
+                timeline.append({
+                    'month': row[0],
+                    'new_artists': row[1]
+                })
         
         # If no data exists, provide sample data for demonstration
         if not genres and not moods and not timeline:
@@ -531,11 +588,13 @@ class DatabaseService:
                 'timeline': sample_timeline
             }
         
-        return {
+        analytics = {
             'genres': genres,
             'moods': moods,
             'timeline': timeline
         }
+        self.taste_analytics_cache.set(user_id, analytics)
+        return analytics
     
     def populate_sample_analytics(self, user_id: str):
         """Populate sample analytics data for demonstration"""
@@ -553,9 +612,6 @@ class DatabaseService:
                 ('classical', 3, 8, 45.1)
             ]
             
-            for genre, artists, tracks, playtime in sample_genres:
-                self.update_user_taste_analytics(user_id, genre, artists, tracks, playtime)
-            
             # Sample moods
             sample_moods = [
                 ('energetic', 8.5, 12),
@@ -565,36 +621,34 @@ class DatabaseService:
                 ('romantic', 3.8, 3)
             ]
             
-            for mood, score, count in sample_moods:
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                cursor.execute('''
-                    INSERT OR REPLACE INTO user_mood_preferences 
-                    (user_id, mood, preference_score, context_count, last_updated)
-                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-                ''', (user_id, mood, score, count))
-                conn.commit()
-                conn.close()
-            
             # Sample timeline data
             import random
-            from datetime import datetime, timedelta
             
-            for i in range(6):
-                date = datetime.now() - timedelta(days=30*i)
-                month = date.strftime('%Y-%m')
-                artist_count = random.randint(3, 12)
-                
-                for j in range(artist_count):
-                    conn = sqlite3.connect(self.db_path)
-                    cursor = conn.cursor()
-                    cursor.execute('''
-                        INSERT OR IGNORE INTO new_artists_discovered 
-                        (user_id, artist_name, created_at)
-                        VALUES (?, ?, ?)
-                    ''', (user_id, f"Sample Artist {j+1}", date))
-                    conn.commit()
-                    conn.close()
+            # Names are unique per month: (user_id, artist_name) is UNIQUE, so reusing
+            # "Sample Artist 1.." every month left all but the newest month's rows ignored
+            now = datetime.now()
+            sample_discoveries = [
+                (user_id, f"Sample Artist {i+1}-{j+1}", now - timedelta(days=30*i))
+                for i in range(6) for j in range(random.randint(3, 12))
+            ]
+            
+            # One connection and one batched statement per table instead of a connection per row
+            with self.pool.connection() as conn:
+                self._upsert_taste_rows(conn, [
+                    (user_id, genre, artists, tracks, playtime) for genre, artists, tracks, playtime in sample_genres
+                ])
+                conn.executemany('''
+                    INSERT OR REPLACE INTO user_mood_preferences 
+                    (user_id, mood, preference_score, context_count, last_updated)
+                    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+                ''', [(user_id, mood, score, count) for mood, score, count in sample_moods])
+                conn.executemany('''
+                    INSERT OR IGNORE INTO new_artists_discovered 
+                    (user_id, artist_name, created_at)
+                    VALUES (?, ?, ?)
+                ''', sample_discoveries)
+            self.new_artists_cache.pop(user_id)
+            self.taste_analytics_cache.delete(user_id)
             
             print(f"[DATABASE] Successfully populated sample analytics for user {user_id}")
             
@@ -607,15 +661,13 @@ class DatabaseService:
         """Clear all analytics data for a user"""
         try:
             print(f"[DATABASE] Clearing analytics for user {user_id}")
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute('DELETE FROM user_taste_analytics WHERE user_id = ?', (user_id,))
-            cursor.execute('DELETE FROM user_mood_preferences WHERE user_id = ?', (user_id,))
-            cursor.execute('DELETE FROM new_artists_discovered WHERE user_id = ?', (user_id,))
+            with self.pool.connection() as conn:
+                conn.execute('DELETE FROM user_taste_analytics WHERE user_id = ?', (user_id,))
+                conn.execute('DELETE FROM user_mood_preferences WHERE user_id = ?', (user_id,))
+                conn.execute('DELETE FROM new_artists_discovered WHERE user_id = ?', (user_id,))
             
-            conn.commit()
-            conn.close()
+            self.new_artists_cache.pop(user_id)
+            self.taste_analytics_cache.delete(user_id)
             print(f"[DATABASE] Successfully cleared analytics for user {user_id}")
             
         except Exception as e:
@@ -635,14 +687,6 @@ class DatabaseService:
                     if genre:
                         genre_counts[genre] = genre_counts.get(genre, 0) + 1
             
-            # Update genre analytics with proper counts
-            for genre, count in genre_counts.items():
-                if genre:
-                    # Estimate track count based on artist count (assuming 3-5 tracks per artist)
-                    estimated_tracks = count * 4
-                    self.update_user_taste_analytics(user_id, genre, count, estimated_tracks, 0.0)
-                    print(f"[DATABASE] Updated genre {genre}: {count} artists, {estimated_tracks} tracks")
-            
             # Extract moods from tags and context with better matching
             mood_keywords = {
                 'happy': ['happy', 'joy', 'upbeat', 'cheerful', 'positive', 'fun', 'exciting'],
@@ -664,50 +708,38 @@ class DatabaseService:
                         matched_moods.add(mood)
                         break
             
-            # Update mood preferences
-            for mood in matched_moods:
-                self.update_mood_preferences(user_id, mood, 1.0)
-                print(f"[DATABASE] Updated mood {mood}")
+            # Genre counts and matched moods land as two batched upserts in one transaction
+            # Estimate track count based on artist count (assuming 3-5 tracks per artist)
+            with self.pool.connection() as conn:
+                self._upsert_taste_rows(conn, [
+                    (user_id, genre, count, count * 4, 0.0) for genre, count in genre_counts.items()
+                ])
+                self._upsert_mood_rows(conn, [(user_id, mood, 1.0) for mood in matched_moods])
+            self.taste_analytics_cache.delete(user_id)
+            print(f"[DATABASE] Updated {len(genre_counts)} genres and moods {sorted(matched_moods)}")
                         
         except Exception as e:
             print(f"[DATABASE] Error updating analytics from recommendation: {e}")
             import traceback
             traceback.print_exc()
     
+    def _upsert_mood_rows(self, conn, rows: List[tuple]):
+        """Add (user_id, mood, preference_score) rows onto existing mood totals, one context each"""
+        conn.executemany('''
+            INSERT INTO user_mood_preferences 
+            (user_id, mood, preference_score, context_count, last_updated)
+            VALUES (?, ?, ?, 1, CURRENT_TIMESTAMP)
+            ON CONFLICT(user_id, mood) DO UPDATE SET
+                preference_score = preference_score + excluded.preference_score,
+                context_count = context_count + 1,
+                last_updated = CURRENT_TIMESTAMP
+        ''', rows)
+    
     def update_mood_preferences(self, user_id: str, mood: str, preference_score: float = 1.0):
         """Update user mood preferences"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Check if mood already exists for this user
-        cursor.execute('''
-            SELECT preference_score, context_count
-            FROM user_mood_preferences 
-            WHERE user_id = ? AND mood = ?
-        ''', (user_id, mood))
-        
-        existing = cursor.fetchone()
-        
-        if existing:
-            # Update existing record by accumulating values
-            new_preference_score = existing[0] + preference_score
-            new_context_count = existing[1] + 1
-            
-            cursor.execute('''
-                UPDATE user_mood_preferences 
-                SET preference_score = ?, context_count = ?, last_updated = CURRENT_TIMESTAMP
-                WHERE user_id = ? AND mood = ?
-            ''', (new_preference_score, new_context_count, user_id, mood))
-        else:
-            # Insert new record
-            cursor.execute('''
-                INSERT INTO user_mood_preferences 
-                (user_id, mood, preference_score, context_count, last_updated)
-                VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
-            ''', (user_id, mood, preference_score, 1))
-        
-        conn.commit()
-        conn.close()
+        with self.pool.connection() as conn:
+            self._upsert_mood_rows(conn, [(user_id, mood, preference_score)])
+        self.taste_analytics_cache.delete(user_id)
     
 
     
@@ -715,29 +747,17 @@ class DatabaseService:
         """Delete a specific history item for a user"""
         try:
             print(f"[DATABASE] Deleting history item {history_id} for user {user_id}")
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # First check if the history item exists and belongs to the user
-            cursor.execute('''
-                SELECT id FROM recommendation_history 
-                WHERE id = ? AND user_id = ?
-            ''', (history_id, user_id))
-            
-            if not cursor.fetchone():
+            with self.pool.connection() as conn:
+                # The user_id filter ensures only the owner's item is deleted
+                deleted_count = conn.execute('''
+                    DELETE FROM recommendation_history 
+                    WHERE id = ? AND user_id = ?
+                ''', (history_id, user_id)).rowcount
+            
+            if not deleted_count:
                 print(f"[DATABASE] History item {history_id} not found or doesn't belong to user {user_id}")
-                conn.close()
                 return False
             
-            # Delete the history item
-            cursor.execute('''
-                DELETE FROM recommendation_history 
-                WHERE id = ? AND user_id = ?
-            ''', (history_id, user_id))
-            
-            conn.commit()
-            conn.close()
-            
             print(f"[DATABASE] Successfully deleted history item {history_id}")
             return True
             
@@ -749,22 +769,22 @@ class DatabaseService:
         """Clear all history for a user"""
         try:
             print(f"[DATABASE] Clearing all history for user {user_id}")
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Delete all history items for the user
-            cursor.execute('''
-                DELETE FROM recommendation_history 
-                WHERE user_id = ?
-            ''', (user_id,))
-            
-            deleted_count = cursor.rowcount
-            conn.commit()
-            conn.close()
+            with self.pool.connection() as conn:
+                # Delete all history items for the user
+                deleted_count = conn.execute('''
+                    DELETE FROM recommendation_history 
+                    WHERE user_id = ?
+                ''', (user_id,)).rowcount
             
             print(f"[DATABASE] Successfully cleared {deleted_count} history items for user {user_id}")
             return True
             
         except Exception as e:
             print(f"[DATABASE] Error clearing user history: {e}")
-            return False 
\ No newline at end of file
+            return False 
+
+
+@functools.cache
+def get_database_service() -> DatabaseService:
+    """Process-wide DatabaseService (one schema check and one connection pool shared by app and blueprints)"""
+    return DatabaseService()
@@ -1,14 +1,16 @@
-import requests
 import time
 import random
 from typing import Dict, List, Optional
 import os
+from utils.http import get_shared_session
 
 class DeezerService:
     """Deezer API service for global music discovery and variety"""
     
     def __init__(self):
         self.base_url = "https://api.deezer.com"
+        # Shared keep-alive connection pool for all API calls
+        self.session = get_shared_session()
         self.headers = {"Accept": "application/json"}
         
         # Global music genres for variety
@@ -46,7 +48,7 @@ class DeezerService:
                 "limit": limit
             }
             
-            response = requests.get(f"{self.base_url}/search", params=params, headers=self.headers, timeout=10)
+            response = self.session.get(f"{self.base_url}/search", params=params, headers=self.headers, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -79,7 +81,7 @@ class DeezerService:
     def get_artists_by_genre(self, genre_id: int, limit: int = 15) -> List[Dict]:
         """Get artists by genre ID"""
         try:
-            response = requests.get(f"{self.base_url}/genre/{genre_id}/artists", headers=self.headers, timeout=10)
+            response = self.session.get(f"{self.base_url}/genre/{genre_id}/artists", headers=self.headers, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -167,7 +169,7 @@ class DeezerService:
     def get_artist_details(self, artist_id: int) -> Optional[Dict]:
         """Get detailed artist information"""
         try:
-            response = requests.get(f"{self.base_url}/artist/{artist_id}", headers=self.headers, timeout=10)
+            response = self.session.get(f"{self.base_url}/artist/{artist_id}", headers=self.headers, timeout=10)
             
             if response.status_code == 200:
                 artist = response.json()
@@ -199,7 +201,7 @@ class DeezerService:
     def get_artist_top_tracks(self, artist_id: int, limit: int = 10) -> List[Dict]:
         """Get top tracks by artist"""
         try:
-            response = requests.get(f"{self.base_url}/artist/{artist_id}/top", headers=self.headers, timeout=10)
+            response = self.session.get(f"{self.base_url}/artist/{artist_id}/top", headers=self.headers, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -238,7 +240,7 @@ class DeezerService:
     def get_chart_top_artists(self, limit: int = 20) -> List[Dict]:
         """Get chart top artists globally"""
         try:
-            response = requests.get(f"{self.base_url}/chart/0/artists", headers=self.headers, timeout=10)
+            response = self.session.get(f"{self.base_url}/chart/0/artists", headers=self.headers, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -272,7 +274,7 @@ class DeezerService:
     def get_playlist_tracks(self, playlist_id: int, limit: int = 20) -> List[Dict]:
         """Get tracks from a playlist"""
         try:
-            response = requests.get(f"{self.base_url}/playlist/{playlist_id}", headers=self.headers, timeout=10)
+            response = self.session.get(f"{self.base_url}/playlist/{playlist_id}", headers=self.headers, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -317,7 +319,7 @@ class DeezerService:
                 "limit": limit
             }
             
-            response = requests.get(f"{self.base_url}/search", params=params, headers=self.headers, timeout=10)
+            response = self.session.get(f"{self.base_url}/search", params=params, headers=self.headers, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -1,8 +1,15 @@
-import requests
+import functools
 import json
 import time
 from typing import Dict, List, Optional
 import os
+from utils.http import get_shared_session
+from utils.shared_cache import SharedCache, make_cache_key
+
+# Context/tag/cultural answers depend only on low-cardinality inputs that repeat within a session
+GEMINI_RESPONSE_CACHE_TTL = 300  # 5 minutes in seconds
+# Generated tag lists change little for the same inputs, so they are kept longer
+GEMINI_TAGS_CACHE_TTL = 3600  # 1 hour in seconds
 
 class GeminiService:
     """Enhanced Gemini API service with model selection for different tasks"""
@@ -24,9 +31,30 @@ class GeminiService:
             "gemini-2.5-pro": "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.5-pro:generateContent"
         }
         self.base_url = self.base_urls["gemini-2.0-flash-exp"]
+        # Shared keep-alive connection pool for all API calls
+        self.session = get_shared_session()
+        # LLM-generated cross-domain tags (home page inputs repeat per country)
+        self.cross_domain_tags_cache = SharedCache("gemini:cross_domain_tags", GEMINI_TAGS_CACHE_TTL)
+        # Qloo-optimized tags; the prompt depends only on context, country and artists
+        self.optimized_tags_cache = SharedCache("gemini:optimized_tags", GEMINI_TAGS_CACHE_TTL)
+        # Shared across workers through Redis when REDIS_URL is set
+        self.context_analysis_cache = SharedCache("gemini:context", GEMINI_RESPONSE_CACHE_TTL)
+        self.context_tags_cache = SharedCache("gemini:tags", GEMINI_RESPONSE_CACHE_TTL)
+        self.cultural_context_cache = SharedCache("gemini:cultural", GEMINI_RESPONSE_CACHE_TTL)
+
+    def clear_caches(self):
+        """Drop every cached Gemini answer so the next requests regenerate tags and context"""
+        for cache in (self.cross_domain_tags_cache, self.optimized_tags_cache, self.context_analysis_cache,
+                      self.context_tags_cache, self.cultural_context_cache):
+            cache.clear()
 
     def analyze_context_fast(self, user_context: str) -> Dict:
         """Fast context analysis - single Gemini call with focused prompt"""
+        cache_key = make_cache_key(user_context)
+        cached = self.context_analysis_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         prompt = f"""
         Analyze this user context and return ONLY a JSON object with these exact fields:
         - primary_mood: string (happy, sad, melancholic, depressed, blue, energetic, calm, romantic, angry, anxious, nostalgic, etc.)
@@ -59,12 +87,15 @@ class GeminiService:
                     if json_start != -1 and json_end != 0:
                         json_str = response[json_start:json_end]
                         result = json.loads(json_str)
+                        self.context_analysis_cache.set(cache_key, result)
                         return result
                 except json.JSONDecodeError:
                     pass
                 
                 # Fallback parsing
-                return self._parse_context_fallback(response)
+                result = self._parse_context_fallback(response)
+                self.context_analysis_cache.set(cache_key, result)
+                return result
             
         except Exception as e:
             print(f"Context analysis error: {e}")
@@ -83,6 +114,11 @@ class GeminiService:
     
     def generate_qloo_optimized_tags(self, context: str, user_country: str = None, user_artists: List[str] = None) -> List[str]:
         """Generate tags specifically optimized for Qloo API with cultural intelligence"""
+        cache_key = make_cache_key(context, user_country, list(user_artists or ()))
+        cached = self.optimized_tags_cache.get(cache_key)
+        if cached is not None:
+            print(f"[TAG DEBUG] Cache hit for optimized tags ({user_country})")
+            return cached
         
         # Qloo-proven tag categories that work across all domains
         qloo_proven_tags = {
@@ -161,6 +197,7 @@ class GeminiService:
                             # Validate tags against Qloo-proven list
                             validated_tags = self._validate_tags_for_qloo(result, qloo_proven_tags)
                             print(f"[TAG DEBUG] Generated tags: {result}, Validated tags: {validated_tags}")
+                            self.optimized_tags_cache.set(cache_key, validated_tags)
                             return validated_tags
                 except json.JSONDecodeError:
                     pass
@@ -214,6 +251,11 @@ class GeminiService:
     
     def generate_cultural_context(self, user_country: str, location: str = None, user_artists: List[str] = None) -> Dict:
         """Generate cultural context for recommendations using Gemini AI"""
+        cache_key = make_cache_key(user_country, location, sorted(str(artist) for artist in user_artists or ()))
+        cached = self.cultural_context_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             # Debug: Print country detection in cultural context
             print(f"[CULTURAL DEBUG] Generating cultural context for country: {user_country}")
@@ -278,6 +320,7 @@ class GeminiService:
                         
                         # Debug: Print final cultural context
                         print(f"[CULTURAL DEBUG] Gemini-generated cultural context: {cultural_context}")
+                        self.cultural_context_cache.set(cache_key, cultural_context)
                         
                         return cultural_context
                         
@@ -338,10 +381,11 @@ class GeminiService:
         ]
         
         validated_tags = []
+        proven_lower = {t.lower() for t in qloo_proven_artist_tags}
         for tag in tags:
             tag_lower = tag.lower()
             # Check if tag is in proven list
-            if tag_lower in [t.lower() for t in qloo_proven_artist_tags]:
+            if tag_lower in proven_lower:
                 validated_tags.append(tag)
             else:
                 # Try to find closest match
@@ -605,11 +649,13 @@ class GeminiService:
                 }
             }
     
-    def generate_enhanced_tags(self, user_context: str, user_country: str, location: str = None, user_artists: List[str] = None) -> List[str]:
-        """Generate enhanced tags using Gemini with cultural context"""
+    def generate_enhanced_tags(self, user_context: str, user_country: str, location: str = None, user_artists: List[str] = None,
+                               cultural_context: Dict = None) -> List[str]:
+        """Generate enhanced tags using Gemini with cultural context (pass cultural_context if the caller already has it)"""
         try:
             # Create enhanced prompt with cultural context
-            cultural_context = self.generate_cultural_context(user_country, location, user_artists)
+            if cultural_context is None:
+                cultural_context = self.generate_cultural_context(user_country, location, user_artists)
             
             prompt = f"""
             Based on this user context: "{user_context}"
@@ -638,9 +684,23 @@ class GeminiService:
         # Fallback to simple tags
         return self.generate_optimized_tags(user_context, user_country, user_artists)
     
-    def generate_music_based_cross_domain_tags(self, user_tags: List[str], artists: List[str], user_context: str, user_country: str, domain: str) -> List[str]:
+    def generate_music_based_cross_domain_tags(self, user_tags: List[str], artists: List[str], user_context: str, user_country: str, domain: str,
+                                               timeout: float = 10) -> List[str]:
         """Generate cross-domain tags based on music recommendation data"""
         try:
+            # Order/case-insensitive key so equivalent inputs share a cache entry
+            cache_key = make_cache_key(
+                sorted({tag.lower().strip() for tag in (user_tags or [])}),
+                sorted({artist.lower().strip() for artist in (artists or [])}),
+                (user_context or "").lower().strip(),
+                user_country,
+                domain
+            )
+            cached = self.cross_domain_tags_cache.get(cache_key)
+            if cached is not None:
+                print(f"[CROSS-DOMAIN TAGS] Cache hit for {domain} ({user_country})")
+                return cached
+            
             # Debug: Print country detection
             print(f"[COUNTRY DEBUG] Cross-domain tags - User Country: {user_country}, Domain: {domain}")
             
@@ -670,11 +730,13 @@ class GeminiService:
             Examples for {domain}: action, drama, comedy, thriller, romance, documentary, etc.
             """
             
-            response = self._call_gemini(prompt)
+            response = self._call_gemini(prompt, timeout=timeout)
             if response:
                 # Parse tags from response
-                tags = [tag.strip() for tag in response.split(",") if tag.strip()]
-                return tags[:10]  # Limit to 10 tags
+                tags = [tag.strip() for tag in response.split(",") if tag.strip()][:10]  # Limit to 10 tags
+                if tags:
+                    self.cross_domain_tags_cache.set(cache_key, tags)
+                return tags
             
         except Exception as e:
             print(f"Error generating music-based cross-domain tags: {e}")
@@ -683,7 +745,7 @@ class GeminiService:
         import random
         
         # Add some variety based on the domain and context
-        context_lower = user_context.lower()
+        context_lower = str(user_context or "").lower()
         
         # Create domain-specific fallback tags with randomization
         fallback_tags = []
@@ -900,7 +962,7 @@ class GeminiService:
     
 
 
-    def _call_gemini(self, prompt: str) -> Optional[str]:
+    def _call_gemini(self, prompt: str, timeout: float = 10) -> Optional[str]:
         """Call Gemini API with error handling"""
         try:
             headers = {
@@ -919,12 +981,12 @@ class GeminiService:
                 }
             }
             
-            response = requests.post(
+            response = self.session.post(
                 self.base_url,
                 headers=headers,
                 json=data,
                 params={"key": self.api_key},
-                timeout=10
+                timeout=timeout
             )
             
             if response.status_code == 200:
@@ -963,7 +1025,7 @@ class GeminiService:
                 }
             }
             
-            response = requests.post(
+            response = self.session.post(
                 base_url,
                 headers=headers,
                 json=data,
@@ -1069,11 +1131,12 @@ class GeminiService:
         for category, tag_list in qloo_proven_tags.items():
             all_proven_tags.extend(tag_list)
         
+        proven_lower = {t.lower() for t in all_proven_tags}
         for tag in tags:
             tag_lower = tag.lower()
             
             # Check if tag is already in proven list
-            if tag_lower in [t.lower() for t in all_proven_tags]:
+            if tag_lower in proven_lower:
                 validated_tags.append(tag)
                 continue
             
@@ -1272,6 +1335,11 @@ class GeminiService:
 
     def generate_context_aware_tags(self, user_context: str, user_country: str = None, user_artists: List[str] = None) -> List[str]:
         """Generate context-aware tags using dynamic AI analysis"""
+        # The prompt only uses context and country, so artists are not part of the key
+        cache_key = make_cache_key(user_context, user_country)
+        cached = self.context_tags_cache.get(cache_key)
+        if cached is not None:
+            return cached
         
         # Use Gemini to dynamically analyze context and generate tags
         prompt = f"""
@@ -1312,13 +1380,16 @@ class GeminiService:
                         # Validate tags are strings
                         if isinstance(tags, list) and all(isinstance(tag, str) for tag in tags):
                             print(f"[AI TAGS] Dynamically generated {len(tags)} tags: {tags}")
+                            self.context_tags_cache.set(cache_key, tags)
                             return tags
                         
                 except json.JSONDecodeError:
                     pass
                 
                 # Fallback parsing
-                return self._parse_tags_fallback(response)
+                tags = self._parse_tags_fallback(response)
+                self.context_tags_cache.set(cache_key, tags)
+                return tags
             
         except Exception as e:
             print(f"Dynamic tag generation error: {e}")
@@ -1464,10 +1535,12 @@ class GeminiService:
                                 ranked_tracks.append(track_name_to_track[track_name_lower])
                         
                         # Add any remaining tracks that weren't ranked
+                        ranked_names = {t.get('name', '').lower() for t in ranked_tracks}
                         for track in all_tracks:
                             track_name_lower = track.get('name', '').lower()
-                            if track_name_lower not in [t.get('name', '').lower() for t in ranked_tracks]:
+                            if track_name_lower not in ranked_names:
                                 ranked_tracks.append(track)
+                                ranked_names.add(track_name_lower)
                         
                         print(f"[GEMINI FILTER] Ranked {len(ranked_tracks)} tracks using AI")
                         return ranked_tracks[:30]  # Return top 30 tracks
@@ -1500,4 +1573,10 @@ class GeminiService:
                 # For other countries, include all tracks
                 filtered_tracks.append(track)
         
-        return filtered_tracks[:30]  # Return top 30 tracks
\ No newline at end of file
+        return filtered_tracks[:30]  # Return top 30 tracks
+
+
+@functools.cache
+def get_gemini_service() -> GeminiService:
+    """Process-wide GeminiService (one set of response caches shared by app and blueprints)"""
+    return GeminiService()
@@ -1,8 +1,8 @@
-import requests
 import time
 import random
 from typing import Dict, List, Optional
 import os
+from utils.http import get_shared_session
 
 class LastFMService:
     """Last.fm API service for global music discovery and variety"""
@@ -10,6 +10,8 @@ class LastFMService:
     def __init__(self):
         self.api_key = os.getenv('LASTFM_API_KEY')
         self.base_url = "https://ws.audioscrobbler.com/2.0/"
+        # Shared keep-alive connection pool for all API calls
+        self.session = get_shared_session()
         
         # Global music tags for variety
         self.global_tags = {
@@ -48,7 +50,7 @@ class LastFMService:
                 "limit": limit
             }
             
-            response = requests.get(self.base_url, params=params, timeout=10)
+            response = self.session.get(self.base_url, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -85,7 +87,7 @@ class LastFMService:
                 "limit": limit
             }
             
-            response = requests.get(self.base_url, params=params, timeout=10)
+            response = self.session.get(self.base_url, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -177,7 +179,7 @@ class LastFMService:
                 "limit": limit
             }
             
-            response = requests.get(self.base_url, params=params, timeout=10)
+            response = self.session.get(self.base_url, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -215,7 +217,7 @@ class LastFMService:
                 "limit": limit
             }
             
-            response = requests.get(self.base_url, params=params, timeout=10)
+            response = self.session.get(self.base_url, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -251,7 +253,7 @@ class LastFMService:
                 "limit": limit
             }
             
-            response = requests.get(self.base_url, params=params, timeout=10)
+            response = self.session.get(self.base_url, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -290,7 +292,7 @@ class LastFMService:
                 "limit": limit
             }
             
-            response = requests.get(self.base_url, params=params, timeout=10)
+            response = self.session.get(self.base_url, params=params, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -1,7 +1,8 @@
 import time
 import random
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 import os
+from concurrent.futures import ThreadPoolExecutor
 
 class MusicAggregatorService:
     """Aggregates music from multiple providers for maximum variety and global discovery"""
@@ -11,6 +12,16 @@ class MusicAggregatorService:
         self.providers = {}
         self._initialize_providers()
         
+        # Providers are queried in parallel; a few workers per provider so concurrent requests don't queue
+        self._executor = ThreadPoolExecutor(max_workers=max(1, len(self.providers)) * 4, thread_name_prefix="aggregator")
+        self.provider_timeout = 15  # seconds to wait on all providers for one request
+        
+        # Per-provider circuit breaker: skip a provider for a while after repeated failures
+        self._provider_failures = {}
+        self._provider_open_until = {}
+        self.circuit_failure_threshold = 3
+        self.circuit_cooldown = 60  # seconds
+        
         # Global music variety settings
         self.variety_settings = {
             "max_providers_per_request": 3,
@@ -186,7 +197,6 @@ class MusicAggregatorService:
         
         start_time = time.time()
         all_artists = []
-        provider_results = {}
         
         print(f"[AGGREGATOR] Starting global music variety search")
         print(f"[AGGREGATOR] Category: {category}, Mood: {mood}, Region: {region}, Limit: {limit}")
@@ -197,43 +207,39 @@ class MusicAggregatorService:
         
         print(f"[AGGREGATOR] Selected providers: {selected_providers}")
         
-        # Get music from each provider
-        for provider_name in selected_providers:
-            try:
-                provider = self.providers[provider_name]
-                provider_limit = max(self.variety_settings["min_artists_per_provider"], 
-                                   limit // len(selected_providers))
-                
-                print(f"[AGGREGATOR] Querying {provider_name} for {provider_limit} artists...")
-                
-                if category and mood:
-                    # Try category-specific search first
-                    artists = provider.get_global_music_variety(category, provider_limit)
-                    if len(artists) < provider_limit // 2:
-                        # Fallback to mood-based search
-                        mood_artists = provider.get_music_by_mood(mood, provider_limit)
-                        artists.extend(mood_artists)
-                elif category:
-                    artists = provider.get_global_music_variety(category, provider_limit)
-                elif mood:
-                    artists = provider.get_music_by_mood(mood, provider_limit)
-                else:
-                    # Get general variety
-                    artists = provider.get_global_music_variety(None, provider_limit)
-                
-                # Add provider metadata
-                for artist in artists:
-                    artist["provider"] = provider_name
-                    artist["variety_score"] = self._calculate_variety_score(artist, category, mood, region)
-                
-                provider_results[provider_name] = artists
-                all_artists.extend(artists)
-                
-                print(f"[AGGREGATOR] {provider_name} returned {len(artists)} artists")
-                
-            except Exception as e:
-                print(f"[AGGREGATOR] Error with {provider_name}: {e}")
-                continue
+        provider_limit = max(self.variety_settings["min_artists_per_provider"], 
+                           limit // max(1, len(selected_providers)))
+        
+        def fetch(provider_name, provider):
+            print(f"[AGGREGATOR] Querying {provider_name} for {provider_limit} artists...")
+            
+            if category and mood:
+                # Try category-specific search first
+                artists = provider.get_global_music_variety(category, provider_limit)
+                if len(artists) < provider_limit // 2:
+                    # Fallback to mood-based search
+                    mood_artists = provider.get_music_by_mood(mood, provider_limit)
+                    artists.extend(mood_artists)
+            elif category:
+                artists = provider.get_global_music_variety(category, provider_limit)
+            elif mood:
+                artists = provider.get_music_by_mood(mood, provider_limit)
+            else:
+                # Get general variety
+                artists = provider.get_global_music_variety(None, provider_limit)
+            
+            # Add provider metadata
+            for artist in artists:
+                artist["provider"] = provider_name
+                artist["variety_score"] = self._calculate_variety_score(artist, category, mood, region)
+            
+            print(f"[AGGREGATOR] {provider_name} returned {len(artists)} artists")
+            return artists
+        
+        # Get music from all providers in parallel
+        provider_results = self._query_providers(selected_providers, fetch)
+        for artists in provider_results.values():
+            all_artists.extend(artists)
         
         # Apply variety enhancement
         if variety_boost and len(all_artists) > 0:
@@ -269,7 +275,6 @@ class MusicAggregatorService:
         
         start_time = time.time()
         all_artists = []
-        provider_results = {}
         
         print(f"[AGGREGATOR] Getting cultural music variety for: {culture}")
         
@@ -281,38 +286,35 @@ class MusicAggregatorService:
         available_providers = list(self.providers.keys())
         selected_providers = self._select_providers(available_providers, culture, None)
         
-        for provider_name in selected_providers:
-            try:
-                provider = self.providers[provider_name]
-                provider_limit = max(self.variety_settings["min_artists_per_provider"], 
-                                   limit // len(selected_providers))
-                
-                # Try different approaches for cultural music
-                artists = []
-                
-                if hasattr(provider, 'get_cultural_music'):
-                    artists = provider.get_cultural_music(culture, provider_limit)
-                elif hasattr(provider, 'get_global_music_variety'):
-                    artists = provider.get_global_music_variety(culture, provider_limit)
-                else:
-                    # Fallback to search
-                    for keyword in keywords[:3]:
-                        if hasattr(provider, 'search_artists'):
-                            keyword_artists = provider.search_artists(keyword, provider_limit // 3)
-                            artists.extend(keyword_artists)
-                
-                # Add metadata
-                for artist in artists:
-                    artist["provider"] = provider_name
-                    artist["culture"] = culture
-                    artist["variety_score"] = self._calculate_cultural_variety_score(artist, culture)
-                
-                provider_results[provider_name] = artists
-                all_artists.extend(artists)
-                
-            except Exception as e:
-                print(f"[AGGREGATOR] Error with {provider_name} for culture {culture}: {e}")
-                continue
+        provider_limit = max(self.variety_settings["min_artists_per_provider"], 
+                           limit // max(1, len(selected_providers)))
+        
+        def fetch(provider_name, provider):
+            # Try different approaches for cultural music
+            artists = []
+            
+            if hasattr(provider, 'get_cultural_music'):
+                artists = provider.get_cultural_music(culture, provider_limit)
+            elif hasattr(provider, 'get_global_music_variety'):
+                artists = provider.get_global_music_variety(culture, provider_limit)
+            else:
+                # Fallback to search
+                for keyword in keywords[:3]:
+                    if hasattr(provider, 'search_artists'):
+                        keyword_artists = provider.search_artists(keyword, provider_limit // 3)
+                        artists.extend(keyword_artists)
+            
+            # Add metadata
+            for artist in artists:
+                artist["provider"] = provider_name
+                artist["culture"] = culture
+                artist["variety_score"] = self._calculate_cultural_variety_score(artist, culture)
+            
+            return artists
+        
+        provider_results = self._query_providers(selected_providers, fetch)
+        for artists in provider_results.values():
+            all_artists.extend(artists)
         
         # Apply cultural variety enhancement
         unique_artists = self._remove_duplicates_and_sort(all_artists)
@@ -338,7 +340,6 @@ class MusicAggregatorService:
         
         start_time = time.time()
         all_artists = []
-        provider_results = {}
         
         print(f"[AGGREGATOR] Getting mood-based variety for: {mood}")
         
@@ -350,35 +351,32 @@ class MusicAggregatorService:
         available_providers = list(self.providers.keys())
         selected_providers = self._select_providers(available_providers, None, mood)
         
-        for provider_name in selected_providers:
-            try:
-                provider = self.providers[provider_name]
-                provider_limit = max(self.variety_settings["min_artists_per_provider"], 
-                                   limit // len(selected_providers))
-                
-                # Try mood-specific method first
-                artists = []
-                if hasattr(provider, 'get_music_by_mood'):
-                    artists = provider.get_music_by_mood(mood, provider_limit)
-                else:
-                    # Fallback to search
-                    for keyword in keywords[:3]:
-                        if hasattr(provider, 'search_artists'):
-                            keyword_artists = provider.search_artists(keyword, provider_limit // 3)
-                            artists.extend(keyword_artists)
-                
-                # Add metadata
-                for artist in artists:
-                    artist["provider"] = provider_name
-                    artist["mood"] = mood
-                    artist["variety_score"] = self._calculate_mood_variety_score(artist, mood)
-                
-                provider_results[provider_name] = artists
-                all_artists.extend(artists)
-                
-            except Exception as e:
-                print(f"[AGGREGATOR] Error with {provider_name} for mood {mood}: {e}")
-                continue
+        provider_limit = max(self.variety_settings["min_artists_per_provider"], 
+                           limit // max(1, len(selected_providers)))
+        
+        def fetch(provider_name, provider):
+            # Try mood-specific method first
+            artists = []
+            if hasattr(provider, 'get_music_by_mood'):
+                artists = provider.get_music_by_mood(mood, provider_limit)
+            else:
+                # Fallback to search
+                for keyword in keywords[:3]:
+                    if hasattr(provider, 'search_artists'):
+                        keyword_artists = provider.search_artists(keyword, provider_limit // 3)
+                        artists.extend(keyword_artists)
+            
+            # Add metadata
+            for artist in artists:
+                artist["provider"] = provider_name
+                artist["mood"] = mood
+                artist["variety_score"] = self._calculate_mood_variety_score(artist, mood)
+            
+            return artists
+        
+        provider_results = self._query_providers(selected_providers, fetch)
+        for artists in provider_results.values():
+            all_artists.extend(artists)
         
         # Apply mood variety enhancement
         unique_artists = self._remove_duplicates_and_sort(all_artists)
@@ -399,6 +397,37 @@ class MusicAggregatorService:
             "response_time": round(response_time, 2)
         }
     
+    def _query_providers(self, selected_providers: List[str], fetch: Callable) -> Dict[str, List[Dict]]:
+        """Run fetch(provider_name, provider) for each provider in parallel; results keep selection order"""
+        now = time.time()
+        futures = {}
+        for provider_name in selected_providers:
+            if self._provider_open_until.get(provider_name, 0) > now:
+                print(f"[AGGREGATOR] Skipping {provider_name} - circuit open after repeated failures")
+                continue
+            futures[provider_name] = self._executor.submit(fetch, provider_name, self.providers[provider_name])
+        
+        provider_results = {}
+        deadline = now + self.provider_timeout
+        for provider_name, future in futures.items():
+            try:
+                provider_results[provider_name] = future.result(timeout=max(0.0, deadline - time.time()))
+                self._provider_failures[provider_name] = 0
+            except Exception as e:
+                print(f"[AGGREGATOR] Error with {provider_name}: {e!r}")
+                self._record_provider_failure(provider_name)
+        
+        return provider_results
+    
+    def _record_provider_failure(self, provider_name: str):
+        """Count a failure and open the provider's circuit once the threshold is reached"""
+        failures = self._provider_failures.get(provider_name, 0) + 1
+        self._provider_failures[provider_name] = failures
+        if failures >= self.circuit_failure_threshold:
+            self._provider_open_until[provider_name] = time.time() + self.circuit_cooldown
+            self._provider_failures[provider_name] = 0
+            print(f"[AGGREGATOR] Opening circuit for {provider_name} for {self.circuit_cooldown}s")
+    
     def _select_providers(self, available_providers: List[str], category: str = None, mood: str = None) -> List[str]:
         """Select the best providers for the given request"""
         
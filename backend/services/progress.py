@@ -0,0 +1,64 @@
+import logging
+from typing import Dict
+
+from utils.shared_cache import RedisCircuit, connect_redis
+from utils.ttl_cache import TTLCache
+
+log = logging.getLogger(__name__)
+
+PROGRESS_TTL = 300  # 5 minutes in seconds
+
+DEFAULT_PROGRESS = {
+    "percentage": 0,
+    "status": "not_started",
+    "current_artist": "",
+    "current_domain": ""
+}
+
+
+class ProgressTracker:
+    """Cross-domain progress per user, kept in Redis when REDIS_URL is set so every worker sees it"""
+
+    def __init__(self, redis_url: str = None):
+        # None when redis isn't installed or REDIS_URL is unset; progress then stays in this process
+        self.redis = connect_redis(redis_url)
+        self.circuit = RedisCircuit()
+        self.local = TTLCache(PROGRESS_TTL)
+
+    def _key(self, user_id: str) -> str:
+        return f"progress:{user_id}"
+
+    def set(self, user_id: str, progress: Dict):
+        """Record progress for a user; entries expire after PROGRESS_TTL"""
+        if self.redis is None or not self.circuit.closed():
+            self.local.set(user_id, dict(progress))
+            return
+        try:
+            # HSET + EXPIRE in one round trip
+            pipe = self.redis.pipeline()
+            pipe.hset(self._key(user_id), mapping=progress)
+            pipe.expire(self._key(user_id), PROGRESS_TTL)
+            pipe.execute()
+        except Exception as e:
+            self.circuit.trip()
+            log.warning("[PROGRESS] Redis write failed, keeping progress in memory: %s", e)
+            self.local.set(user_id, dict(progress))
+
+    def get(self, user_id: str) -> Dict:
+        """Current progress for a user, or the not-started default"""
+        if self.redis is not None and self.circuit.closed():
+            try:
+                progress = self.redis.hgetall(self._key(user_id))
+                if progress:
+                    # Redis hashes store strings; restore the numeric field
+                    progress["percentage"] = int(float(progress.get("percentage", 0)))
+                    return {**DEFAULT_PROGRESS, **progress}
+            except Exception as e:
+                self.circuit.trip()
+                log.warning("[PROGRESS] Redis read failed, using in-memory progress: %s", e)
+        entry = self.local.get(user_id)
+        return entry.data if entry else dict(DEFAULT_PROGRESS)
+
+
+# Shared by the app routes and the recommendations blueprint
+progress_tracker = ProgressTracker()
@@ -1,9 +1,29 @@
-import requests
+import functools
 import time
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import os
 import urllib.parse
 import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from utils.http import get_shared_session
+from utils.shared_cache import SharedCache, make_cache_key
+
+# Upper bound on simultaneous /insights calls across all requests, to stay under Qloo's rate limit
+MAX_CONCURRENT_INSIGHTS = 5
+# Tag IDs rarely change, so answered tag searches are kept for an hour
+TAG_SEARCH_CACHE_TTL = 3600
+# Longest Retry-After we are willing to wait out inside a request
+MAX_RETRY_AFTER = 2.0
+# Generic music tags tried when a request's own tags resolve to too few Qloo tag IDs
+MUSIC_FALLBACK_TAGS = ['pop', 'mainstream', 'contemporary', 'cultural', 'diverse']
+# Per-call timeout for tag searches when the caller has no deadline of its own
+TAG_SEARCH_TIMEOUT = 5
+
+
+def _time_left(deadline: Optional[float], cap: float) -> float:
+    """Seconds an upstream call may take: `cap`, shortened to whatever remains before `deadline`"""
+    return cap if deadline is None else min(cap, deadline - time.time())
 
 class QlooService:
     """Optimized Qloo API service with minimal overhead"""
@@ -11,13 +31,68 @@ class QlooService:
     def __init__(self):
         self.api_key = os.getenv('QLOO_API_KEY')
         self.base_url = "https://hackathon.api.qloo.com/v2"
+        # Shared keep-alive connection pool for all API calls
+        self.session = get_shared_session()
         self.headers = {"X-API-Key": self.api_key}
         # Track recently recommended artists to avoid repetition
         self.recent_artists = set()
         self.max_recent_artists = 50  # Reduced from 100 to 50 to prevent over-filtering
+        # Tag searches; the same handful of tags is resolved on every request
+        self.tag_search_cache = SharedCache("qloo:tag_search", TAG_SEARCH_CACHE_TTL)
+        # Insights only filter on one entity type per call, so multi-domain lookups fan out here
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="qloo")
+        self._insights_slots = threading.BoundedSemaphore(MAX_CONCURRENT_INSIGHTS)
+    
+    def _get_insights(self, params: Dict, timeout: float):
+        """GET /insights under the concurrency bound, retrying once if Qloo answers 429.
+        `timeout` covers the whole call, including the wait for a concurrency slot"""
+        url = f"{self.base_url}/insights"
+        deadline = time.time() + timeout
+        if timeout <= 0 or not self._insights_slots.acquire(timeout=timeout):
+            raise TimeoutError(f"No /insights slot free within {timeout:.1f}s")
+        try:
+            response = self.session.get(url, headers=self.headers, params=params, timeout=max(0.1, _time_left(deadline, timeout)))
+            if response.status_code == 429:
+                try:
+                    delay = min(float(response.headers.get("Retry-After", 0.5)), MAX_RETRY_AFTER)
+                except ValueError:
+                    delay = 0.5
+                # Only retry if the wait still leaves time for the request itself
+                if _time_left(deadline, timeout) > delay + 0.5:
+                    print(f"[QLOO] Rate limited, retrying after {delay}s")
+                    time.sleep(delay)
+                    response = self.session.get(url, headers=self.headers, params=params,
+                                                timeout=max(0.1, _time_left(deadline, timeout)))
+        finally:
+            self._insights_slots.release()
+        return response
     
-    def get_tag_ids_fast(self, tags: List[str], domain: str = None) -> List[str]:
-        """Get tag IDs efficiently - search Qloo database for existing tags (no limit)"""
+    def _search_tags(self, query: str, limit: int, timeout: float = TAG_SEARCH_TIMEOUT) -> Optional[List[Dict]]:
+        """Search Qloo's tag database; answered lookups are cached since tag IDs rarely change"""
+        cache_key = make_cache_key(query, limit)
+        cached = self.tag_search_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
+        url = f"{self.base_url}/tags"
+        params = {
+            "filter.query": query,
+            "limit": limit,
+            "sort": "relevance"  # Sort by relevance, not popularity
+        }
+        response = self.session.get(url, headers=self.headers, params=params, timeout=timeout)
+        time.sleep(0.05)  # 50ms delay between requests
+        
+        if response.status_code != 200:
+            return None
+        
+        results = response.json().get("results", {}).get("tags", [])
+        self.tag_search_cache.set(cache_key, results)
+        return results
+    
+    def get_tag_ids_fast(self, tags: List[str], domain: str = None, deadline: float = None) -> List[str]:
+        """Get tag IDs efficiently - search Qloo database for existing tags (no limit).
+        With a deadline (time.time() based), searches stop once it passes"""
         tag_ids = []
         successful_tags = []
         
@@ -34,53 +109,44 @@ class QlooService:
         
         # Try original tags first
         for tag in tags:
+            timeout = _time_left(deadline, TAG_SEARCH_TIMEOUT)
+            if timeout <= 0:
+                print(f"Tag search deadline passed, keeping {len(tag_ids)} tags")
+                break
             try:
-                # Search for the tag in Qloo's database
-                url = f"{self.base_url}/tags"
-                params = {
-                    "filter.query": tag,
-                    "limit": 3,  # Get fewer results to find best match
-                    "sort": "relevance"  # Sort by relevance, not popularity
-                }
-                
-                response = requests.get(url, headers=self.headers, params=params, timeout=5)
+                # Search for the tag in Qloo's database (fewer results to find best match)
+                results = self._search_tags(tag, 3, timeout)
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    results = data.get("results", {}).get("tags", [])
-                    
-                    if results:
-                        # Find the most relevant tag (not necessarily most popular)
-                        best_tag = None
-                        for result in results:
-                            tag_id = result.get("id", "")
-                            tag_name = result.get("name", "").lower()
-                            tag_type = result.get("type", "")
-                            
-                            # Check if this is a relevant tag type for the domain
-                            if any(category in tag_type.lower() for category in [
-                                'music', 'genre', 'style', 'audience', 'character', 
-                                'theme', 'plot', 'subgenre', 'mood', 'emotion'
-                            ]):
-                                best_tag = result
-                                break
-                        
-                        # If no specific relevant tag found, use the first result
-                        if not best_tag and results:
-                            best_tag = results[0]
+                if results is None:
+                    print(f"✗ '{tag}' - API error")
+                elif results:
+                    # Find the most relevant tag (not necessarily most popular)
+                    best_tag = None
+                    for result in results:
+                        tag_id = result.get("id", "")
+                        tag_name = result.get("name", "").lower()
+                        tag_type = result.get("type", "").lower()
                         
-                        if best_tag:
-                            tag_ids.append(best_tag["id"])
-                            successful_tags.append(tag)
-                            print(f"✓ '{tag}' → {best_tag['name']} ({best_tag['id']})")
-                        else:
-                            print(f"✗ '{tag}' - no relevant tags found")
+                        # Check if this is a relevant tag type for the domain
+                        if any(category in tag_type for category in [
+                            'music', 'genre', 'style', 'audience', 'character', 
+                            'theme', 'plot', 'subgenre', 'mood', 'emotion'
+                        ]):
+                            best_tag = result
+                            break
+                    
+                    # If no specific relevant tag found, use the first result
+                    if not best_tag and results:
+                        best_tag = results[0]
+                    
+                    if best_tag:
+                        tag_ids.append(best_tag["id"])
+                        successful_tags.append(tag)
+                        print(f"✓ '{tag}' → {best_tag['name']} ({best_tag['id']})")
                     else:
-                        print(f"✗ '{tag}' - not found in Qloo database")
+                        print(f"✗ '{tag}' - no relevant tags found")
                 else:
-                    print(f"✗ '{tag}' - API error: {response.status_code}")
-                
-                time.sleep(0.05)  # 50ms delay between requests
+                    print(f"✗ '{tag}' - not found in Qloo database")
                 
             except Exception as e:
                 print(f"Error searching for tag '{tag}': {e}")
@@ -105,29 +171,17 @@ class QlooService:
             
             for fallback_tag in fallback_list:
                 # No limit - use all fallback tags if needed
-                pass
-                    
+                timeout = _time_left(deadline, TAG_SEARCH_TIMEOUT)
+                if timeout <= 0:
+                    break
                 try:
-                    url = f"{self.base_url}/tags"
-                    params = {
-                        "filter.query": fallback_tag,
-                        "limit": 2,
-                        "sort": "relevance"
-                    }
-                    
-                    response = requests.get(url, headers=self.headers, params=params, timeout=5)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
-                        results = data.get("results", {}).get("tags", [])
-                        
-                        if results:
-                            best_tag = results[0]
-                            tag_ids.append(best_tag["id"])
-                            successful_tags.append(fallback_tag)
-                            print(f"✓ Fallback '{fallback_tag}' → {best_tag['name']} ({best_tag['id']})")
+                    results = self._search_tags(fallback_tag, 2, timeout)
                     
-                    time.sleep(0.05)
+                    if results:
+                        best_tag = results[0]
+                        tag_ids.append(best_tag["id"])
+                        successful_tags.append(fallback_tag)
+                        print(f"✓ Fallback '{fallback_tag}' → {best_tag['name']} ({best_tag['id']})")
                     
                 except Exception as e:
                     print(f"Error searching for fallback tag '{fallback_tag}': {e}")
@@ -137,6 +191,26 @@ class QlooService:
         print(f"Successful tags: {successful_tags}")
         return tag_ids
     
+    def get_music_tag_ids(self, tags: List[str], minimum: int = 3) -> Tuple[List[str], List[str]]:
+        """Resolve music tags in one pass, topping up with MUSIC_FALLBACK_TAGS only if fewer than `minimum` were accepted"""
+        seen_tags, seen_ids = set(), set()
+        ordered_tags, tag_ids = [], []
+        
+        def accept(batch, seen, ordered):
+            for item in batch:
+                if item not in seen:
+                    seen.add(item)
+                    ordered.append(item)
+        
+        accept(tags, seen_tags, ordered_tags)
+        accept(self.get_tag_ids_fast(ordered_tags), seen_ids, tag_ids)
+        if len(tag_ids) < minimum:
+            fallback = [tag for tag in MUSIC_FALLBACK_TAGS if tag not in seen_tags]
+            print(f"[NEED MORE TAGS] Only got {len(tag_ids)} tags, adding fallback tags: {fallback}")
+            accept(fallback, seen_tags, ordered_tags)
+            accept(self.get_tag_ids_fast(fallback), seen_ids, tag_ids)
+        return tag_ids, ordered_tags
+    
     def get_recommendations_fast(self, tag_ids: List[str], limit: int = 15) -> List[Dict]:
         """Get recommendations efficiently - try each tag individually"""
         if not tag_ids:
@@ -158,7 +232,7 @@ class QlooService:
                 
                 print(f"Fast recommendations - Tag {i+1}/{len(tag_ids)}: {tag_id}")
                 
-                response = requests.get(url, headers=self.headers, params=params, timeout=10)
+                response = self.session.get(url, headers=self.headers, params=params, timeout=10)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -210,7 +284,25 @@ class QlooService:
         print(f"✓ Total unique recommendations: {len(final_recommendations)}")
         return final_recommendations
     
-    def get_cross_domain_recommendations(self, tag_ids: List[str], domain: str, limit: int = 10, location: str = None, location_radius: int = 50000) -> List[Dict]:
+    def get_cross_domain_recommendations_multi(self, tag_ids: List[str], domains: List[str], limit: int = 10) -> Dict[str, List[Dict]]:
+        """Get recommendations for several domains at once; returns {domain: [...]} with [] for failed domains"""
+        futures = {
+            self._executor.submit(self.get_cross_domain_recommendations, tag_ids, domain, limit): domain
+            for domain in domains
+        }
+        results = {}
+        for future in as_completed(futures):
+            domain = futures[future]
+            try:
+                results[domain] = future.result()[:limit]
+            except Exception as e:
+                print(f"Domain {domain} error: {e}")
+                results[domain] = []
+        # Keep the caller's domain order regardless of completion order
+        return {domain: results[domain] for domain in domains}
+    
+    def get_cross_domain_recommendations(self, tag_ids: List[str], domain: str, limit: int = 10, location: str = None, location_radius: int = 50000,
+                                         timeout: float = 15) -> List[Dict]:
         """Get cross-domain recommendations efficiently with enhanced data and location support"""
         if not tag_ids:
             print(f"No tag IDs provided for domain: {domain}")
@@ -257,7 +349,7 @@ class QlooService:
             
             print(f"Requesting {domain} recommendations with tags: {tag_ids[:3]}...")
             print(f"Using entity type: urn:entity:{entity_type}")
-            response = requests.get(url, headers=self.headers, params=params, timeout=15)
+            response = self._get_insights(params, timeout=timeout)
             
             if response.status_code == 200:
                 data = response.json()
@@ -467,7 +559,7 @@ class QlooService:
                 "limit": 1
             }
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=5)
+            response = self.session.get(url, headers=self.headers, params=params, timeout=5)
             if response.status_code == 200:
                 data = response.json()
                 entities = data.get("results", {}).get("entities", [])
@@ -497,7 +589,7 @@ class QlooService:
                 }
                 
                 print(f"Searching for artist: {artist_name} (encoded: {encoded_name})")
-                response = requests.get(url, headers=self.headers, params=params, timeout=10)
+                response = self.session.get(url, headers=self.headers, params=params, timeout=10)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -558,7 +650,7 @@ class QlooService:
                 
                 print(f"Artist recommendations - Tag {i+1}/{len(tag_ids)}: {tag_id}")
                 
-                response = requests.get(url, headers=self.headers, params=params, timeout=10)
+                response = self.session.get(url, headers=self.headers, params=params, timeout=10)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -860,7 +952,7 @@ class QlooService:
             }
             
             print(f"Searching Qloo for artist: {artist_name}")
-            response = requests.get(url, headers=self.headers, params=params, timeout=5)
+            response = self.session.get(url, headers=self.headers, params=params, timeout=5)
             
             if response.status_code == 200:
                 data = response.json()
@@ -903,12 +995,11 @@ class QlooService:
         print(f"[VARIETY STRATEGY] Using {len(music_tag_ids)} music tags: {music_tag_ids[:3]}...")
         
         # Create context-dependent variety seed instead of just time-based
-        import time
-        import hashlib
-        
         # Create a unique seed based on context, tags, and time
         context_string = f"{user_country}_{location}_{','.join(music_tag_ids)}_{int(time.time() / 60)}"  # Change every minute
-        variety_seed = int(hashlib.md5(context_string.encode()).hexdigest()[:8], 16) % 10000
+        # Hashed once; the seed and every recommendation's context_hash come from the same digest
+        context_hash = hashlib.blake2b(context_string.encode(), digest_size=8).hexdigest()[:8]
+        variety_seed = int(context_hash, 16) % 10000
         print(f"[VARIETY] Context-dependent variety seed: {variety_seed}")
         print(f"[VARIETY] Context string: {context_string[:50]}...")
         
@@ -945,7 +1036,7 @@ class QlooService:
                             params["filter.tags"] = f"{tag_id},{cultural_tags[0]}"
                     
                     print(f"Strategy {strategy_idx+1} - Tag: {tag_id} (sort: {strategy['sort']}, offset: {strategy['offset']})")
-                    response = requests.get(url, headers=self.headers, params=params, timeout=10)
+                    response = self.session.get(url, headers=self.headers, params=params, timeout=10)
                     
                     if response.status_code == 200:
                         data = response.json()
@@ -962,7 +1053,7 @@ class QlooService:
                                 rec["user_taste_relevance"] = True
                             rec["strategy"] = strategy_idx + 1
                             rec["variety_seed"] = variety_seed
-                            rec["context_hash"] = hashlib.md5(context_string.encode()).hexdigest()[:8]
+                            rec["context_hash"] = context_hash
                             all_recommendations.append(rec)
                         
                         print(f"  ✓ Got {len(entities)} artists")
@@ -1067,7 +1158,7 @@ class QlooService:
                 }
                 
                 print(f"User Taste - Tag: {tag_id}")
-                response = requests.get(url, headers=self.headers, params=params, timeout=10)
+                response = self.session.get(url, headers=self.headers, params=params, timeout=10)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -1158,7 +1249,7 @@ class QlooService:
                 }
                 
                 print(f"Global - Tag: {tag_id}")
-                response = requests.get(url, headers=self.headers, params=params, timeout=10)
+                response = self.session.get(url, headers=self.headers, params=params, timeout=10)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -1197,7 +1288,7 @@ class QlooService:
                 }
                 
                 print(f"Location - Tag: {tag_id}, Location: {location}")
-                response = requests.get(url, headers=self.headers, params=params, timeout=10)
+                response = self.session.get(url, headers=self.headers, params=params, timeout=10)
             
                 if response.status_code == 200:
                     data = response.json()
@@ -1239,7 +1330,7 @@ class QlooService:
                 }
                 
                 print(f"Cultural - Tag: {tag_id}, Country: {country}")
-                response = requests.get(url, headers=self.headers, params=params, timeout=10)
+                response = self.session.get(url, headers=self.headers, params=params, timeout=10)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -1278,7 +1369,7 @@ class QlooService:
                 }
                 
                 print(f"Popular - Tag: {tag_id}")
-                response = requests.get(url, headers=self.headers, params=params, timeout=10)
+                response = self.session.get(url, headers=self.headers, params=params, timeout=10)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -1325,7 +1416,7 @@ class QlooService:
                 }
                 
                 print(f"Diverse - Tag: {tag_id}")
-                response = requests.get(url, headers=self.headers, params=params, timeout=10)
+                response = self.session.get(url, headers=self.headers, params=params, timeout=10)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -1528,6 +1619,10 @@ class QlooService:
         
         return filtered_recs
 
+    def clear_tag_cache(self):
+        """Drop cached tag searches"""
+        self.tag_search_cache.clear()
+
     def clear_recent_artists_cache(self):
         """Clear the cache of recently recommended artists"""
         self.recent_artists.clear()
@@ -1539,4 +1634,10 @@ class QlooService:
             "recent_artists_count": len(self.recent_artists),
             "max_recent_artists": self.max_recent_artists,
             "cache_utilization": len(self.recent_artists) / self.max_recent_artists if self.max_recent_artists > 0 else 0
-        }
\ No newline at end of file
+        }
+
+
+@functools.cache
+def get_qloo_service() -> QlooService:
+    """Process-wide QlooService (one tag cache, recent-artist set and worker pool shared by app and blueprints)"""
+    return QlooService()
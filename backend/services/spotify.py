@@ -1,9 +1,31 @@
+import functools
 import requests
 import base64
 import time
 import random
 from typing import Dict, List, Optional
 import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from utils.http import get_shared_session
+from utils.shared_cache import SharedCache
+from utils.ttl_cache import TTLCache
+
+# Profiles are stable for a token's lifetime; shared by every SpotifyService instance
+PROFILE_CACHE_TTL = 1800  # 30 minutes in seconds
+profile_cache = TTLCache(PROFILE_CACHE_TTL)
+
+# Artist search hits and details change rarely
+ARTIST_CACHE_TTL = 86400  # 24 hours in seconds
+# Spotify's GET /artists accepts at most 50 IDs
+ARTISTS_PER_REQUEST = 50
+# Longest Retry-After we are willing to wait out inside a request
+MAX_RETRY_AFTER = 5.0
+
+# Spotify rejects playlist add requests with more than 100 URIs
+PLAYLIST_TRACKS_PER_REQUEST = 100
+# Track URIs are built by plain concatenation (no per-track format parsing)
+TRACK_URI_PREFIX = "spotify:track:"
 
 class SpotifyService:
     """Optimized Spotify API service with minimal overhead"""
@@ -12,10 +34,33 @@ class SpotifyService:
         self.client_id = os.getenv('SPOTIFY_CLIENT_ID', "5b5e4ceb834347e6a6c3b998cfaf0088")
         self.client_secret = os.getenv('SPOTIFY_CLIENT_SECRET', "9c9aadd2b18e49859df887e5e9cc6ede")
         self.base_url = "https://api.spotify.com/v1"
+        # Shared keep-alive connection pool for all API calls
+        self.session = get_shared_session()
         self.auth_url = "https://accounts.spotify.com/api/token"
-        # Simple in-memory cache for artist details to reduce API calls
-        self.artist_cache = {}
-        self.artist_search_cache = {}
+        # Artist name -> search hit and artist ID -> details; the same artists come up for every
+        # user, so these are shared across workers through Redis when REDIS_URL is set
+        self.artist_cache = SharedCache("sp:adet", ARTIST_CACHE_TTL)
+        self.artist_search_cache = SharedCache("sp:aid", ARTIST_CACHE_TTL)
+        # Batch artist lookups run their name searches concurrently here
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="spotify")
+        # After a 429, concurrent lookups hold off until Spotify's Retry-After instead of piling on
+        self._rate_limited_until = 0.0
+    
+    def _wait_for_rate_limit(self):
+        """Sleep out any backoff another lookup was told to observe"""
+        remaining = self._rate_limited_until - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
+    
+    def _note_rate_limit(self, response, default: float) -> float:
+        """Record a 429's Retry-After (capped) so every thread backs off together; returns the delay"""
+        try:
+            delay = float(response.headers.get("Retry-After", default))
+        except ValueError:
+            delay = default
+        delay = min(delay, MAX_RETRY_AFTER)
+        self._rate_limited_until = max(self._rate_limited_until, time.monotonic() + delay)
+        return delay
     
     def generate_auth_url(self, redirect_uri: str, force_reauth: bool = False, session_id: str = None) -> Dict[str, str]:
         """Generate Spotify OAuth URL with state parameter"""
@@ -62,7 +107,7 @@ class SpotifyService:
         }
         
         try:
-            response = requests.post(self.auth_url, headers=headers, data=data, timeout=5)
+            response = self.session.post(self.auth_url, headers=headers, data=data, timeout=5)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -84,7 +129,7 @@ class SpotifyService:
         }
         
         try:
-            response = requests.post(self.auth_url, headers=headers, data=data, timeout=5)
+            response = self.session.post(self.auth_url, headers=headers, data=data, timeout=5)
             response.raise_for_status()
             return response.json()
         except Exception as e:
@@ -95,11 +140,34 @@ class SpotifyService:
         """Check if token is expired by making a test API call"""
         try:
             headers = {"Authorization": f"Bearer {access_token}"}
-            response = requests.get(f"{self.base_url}/me", headers=headers, timeout=5)
+            response = self.session.get(f"{self.base_url}/me", headers=headers, timeout=5)
             return response.status_code == 401
         except Exception:
             return True
     
+    @staticmethod
+    def _profile_cache_key(access_token: str) -> bytes:
+        """Hash the token so raw tokens are never kept as cache keys"""
+        return hashlib.blake2b(access_token.encode(), digest_size=16).digest()
+    
+    def get_cached_user_profile(self, access_token: str) -> Optional[Dict]:
+        """Get user profile, reusing the cached /me response for this token when available"""
+        cache_key = self._profile_cache_key(access_token)
+        cached = profile_cache.get(cache_key)
+        if cached:
+            return cached.data
+        
+        profile = self.get_user_profile(access_token)
+        # Don't cache failures or the 502 fallback profile
+        if profile and profile.get("user_id") != "fallback_user":
+            profile_cache.set(cache_key, profile)
+        return profile
+    
+    def invalidate_user_profile(self, access_token: str):
+        """Drop the cached profile for a token (e.g. on logout)"""
+        if access_token:
+            profile_cache.pop(self._profile_cache_key(access_token))
+    
     def get_user_profile(self, access_token: str) -> Optional[Dict]:
         """Get user profile with retry mechanism for 502 errors"""
         headers = {"Authorization": f"Bearer {access_token}"}
@@ -108,7 +176,7 @@ class SpotifyService:
         
         for attempt in range(max_retries):
             try:
-                response = requests.get(f"{self.base_url}/me", headers=headers, timeout=10)
+                response = self.session.get(f"{self.base_url}/me", headers=headers, timeout=10)
                 response.raise_for_status()
                 data = response.json()
                 
@@ -166,7 +234,7 @@ class SpotifyService:
         
         for attempt in range(max_retries):
             try:
-                response = requests.get(url, headers=headers, params=params, timeout=10)
+                response = self.session.get(url, headers=headers, params=params, timeout=10)
                 response.raise_for_status()
                 
                 artists = []
@@ -218,7 +286,7 @@ class SpotifyService:
         
         for attempt in range(max_retries):
             try:
-                response = requests.get(url, headers=headers, params=params, timeout=10)
+                response = self.session.get(url, headers=headers, params=params, timeout=10)
                 response.raise_for_status()
                 
                 artists = []
@@ -265,7 +333,7 @@ class SpotifyService:
         }
         
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=10)
+            response = self.session.get(url, headers=headers, params=params, timeout=10)
             response.raise_for_status()
             
             tracks = []
@@ -292,7 +360,7 @@ class SpotifyService:
         """Get all user data using retry-enabled methods"""
         
         # Get user profile first (with retry mechanism)
-        profile = self.get_user_profile(access_token)
+        profile = self.get_cached_user_profile(access_token)
         if not profile:
             print("[SPOTIFY] Profile fetch error: Failed to get user profile")
             return {}
@@ -311,6 +379,8 @@ class SpotifyService:
         return {
             "profile": profile,
             "artists": artists,
+            # Full image-bearing entries, so callers that show artist cards don't refetch them
+            "artists_with_images": artists_with_images,
             "tracks": tracks
         }
     
@@ -328,7 +398,7 @@ class SpotifyService:
         }
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 f"{self.base_url}/users/{user_id}/playlists",
                 headers=headers,
                 json=data,
@@ -346,22 +416,22 @@ class SpotifyService:
             return None
     
     def add_tracks_to_playlist(self, access_token: str, playlist_id: str, track_uris: List[str]) -> bool:
-        """Add tracks to playlist - single API call"""
+        """Add tracks to playlist - one API call per 100 tracks (Spotify's per-request maximum)"""
         headers = {
             "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json"
         }
         
-        data = {"uris": track_uris}
-        
         try:
-            response = requests.post(
-                f"{self.base_url}/playlists/{playlist_id}/tracks",
-                headers=headers,
-                json=data,
-                timeout=5
-            )
-            response.raise_for_status()
+            # Chunks are sent in order (not concurrently) so the playlist keeps the track order
+            for i in range(0, len(track_uris), PLAYLIST_TRACKS_PER_REQUEST):
+                response = self.session.post(
+                    f"{self.base_url}/playlists/{playlist_id}/tracks",
+                    headers=headers,
+                    json={"uris": track_uris[i:i + PLAYLIST_TRACKS_PER_REQUEST]},
+                    timeout=5
+                )
+                response.raise_for_status()
             return True
         except Exception as e:
             print(f"Add tracks error: {e}")
@@ -371,9 +441,11 @@ class SpotifyService:
         """Search for artist with retry mechanism and caching"""
         # Check cache first
         cache_key = f"{artist_name.lower().strip()}"
-        if cache_key in self.artist_search_cache:
+        cached = self.artist_search_cache.get(cache_key)
+        if cached is not None:
             print(f"Artist search cache hit for: {artist_name}")
-            return self.artist_search_cache[cache_key]
+            # Misses are cached too, as {"artist": None}
+            return cached["artist"]
         
         headers = {"Authorization": f"Bearer {access_token}"}
         params = {"q": artist_name, "type": "artist", "limit": 1}
@@ -383,7 +455,8 @@ class SpotifyService:
         
         for attempt in range(max_retries):
             try:
-                response = requests.get(f"{self.base_url}/search", headers=headers, params=params, timeout=10)
+                self._wait_for_rate_limit()
+                response = self.session.get(f"{self.base_url}/search", headers=headers, params=params, timeout=10)
                 
                 # Check for specific error codes
                 if response.status_code == 401:
@@ -395,8 +468,9 @@ class SpotifyService:
                 elif response.status_code == 429:
                     print(f"Artist search rate limited (429) - attempt {attempt + 1}/{max_retries}")
                     if attempt < max_retries - 1:
-                        print(f"Waiting {retry_delay} seconds before retry...")
-                        time.sleep(retry_delay)
+                        # The wait happens at the top of the next attempt, shared with other searches
+                        delay = self._note_rate_limit(response, retry_delay)
+                        print(f"Waiting {delay} seconds before retry...")
                         retry_delay *= 2  # Exponential backoff
                         continue
                     else:
@@ -415,14 +489,14 @@ class SpotifyService:
                         "genres": artist.get("genres", [])
                     }
                     # Cache the result
-                    self.artist_search_cache[cache_key] = result
+                    self.artist_search_cache.set(cache_key, {"artist": result})
                     print(f"Found artist: {artist['name']} (ID: {artist['id']}) on attempt {attempt + 1}")
                     print(f"Search query was: '{artist_name}', found: '{artist['name']}'")
                     return result
                 else:
                     print(f"No artist found for: {artist_name}")
                     # Cache the None result to avoid repeated failed searches
-                    self.artist_search_cache[cache_key] = None
+                    self.artist_search_cache.set(cache_key, {"artist": None})
                 return None
             except requests.exceptions.RequestException as e:
                 print(f"Network error in artist search (attempt {attempt + 1}): {e}")
@@ -441,12 +515,98 @@ class SpotifyService:
         
         return None
     
+    @staticmethod
+    def _format_artist_details(data: Dict) -> Dict:
+        """Shape a Spotify artist object into the details payload the frontend expects"""
+        # Get the best quality image (usually the first one is the highest quality)
+        image_url = None
+        if data.get("images"):
+            # Try to get the medium size image (around 300x300)
+            for image in data["images"]:
+                if image.get("width", 0) >= 200 and image.get("width", 0) <= 400:
+                    image_url = image.get("url")
+                    break
+            # If no medium image found, use the first one
+            if not image_url and data["images"]:
+                image_url = data["images"][0].get("url")
+        
+        return {
+            "id": data.get("id"),
+            "name": data.get("name"),
+            "image": image_url,
+            "images": data.get("images", []),  # Include the full images array for frontend processing
+            "genres": data.get("genres", []),
+            "popularity": data.get("popularity", 0),
+            "followers": data.get("followers", {}).get("total", 0) if data.get("followers") else 0,
+            "spotify_url": data.get("external_urls", {}).get("spotify", ""),
+            "uri": data.get("uri", "")
+        }
+    
+    def get_artists_bulk(self, access_token: str, artist_ids: List[str]) -> Dict[str, Dict]:
+        """Details for many artists via GET /artists?ids= (50 per call); returns {artist_id: details}"""
+        results = {}
+        missing = []
+        for artist_id in dict.fromkeys(artist_ids):
+            cached = self.artist_cache.get(artist_id)
+            if cached is not None:
+                results[artist_id] = cached
+            else:
+                missing.append(artist_id)
+        
+        headers = {"Authorization": f"Bearer {access_token}"}
+        for start in range(0, len(missing), ARTISTS_PER_REQUEST):
+            chunk = missing[start:start + ARTISTS_PER_REQUEST]
+            try:
+                self._wait_for_rate_limit()
+                response = self.session.get(f"{self.base_url}/artists", headers=headers,
+                                            params={"ids": ",".join(chunk)}, timeout=10)
+                if response.status_code == 429:
+                    print("Bulk artist details rate limited (429) - retrying once")
+                    self._note_rate_limit(response, 1.0)
+                    self._wait_for_rate_limit()
+                    response = self.session.get(f"{self.base_url}/artists", headers=headers,
+                                                params={"ids": ",".join(chunk)}, timeout=10)
+                response.raise_for_status()
+                # Unknown IDs come back as null entries
+                for data in response.json().get("artists", []):
+                    if data:
+                        artist_details = self._format_artist_details(data)
+                        self.artist_cache.set(data["id"], artist_details)
+                        results[data["id"]] = artist_details
+            except Exception as e:
+                print(f"Bulk artist details error for {len(chunk)} artists: {e}")
+        
+        return results
+    
+    def get_artist_details_batch(self, access_token: str, artist_names: List[str]) -> Dict[str, Dict]:
+        """Resolve many artist names to details: concurrent (cached) searches, then bulk detail lookups.
+        Returns {name: {"artist": details}} or {name: {"error": message, "reason": "not_found" | "details_failed"}}
+        for each requested name"""
+        # Names differing only in case/whitespace share a search cache entry, so they share one search here too
+        by_key = {}
+        for name in artist_names:
+            by_key.setdefault(name.lower().strip(), name)
+        hits = dict(zip(by_key, self._executor.map(lambda name: self.search_artist(access_token, name), by_key.values())))
+        details = self.get_artists_bulk(access_token, [hit["id"] for hit in hits.values() if hit])
+        
+        results = {}
+        for name in dict.fromkeys(artist_names):
+            hit = hits[name.lower().strip()]
+            if not hit:
+                results[name] = {"error": f"Artist '{name}' not found", "reason": "not_found"}
+            elif hit["id"] in details:
+                results[name] = {"artist": details[hit["id"]]}
+            else:
+                results[name] = {"error": "Failed to get artist details", "reason": "details_failed"}
+        return results
+    
     def get_artist_details(self, access_token: str, artist_id: str) -> Optional[Dict]:
         """Get detailed artist information including image and Spotify URL with retry mechanism and caching"""
         # Check cache first
-        if artist_id in self.artist_cache:
+        cached = self.artist_cache.get(artist_id)
+        if cached is not None:
             print(f"Artist details cache hit for ID: {artist_id}")
-            return self.artist_cache[artist_id]
+            return cached
         
         headers = {"Authorization": f"Bearer {access_token}"}
         
@@ -455,7 +615,7 @@ class SpotifyService:
         
         for attempt in range(max_retries):
             try:
-                response = requests.get(f"{self.base_url}/artists/{artist_id}", headers=headers, timeout=10)
+                response = self.session.get(f"{self.base_url}/artists/{artist_id}", headers=headers, timeout=10)
                 
                 # Check for specific error codes
                 if response.status_code == 401:
@@ -481,33 +641,11 @@ class SpotifyService:
                 # Debug: Print the raw response to see what we're getting
                 print(f"Raw Spotify artist data for {data.get('name', 'Unknown')}: {data.get('images', [])}")
                 
-                # Get the best quality image (usually the first one is the highest quality)
-                image_url = None
-                if data.get("images"):
-                    # Try to get the medium size image (around 300x300)
-                    for image in data["images"]:
-                        if image.get("width", 0) >= 200 and image.get("width", 0) <= 400:
-                            image_url = image.get("url")
-                            break
-                    # If no medium image found, use the first one
-                    if not image_url and data["images"]:
-                        image_url = data["images"][0].get("url")
-                
-                artist_details = {
-                    "id": data.get("id"),
-                    "name": data.get("name"),
-                    "image": image_url,
-                    "images": data.get("images", []),  # Include the full images array for frontend processing
-                    "genres": data.get("genres", []),
-                    "popularity": data.get("popularity", 0),
-                    "followers": data.get("followers", {}).get("total", 0) if data.get("followers") else 0,
-                    "spotify_url": data.get("external_urls", {}).get("spotify", ""),
-                    "uri": data.get("uri", "")
-                }
+                artist_details = self._format_artist_details(data)
                 
                 # Cache the result
-                self.artist_cache[artist_id] = artist_details
-                print(f"Artist details fetched for {data.get('name')} on attempt {attempt + 1}: image={image_url is not None}")
+                self.artist_cache.set(artist_id, artist_details)
+                print(f"Artist details fetched for {data.get('name')} on attempt {attempt + 1}: image={artist_details['image'] is not None}")
                 return artist_details
                 
             except requests.exceptions.RequestException as e:
@@ -532,7 +670,7 @@ class SpotifyService:
         headers = {"Authorization": f"Bearer {access_token}"}
         
         try:
-            response = requests.get(f"{self.base_url}/playlists/{playlist_id}", headers=headers, timeout=5)
+            response = self.session.get(f"{self.base_url}/playlists/{playlist_id}", headers=headers, timeout=5)
             response.raise_for_status()
             data = response.json()
             
@@ -558,7 +696,7 @@ class SpotifyService:
         }
         
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=5)
+            response = self.session.get(url, headers=headers, params=params, timeout=5)
             response.raise_for_status()
             
             playlists = []
@@ -591,7 +729,7 @@ class SpotifyService:
         }
         
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=5)
+            response = self.session.get(url, headers=headers, params=params, timeout=5)
             response.raise_for_status()
             
             artists = response.json().get("artists", {}).get("items", [])
@@ -616,7 +754,7 @@ class SpotifyService:
         params = {"country": country, "limit": limit}
         
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=5)
+            response = self.session.get(url, headers=headers, params=params, timeout=5)
             response.raise_for_status()
             
             data = response.json()
@@ -652,7 +790,7 @@ class SpotifyService:
         params = {"ids": ",".join(track_ids)}
         
         try:
-            response = requests.get(url, headers=headers, params=params, timeout=10)
+            response = self.session.get(url, headers=headers, params=params, timeout=10)
             
             # Check specific error codes
             if response.status_code == 403:
@@ -705,7 +843,7 @@ class SpotifyService:
                 "limit": 1
             }
             
-            response = requests.get(search_url, headers=headers, params=params, timeout=5)
+            response = self.session.get(search_url, headers=headers, params=params, timeout=5)
             response.raise_for_status()
             
             artists = response.json().get("artists", {}).get("items", [])
@@ -835,7 +973,7 @@ class SpotifyService:
             url = f"https://api.spotify.com/v1/artists/{artist_id}/related-artists"
             headers = {"Authorization": f"Bearer {access_token}"}
             
-            response = requests.get(url, headers=headers)
+            response = self.session.get(url, headers=headers)
             if response.status_code == 200:
                 data = response.json()
                 similar_artists = []
@@ -979,7 +1117,7 @@ class SpotifyService:
             headers = {"Authorization": f"Bearer {access_token}"}
             params = {"limit": 5}
             
-            response = requests.get(url, headers=headers, params=params, timeout=5)
+            response = self.session.get(url, headers=headers, params=params, timeout=5)
             response.raise_for_status()
             
             playlists = response.json().get("playlists", {}).get("items", [])
@@ -990,7 +1128,7 @@ class SpotifyService:
                 if playlist_id:
                     # Get playlist tracks
                     tracks_url = f"{self.base_url}/playlists/{playlist_id}/tracks"
-                    tracks_response = requests.get(tracks_url, headers=headers, params={"limit": 10}, timeout=5)
+                    tracks_response = self.session.get(tracks_url, headers=headers, params={"limit": 10}, timeout=5)
                     
                     if tracks_response.status_code == 200:
                         tracks_data = tracks_response.json()
@@ -1075,7 +1213,7 @@ class SpotifyService:
             headers = {"Authorization": f"Bearer {access_token}"}
             params = {"ids": test_track_id}
             
-            response = requests.get(url, headers=headers, params=params, timeout=5)
+            response = self.session.get(url, headers=headers, params=params, timeout=5)
             
             if response.status_code == 200:
                 print("✅ Audio features access confirmed - token has required scopes")
@@ -1099,7 +1237,7 @@ class SpotifyService:
         """Get scopes from token by making a test API call"""
         try:
             headers = {"Authorization": f"Bearer {access_token}"}
-            response = requests.get(f"{self.base_url}/me", headers=headers, timeout=5)
+            response = self.session.get(f"{self.base_url}/me", headers=headers, timeout=5)
             
             if response.status_code == 200:
                 # Token is valid, but we can't get scopes from this endpoint
@@ -1174,4 +1312,10 @@ class SpotifyService:
         """Clear the artist cache to free memory"""
         self.artist_cache.clear()
         self.artist_search_cache.clear()
-        print("Artist cache cleared") 
\ No newline at end of file
+        print("Artist cache cleared")
+
+
+@functools.cache
+def get_spotify_service() -> SpotifyService:
+    """Process-wide SpotifyService (one profile/token cache shared by app and blueprints)"""
+    return SpotifyService()
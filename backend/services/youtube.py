@@ -1,9 +1,9 @@
-import requests
 import time
 import random
 from typing import Dict, List, Optional
 import os
 import re
+from utils.http import get_shared_session
 
 class YouTubeMusicService:
     """YouTube Music API service for global music discovery and variety"""
@@ -11,6 +11,8 @@ class YouTubeMusicService:
     def __init__(self):
         self.api_key = os.getenv('YOUTUBE_API_KEY')
         self.base_url = "https://www.googleapis.com/youtube/v3"
+        # Shared keep-alive connection pool for all API calls
+        self.session = get_shared_session()
         self.headers = {"Accept": "application/json"}
         
         # Global music categories for variety
@@ -52,7 +54,7 @@ class YouTubeMusicService:
             if region_code:
                 params["regionCode"] = region_code
             
-            response = requests.get(f"{self.base_url}/search", params=params, headers=self.headers, timeout=10)
+            response = self.session.get(f"{self.base_url}/search", params=params, headers=self.headers, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -0,0 +1,30 @@
+import atexit
+import functools
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+def create_session(pool_connections: int = 20, pool_maxsize: int = 100, retries: int = 2) -> requests.Session:
+    """Create a requests.Session with a keep-alive connection pool so TCP/TLS setup is paid once per host"""
+    session = requests.Session()
+    # Retries cover dropped/refused connections and transient gateway errors on idempotent
+    # methods only (POSTs are not replayed); 429s are left to callers that know their rate limits
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(total=retries, backoff_factor=0.1, status_forcelist=(502, 503, 504), raise_on_status=False)
+    )
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+@functools.cache
+def get_shared_session() -> requests.Session:
+    """Process-wide session: every service instance (and every blueprint's copy) reuses the same warm connections"""
+    session = create_session(pool_connections=32, pool_maxsize=200)
+    session.headers["User-Agent"] = "SoniqueDNA"
+    atexit.register(session.close)
+    return session
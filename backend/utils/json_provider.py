@@ -0,0 +1,82 @@
+import hashlib
+import json
+from typing import Any
+
+from flask import Response, current_app, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+
+def dumps_bytes(obj: Any, sort_keys: bool = False) -> bytes:
+    """Serialize an object to UTF-8 JSON bytes, using orjson when available"""
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, default=DefaultJSONProvider.default, option=option)
+        except TypeError:
+            pass
+    return json.dumps(obj, default=DefaultJSONProvider.default, ensure_ascii=False, sort_keys=sort_keys).encode("utf-8")
+
+
+def json_response(obj: Any, status: int = 200) -> Response:
+    """Build a JSON response straight from serialized bytes (skips jsonify's str round trip)"""
+    return current_app.response_class(dumps_bytes(obj), status=status, mimetype="application/json")
+
+
+def conditional_json_response(body: bytes, etag: str) -> Response:
+    """Serve pre-serialized JSON with a weak ETag, or a bodyless 304 if the client already has it"""
+    if request.if_none_match.contains_weak(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(body, mimetype="application/json")
+    response.set_etag(etag, weak=True)
+    return response
+
+
+def etag_json_response(obj: Any, private: bool = False) -> Response:
+    """JSON response tagged with a hash of its body so polling clients can revalidate with If-None-Match"""
+    body = dumps_bytes(obj)
+    response = conditional_json_response(body, hashlib.blake2b(body, digest_size=16).hexdigest())
+    if private:
+        # Per-user data: shared caches must not keep it, and clients always revalidate
+        response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def loads(data) -> Any:
+    """Parse JSON from str/bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson for request parsing and jsonify"""
+
+    # Keep keys in insertion order and compact output (even with debug=True);
+    # sorting and indenting every response is wasted work
+    sort_keys = False
+    compact = True
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        # Pretty-printing (debug mode) only applies to the stdlib encoder
+        if orjson is None or kwargs.get("indent"):
+            return super().dumps(obj, **kwargs)
+        return dumps_bytes(obj, sort_keys=kwargs.get("sort_keys", False)).decode("utf-8")
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if orjson is None:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args: Any, **kwargs: Any) -> Response:
+        # jsonify() goes through here; hand orjson's bytes to the response directly
+        # instead of decoding to str for Flask to encode again
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
@@ -0,0 +1,93 @@
+from dataclasses import dataclass
+from typing import Dict
+
+from utils.helpers import sanitize_string
+
+
+class RequestValidationError(ValueError):
+    """Raised when a request payload is missing required fields or has invalid values"""
+
+
+def _required_string(data: Dict, field: str) -> str:
+    value = data.get(field)
+    if not value or not isinstance(value, str):
+        raise RequestValidationError("Missing required fields")
+    return sanitize_string(value)
+
+
+def _optional_string(data: Dict, field: str) -> str:
+    value = data.get(field)
+    return sanitize_string(value) if isinstance(value, str) else ""
+
+
+def _bounded_limit(data: Dict, default: int, maximum: int) -> int:
+    try:
+        limit = int(data.get("limit", default))
+    except (TypeError, ValueError):
+        raise RequestValidationError("limit must be an integer")
+    return max(1, min(limit, maximum))
+
+
+def _require_object(data) -> Dict:
+    if not isinstance(data, dict):
+        raise RequestValidationError("Missing required fields")
+    return data
+
+
+@dataclass(frozen=True)
+class MusicRecommendationRequest:
+    """Validated body for the music recommendation endpoint"""
+    spotify_token: str
+    user_context: str = ""
+    limit: int = 15
+    create_playlist: bool = False
+    cache_bust: bool = False
+
+    @classmethod
+    def from_json(cls, data) -> "MusicRecommendationRequest":
+        data = _require_object(data)
+        return cls(
+            spotify_token=_required_string(data, "spotify_token"),
+            user_context=_optional_string(data, "user_context"),
+            limit=_bounded_limit(data, 15, 50),
+            create_playlist=bool(data.get("create_playlist", False)),
+            cache_bust=bool(data.get("cache_bust", False))
+        )
+
+
+@dataclass(frozen=True)
+class CrossDomainRequest:
+    """Validated body for the cross-domain recommendation endpoint"""
+    spotify_token: str
+    limit: int = 10
+    cache_bust: bool = False
+    force_refresh: bool = False
+
+    @classmethod
+    def from_json(cls, data) -> "CrossDomainRequest":
+        data = _require_object(data)
+        return cls(
+            spotify_token=_required_string(data, "spotify_token"),
+            limit=_bounded_limit(data, 10, 20),
+            cache_bust=bool(data.get("cache_bust", False)),
+            force_refresh=bool(data.get("force_refresh", False))
+        )
+
+
+@dataclass(frozen=True)
+class ArtistRecommendationRequest:
+    """Validated body for the artist-priority recommendation endpoint"""
+    spotify_token: str
+    artist_name: str
+    context: str = ""
+    limit: int = 15
+
+    @classmethod
+    def from_json(cls, data) -> "ArtistRecommendationRequest":
+        data = _require_object(data)
+        return cls(
+            spotify_token=_required_string(data, "spotify_token"),
+            artist_name=_required_string(data, "artist_name"),
+            context=_optional_string(data, "context"),
+            limit=_bounded_limit(data, 15, 50)
+        )
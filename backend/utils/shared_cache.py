@@ -0,0 +1,117 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Optional
+
+from utils.ttl_cache import TTLCache
+
+try:
+    import redis
+except ImportError:  # redis is optional; entries then stay in this process
+    redis = None
+
+log = logging.getLogger(__name__)
+
+# Redis is a cache here, so a slow or unreachable server must fail fast rather than stall requests
+REDIS_SOCKET_TIMEOUT = 0.5  # seconds, for both connecting and each command
+REDIS_RETRY_AFTER = 30  # seconds to skip Redis after an error before trying it again
+
+
+def connect_redis(redis_url: str = None):
+    """Redis client with short socket timeouts, or None when redis or REDIS_URL is missing"""
+    redis_url = redis_url or os.getenv('REDIS_URL')
+    if not (redis and redis_url):
+        return None
+    return redis.Redis.from_url(redis_url, decode_responses=True,
+                                socket_timeout=REDIS_SOCKET_TIMEOUT,
+                                socket_connect_timeout=REDIS_SOCKET_TIMEOUT)
+
+
+class RedisCircuit:
+    """Stops using Redis for REDIS_RETRY_AFTER seconds after an error, so an outage costs one timeout, not one per call"""
+
+    def __init__(self):
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    def closed(self) -> bool:
+        """True while Redis may be used"""
+        return time.time() >= self._open_until
+
+    def trip(self):
+        """Record a Redis error and skip Redis for a while"""
+        with self._lock:
+            self._open_until = time.time() + REDIS_RETRY_AFTER
+
+
+def make_cache_key(*parts) -> str:
+    """Short stable hash of JSON-serializable inputs"""
+    raw = json.dumps(parts, sort_keys=True, default=str).encode()
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+class SharedCache:
+    """JSON values cached with a TTL in Redis when REDIS_URL is set, otherwise in a local TTLCache"""
+
+    def __init__(self, namespace: str, ttl: int, redis_url: str = None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.redis = connect_redis(redis_url)
+        self.circuit = RedisCircuit()
+        self.local = TTLCache(ttl)
+
+    def _key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _use_redis(self) -> bool:
+        return self.redis is not None and self.circuit.closed()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Cached value for key, or None on a miss"""
+        if self._use_redis():
+            try:
+                raw = self.redis.get(self._key(key))
+                if raw is not None:
+                    return json.loads(raw)
+            except Exception as e:
+                self.circuit.trip()
+                log.warning("[CACHE] Redis read failed for %s, using in-memory cache: %s", self.namespace, e)
+        entry = self.local.get(key)
+        # Stored serialized like in Redis, so callers never share (and mutate) one cached object
+        return json.loads(entry.data) if entry else None
+
+    def set(self, key: str, value: Any):
+        """Store value under key for ttl seconds"""
+        if self._use_redis():
+            try:
+                self.redis.setex(self._key(key), self.ttl, json.dumps(value))
+                return
+            except Exception as e:
+                self.circuit.trip()
+                log.warning("[CACHE] Redis write failed for %s, keeping value in memory: %s", self.namespace, e)
+        self.local.set(key, json.dumps(value))
+
+    def delete(self, key: str):
+        """Drop one entry, e.g. after the data behind it changed"""
+        if self._use_redis():
+            try:
+                self.redis.delete(self._key(key))
+            except Exception as e:
+                self.circuit.trip()
+                log.warning("[CACHE] Redis delete failed for %s: %s", self.namespace, e)
+        self.local.pop(key)
+
+    def clear(self):
+        """Drop every entry in this namespace"""
+        if self._use_redis():
+            try:
+                keys = list(self.redis.scan_iter(match=self._key("*"), count=500))
+                if keys:
+                    self.redis.delete(*keys)
+            except Exception as e:
+                self.circuit.trip()
+                log.warning("[CACHE] Redis clear failed for %s: %s", self.namespace, e)
+        self.local.clear()
@@ -0,0 +1,69 @@
+import heapq
+import threading
+import time
+from collections import namedtuple
+from typing import Any, Dict, Optional
+
+# Tuple-backed entries: smaller than a dict per key and read by C-level index
+CacheEntry = namedtuple("CacheEntry", "timestamp data")
+
+
+class TTLCache:
+    """Dict-backed cache that expires entries lazily using a heap of expiry times"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self._entries: Dict[str, CacheEntry] = {}
+        self._expiry_heap = []  # (expires_at, key)
+        self.expired_count = 0
+        # Request threads share one cache; guard the heap/dict pair
+        self._lock = threading.Lock()
+
+    def _sweep(self, now: float = None):
+        """Drop entries whose expiry time has passed; only touches expired heap items"""
+        now = now or time.time()
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            entry = self._entries.get(key)
+            # A key that was re-set since this heap item was pushed has a newer expiry
+            if entry is not None and entry.timestamp + self.ttl == expires_at:
+                del self._entries[key]
+                self.expired_count += 1
+
+    def get(self, key: str, now: float = None) -> Optional[CacheEntry]:
+        """Return the live CacheEntry(timestamp, data) for key, or None"""
+        with self._lock:
+            self._sweep(now)
+            return self._entries.get(key)
+
+    def set(self, key: str, data: Any):
+        """Store data under key, stamped with the current time"""
+        now = time.time()
+        with self._lock:
+            self._entries[key] = CacheEntry(now, data)
+            heapq.heappush(self._expiry_heap, (now + self.ttl, key))
+
+    def pop(self, key: str):
+        """Remove key if present (its heap item is skipped when it comes due)"""
+        with self._lock:
+            return self._entries.pop(key, None)
+
+    def items(self):
+        """Live (key, entry) pairs"""
+        with self._lock:
+            self._sweep()
+            return list(self._entries.items())
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._expiry_heap.clear()
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._sweep()
+            return len(self._entries)